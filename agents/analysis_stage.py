@@ -0,0 +1,85 @@
+"""
+Etapa de análisis concurrente de una idea.
+
+critic, competition, estimation y researcher solo leen los campos de la idea,
+así que se lanzan a la vez (asyncio + hilos) bajo el limitador compartido.
+Si la crítica rechaza la idea, el resto se cancela antes de gastar más
+llamadas. La latencia pasa de la suma de las llamadas a la más lenta.
+"""
+import time
+import asyncio
+import importlib
+import threading
+
+from agents import llm
+
+# clave en la idea ← (módulo, función)
+AGENTES = {
+    "critique":    ("agents.critic_agent",      "critique"),
+    "competencia": ("agents.competition_agent", "analyze_competition"),
+    "estimacion":  ("agents.estimation_agent",  "estimate_project"),
+    "research":    ("agents.researcher_agent",  "research_idea"),
+}
+
+
+def _resolver(modulo: str, funcion: str):
+    return getattr(importlib.import_module(modulo), funcion)
+
+
+async def _ejecutar(nombre: str, funcion, idea: dict, cancelacion: threading.Event):
+    def _en_hilo():
+        llm.fijar_cancelacion(cancelacion)
+        inicio = time.perf_counter()
+        try:
+            return funcion(dict(idea))
+        finally:
+            print(f"⏱️ [Análisis] {nombre}: {time.perf_counter() - inicio:.1f}s")
+    return await asyncio.to_thread(_en_hilo)
+
+
+async def analizar_idea(idea: dict, aprobar=None) -> bool:
+    """
+    Ejecuta los agentes de AGENTES en paralelo y fusiona sus resultados en
+    `idea`. `aprobar(idea, critica)` decide si seguir; si devuelve False se
+    cancelan los agentes pendientes y la función devuelve False.
+    """
+    cancelacion = threading.Event()
+    tareas = {
+        nombre: asyncio.create_task(_ejecutar(nombre, _resolver(*ref), idea, cancelacion))
+        for nombre, ref in AGENTES.items()
+    }
+
+    critica = None
+    try:
+        critica = await tareas["critique"]
+    except Exception as e:
+        print(f"⚠️ [Análisis] critique falló: {e}")
+
+    if critica:
+        idea["critique"] = critica
+        idea["score_critico"] = critica.get("score_critico", 0)
+        if aprobar is not None and not aprobar(idea, critica):
+            cancelacion.set()
+            for nombre, tarea in tareas.items():
+                if nombre != "critique":
+                    tarea.cancel()
+            await asyncio.gather(*tareas.values(), return_exceptions=True)
+            print("🛑 [Análisis] Idea rechazada por el crítico — análisis restante cancelado")
+            return False
+
+    resto = [n for n in tareas if n != "critique"]
+    resultados = await asyncio.gather(*(tareas[n] for n in resto), return_exceptions=True)
+    for nombre, resultado in zip(resto, resultados):
+        if isinstance(resultado, BaseException):
+            print(f"⚠️ [Análisis] {nombre} falló: {resultado}")
+        elif resultado:
+            idea[nombre] = resultado
+    return True
+
+
+def analizar(idea: dict, aprobar=None) -> bool:
+    """Versión síncrona de `analizar_idea` para scripts sin event loop."""
+    inicio = time.perf_counter()
+    aprobada = asyncio.run(analizar_idea(idea, aprobar))
+    print(f"⏱️ [Análisis] Total: {time.perf_counter() - inicio:.1f}s")
+    return aprobada
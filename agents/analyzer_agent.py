@@ -1,10 +1,4 @@
-import os
-import time
-import requests
-from agents.encoding_helper import fix_llm_encoding
-
-GROQ_API_KEY  = os.environ.get("GROQ_API_KEY")
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+from agents import llm
 
 # ── 15 secciones obligatorias ─────────────────────────────────────────────────
 SECCIONES = [
@@ -35,77 +29,10 @@ FRASES_RELLENO = [
 
 # ── LLM helpers ───────────────────────────────────────────────────────────────
 
-def _groq(prompt: str, max_tokens: int = 4096) -> str:
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json",
-    }
-    body = {
-        "model": "llama-3.3-70b-versatile",
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.7,
-        "max_tokens": max_tokens,
-    }
-    r = requests.post(
-        "https://api.groq.com/openai/v1/chat/completions",
-        headers=headers, json=body, timeout=120
-    )
-    if r.status_code == 429:
-        raise RuntimeError("RATE_LIMIT_GROQ")
-    r.raise_for_status()
-    return fix_llm_encoding(r.json()["choices"][0]["message"]["content"])
-
-
-def _gemini(prompt: str, max_tokens: int = 4096) -> str:
-    url = (
-        "https://generativelanguage.googleapis.com/v1beta/models/"
-        f"gemini-2.0-flash:generateContent?key={GEMINI_API_KEY}"
-    )
-    body = {
-        "contents": [{"parts": [{"text": prompt}]}],
-        "generationConfig": {"maxOutputTokens": max_tokens, "temperature": 0.7},
-    }
-    r = requests.post(url, json=body, timeout=120)
-    if r.status_code == 429:
-        raise RuntimeError("RATE_LIMIT_GEMINI")
-    r.raise_for_status()
-    return fix_llm_encoding(
-        r.json()["candidates"][0]["content"]["parts"][0]["text"]
-    )
-
-
 def llamar_ia(prompt: str, max_tokens: int = 4096) -> str | None:
-    for intento in range(3):
-        try:
-            return _groq(prompt, max_tokens)
-        except RuntimeError as e:
-            if "RATE_LIMIT" in str(e):
-                espera = 30 * (2 ** intento)
-                print(f"[Groq] Rate limit. Esperando {espera}s...")
-                time.sleep(espera)
-            else:
-                print(f"[Groq] Error: {e}")
-                break
-        except Exception as e:
-            print(f"[Groq] Error inesperado: {e}")
-            break
-
-    for intento in range(3):
-        try:
-            print("[Gemini] Usando fallback...")
-            return _gemini(prompt, max_tokens)
-        except RuntimeError as e:
-            if "RATE_LIMIT" in str(e):
-                espera = 45 * (2 ** intento)
-                print(f"[Gemini] Rate limit. Esperando {espera}s...")
-                time.sleep(espera)
-            else:
-                print(f"[Gemini] Error: {e}")
-                break
-        except Exception as e:
-            print(f"[Gemini] Error: {e}")
-            time.sleep(30)
-    return None
+    # Con LLM_HEDGE=analyzer una respuesta lenta se duplica en el otro proveedor
+    return llm.completar(prompt, temperature=0.7, max_tokens=max_tokens, timeout=120,
+                         agente="analyzer")
 
 
 # ── P4: Validador de calidad ──────────────────────────────────────────────────
@@ -0,0 +1,148 @@
+"""
+Registro durable de trabajos por idea (checkpoints en SQLite).
+
+Cada idea en curso tiene un trabajo identificado por su huella (hash de
+nombre + problema) que guarda qué etapas terminaron y su salida. Si
+main_workflow o run_batch mueren entre la generación y Notion (timeout,
+OOM, reinicio), la siguiente ejecución reclama los trabajos pendientes y
+sigue desde la primera etapa sin terminar en lugar de volver a pagar LLM.
+
+Un trabajo reclamado queda reservado RESERVA segundos para que dos
+procesos no lo reanuden a la vez; tras MAX_REANUDACIONES se abandona.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+CHECKPOINTS_PATH = os.path.join("data", "checkpoints.sqlite")
+
+TTL               = 48 * 3600   # segundos: trabajos más viejos no se reanudan
+RESERVA           = 600         # segundos que un proceso tiene reservado un trabajo
+MAX_REANUDACIONES = 3
+
+PENDIENTE  = "pendiente"
+COMPLETADO = "completado"
+DESCARTADO = "descartado"
+ABANDONADO = "abandonado"
+
+
+def _conectar() -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(CHECKPOINTS_PATH) or ".", exist_ok=True)
+    con = sqlite3.connect(CHECKPOINTS_PATH, timeout=30, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS trabajos (
+            huella          TEXT PRIMARY KEY,
+            origen          TEXT,
+            estado          TEXT,
+            etapas          TEXT,
+            datos           TEXT,
+            reanudaciones   INTEGER,
+            reservado_hasta REAL,
+            creado          REAL,
+            actualizado     REAL
+        )""")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_trabajos_origen ON trabajos (origen, estado)")
+    return con
+
+
+def huella(idea: dict) -> str:
+    """Identificador estable de la idea: no cambia al añadirle críticas o URLs."""
+    texto = f"{idea.get('nombre', '')}|{idea.get('problema', '')}".strip().lower()
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:20]
+
+
+def guardar(clave: str, origen: str, etapas: list, datos: dict):
+    """Anota las etapas terminadas y su salida (sobrescribe el checkpoint anterior)."""
+    ahora = time.time()
+    try:
+        con = _conectar()
+        try:
+            con.execute(
+                # un trabajo ya cerrado que vuelve a guardarse (idea regenerada)
+                # se reabre como nuevo: pendiente, sin reanudaciones y sin caducar
+                """INSERT INTO trabajos VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?)
+                   ON CONFLICT(huella) DO UPDATE SET
+                       reanudaciones = CASE WHEN estado = excluded.estado THEN reanudaciones ELSE 0 END,
+                       creado = CASE WHEN estado = excluded.estado THEN creado ELSE excluded.creado END,
+                       estado = excluded.estado,
+                       etapas = excluded.etapas, datos = excluded.datos,
+                       reservado_hasta = excluded.reservado_hasta,
+                       actualizado = excluded.actualizado""",
+                (clave, origen, PENDIENTE, json.dumps(list(etapas)),
+                 json.dumps(datos, ensure_ascii=False, default=str), ahora + RESERVA, ahora, ahora),
+            )
+        finally:
+            con.close()
+    except sqlite3.Error as e:
+        print(f"⚠️ [Checkpoints] No se pudo guardar {clave}: {e}")
+
+
+def cerrar(clave: str, estado: str = COMPLETADO):
+    """Marca el trabajo como terminado (ya no se reanuda)."""
+    try:
+        con = _conectar()
+        try:
+            con.execute("UPDATE trabajos SET estado = ?, actualizado = ? WHERE huella = ?",
+                        (estado, time.time(), clave))
+        finally:
+            con.close()
+    except sqlite3.Error as e:
+        print(f"⚠️ [Checkpoints] No se pudo cerrar {clave}: {e}")
+
+
+def reclamar(origen: str, limite: int = 5) -> list:
+    """
+    Reserva hasta `limite` trabajos pendientes de `origen` (más antiguos
+    primero) y los devuelve como [{"huella", "etapas", "datos"}]. Los que
+    agotaron sus reanudaciones o caducaron se abandonan.
+    """
+    ahora = time.time()
+    try:
+        con = _conectar()
+    except sqlite3.Error as e:
+        print(f"⚠️ [Checkpoints] Sin acceso: {e}")
+        return []
+    try:
+        con.execute("BEGIN IMMEDIATE")
+        con.execute(
+            "UPDATE trabajos SET estado = ? WHERE origen = ? AND estado = ? "
+            "AND (reanudaciones >= ? OR creado < ?)",
+            (ABANDONADO, origen, PENDIENTE, MAX_REANUDACIONES, ahora - TTL),
+        )
+        filas = con.execute(
+            "SELECT huella, etapas, datos FROM trabajos WHERE origen = ? AND estado = ? "
+            "AND reservado_hasta < ? ORDER BY creado LIMIT ?",
+            (origen, PENDIENTE, ahora, limite),
+        ).fetchall()
+        for clave, _, _ in filas:
+            con.execute(
+                "UPDATE trabajos SET reanudaciones = reanudaciones + 1, reservado_hasta = ? "
+                "WHERE huella = ?", (ahora + RESERVA, clave))
+        con.execute("COMMIT")
+        return [{"huella": h, "etapas": json.loads(e), "datos": json.loads(d)} for h, e, d in filas]
+    except sqlite3.Error as e:
+        print(f"⚠️ [Checkpoints] No se pudieron reclamar trabajos: {e}")
+        return []
+    finally:
+        con.close()
+
+
+def estado(clave: str) -> dict | None:
+    """Trabajo guardado (diagnósticos y tests), o None."""
+    try:
+        con = _conectar()
+        try:
+            fila = con.execute(
+                "SELECT estado, etapas, datos, reanudaciones FROM trabajos WHERE huella = ?", (clave,),
+            ).fetchone()
+        finally:
+            con.close()
+    except sqlite3.Error:
+        return None
+    if not fila:
+        return None
+    return {"estado": fila[0], "etapas": json.loads(fila[1]), "datos": json.loads(fila[2]),
+            "reanudaciones": fila[3]}
@@ -0,0 +1,149 @@
+"""
+Circuit breaker por proveedor compartido entre procesos (estado en SQLite).
+
+run_batch se lanza como subproceso nuevo cada 30 min y desde /idea; sin
+memoria, cada ejecución gastaba sus reintentos y el backoff completo contra
+un proveedor caído. Aquí cada fallo transitorio (5xx, timeout, red) suma y,
+tras UMBRAL_FALLOS seguidos, el circuito se abre: durante `enfriamiento`
+segundos todos los procesos saltan ese proveedor sin llamarlo. Al vencer
+pasa a semiabierto y un único proceso hace la llamada de prueba; si sale
+bien se cierra, si falla se reabre con el doble de enfriamiento.
+
+Los 429 no cuentan: de eso se encarga agents/rate_limiter.py.
+"""
+import os
+import time
+import sqlite3
+
+BREAKER_PATH = os.path.join("data", "circuit_breaker.sqlite")
+
+UMBRAL_FALLOS     = 3      # fallos transitorios seguidos para abrir
+ENFRIAMIENTO      = 60     # segundos abierto la primera vez
+ENFRIAMIENTO_TOPE = 900    # segundos
+PRUEBA_TTL        = 120    # segundos que un proceso tiene reservada la prueba
+
+CERRADO     = "cerrado"
+ABIERTO     = "abierto"
+SEMIABIERTO = "semiabierto"
+
+
+def _conectar() -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(BREAKER_PATH) or ".", exist_ok=True)
+    con = sqlite3.connect(BREAKER_PATH, timeout=30, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS circuitos (
+            proveedor    TEXT PRIMARY KEY,
+            estado       TEXT,
+            fallos       INTEGER,
+            abierto_hasta REAL,
+            enfriamiento REAL,
+            prueba_hasta REAL
+        )""")
+    return con
+
+
+def _cerrado() -> dict:
+    return {"estado": CERRADO, "fallos": 0, "abierto_hasta": 0.0,
+            "enfriamiento": float(ENFRIAMIENTO), "prueba_hasta": 0.0}
+
+
+def _leer(con, proveedor: str) -> dict:
+    fila = con.execute(
+        "SELECT estado, fallos, abierto_hasta, enfriamiento, prueba_hasta FROM circuitos "
+        "WHERE proveedor = ?", (proveedor,),
+    ).fetchone()
+    if not fila:
+        return _cerrado()
+    return dict(zip(("estado", "fallos", "abierto_hasta", "enfriamiento", "prueba_hasta"), fila))
+
+
+def _escribir(con, proveedor: str, c: dict):
+    con.execute(
+        "INSERT OR REPLACE INTO circuitos VALUES (?, ?, ?, ?, ?, ?)",
+        (proveedor, c["estado"], c["fallos"], c["abierto_hasta"], c["enfriamiento"], c["prueba_hasta"]),
+    )
+
+
+def _transaccion(proveedor: str, cambio, por_defecto):
+    """Lee, aplica `cambio(circuito, ahora)` y guarda en una transacción exclusiva."""
+    try:
+        con = _conectar()
+    except sqlite3.Error as e:
+        print(f"⚠️ [Circuito] Error SQLite, se continúa sin circuito: {e}")
+        return por_defecto
+    try:
+        con.execute("BEGIN IMMEDIATE")
+        circuito = _leer(con, proveedor)
+        resultado = cambio(circuito, time.time())
+        _escribir(con, proveedor, circuito)
+        con.execute("COMMIT")
+        return resultado
+    except sqlite3.Error as e:
+        print(f"⚠️ [Circuito] Error SQLite, se continúa sin circuito: {e}")
+        return por_defecto
+    finally:
+        con.close()
+
+
+def permitir(proveedor: str) -> bool:
+    """
+    True si se puede llamar a `proveedor` ahora. Con el circuito vencido
+    reserva la llamada de prueba para este proceso (semiabierto).
+    """
+    if estado(proveedor)["estado"] == CERRADO:
+        return True   # caso normal: lectura sin bloquear la base
+
+    def cambio(c, ahora):
+        if c["estado"] == CERRADO:
+            return True
+        if c["estado"] == ABIERTO and ahora < c["abierto_hasta"]:
+            return False
+        if c["estado"] == SEMIABIERTO and ahora < c["prueba_hasta"]:
+            return False   # otro proceso está haciendo la prueba
+        c["estado"] = SEMIABIERTO
+        c["prueba_hasta"] = ahora + PRUEBA_TTL
+        print(f"🔌 [Circuito] {proveedor}: semiabierto, llamada de prueba")
+        return True
+    return _transaccion(proveedor, cambio, True)
+
+
+def exito(proveedor: str):
+    """Una llamada correcta cierra el circuito y pone a cero los fallos."""
+    if estado(proveedor) == _cerrado():
+        return   # caso normal: sin escritura
+
+    def cambio(c, ahora):
+        if c["estado"] != CERRADO:
+            print(f"🔌 [Circuito] {proveedor}: cerrado")
+        c.update(_cerrado())
+    _transaccion(proveedor, cambio, None)
+
+
+def fallo(proveedor: str) -> bool:
+    """Anota un fallo transitorio; abre el circuito si toca. True si queda abierto."""
+    def cambio(c, ahora):
+        c["fallos"] += 1
+        if c["estado"] == SEMIABIERTO:
+            c["enfriamiento"] = min(c["enfriamiento"] * 2, ENFRIAMIENTO_TOPE)
+        elif c["estado"] == ABIERTO or c["fallos"] < UMBRAL_FALLOS:
+            return c["estado"] == ABIERTO
+        c.update(estado=ABIERTO, abierto_hasta=ahora + c["enfriamiento"], prueba_hasta=0.0)
+        print(f"🔌 [Circuito] {proveedor}: abierto {c['enfriamiento']:.0f}s "
+              f"tras {c['fallos']} fallos seguidos")
+        return True
+    return _transaccion(proveedor, cambio, False)
+
+
+def estado(proveedor: str) -> dict:
+    """Estado guardado del circuito (diagnósticos y /status)."""
+    try:
+        con = _conectar()
+    except sqlite3.Error:
+        return _cerrado()
+    try:
+        return _leer(con, proveedor)
+    except sqlite3.Error:
+        return _cerrado()
+    finally:
+        con.close()
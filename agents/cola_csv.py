@@ -1,22 +1,15 @@
 import os
-import csv
 import json
 from datetime import datetime
 
+from agents import storage
+
 COLA_PATH = os.path.join("data", "cola_pendiente.csv")
 CAMPOS = ["timestamp", "nombre_idea", "motivo_fallo", "intentos", "datos_json"]
-
-
-def _asegurar_archivo():
-    os.makedirs("data", exist_ok=True)
-    if not os.path.exists(COLA_PATH):
-        with open(COLA_PATH, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=CAMPOS)
-            writer.writeheader()
+MAX_INTENTOS = 3
 
 
 def guardar_en_cola(nombre_idea, motivo_fallo, datos_json):
-    _asegurar_archivo()
     fila = {
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "nombre_idea": str(nombre_idea)[:200],
@@ -24,51 +17,55 @@ def guardar_en_cola(nombre_idea, motivo_fallo, datos_json):
         "intentos": "1",
         "datos_json": json.dumps(datos_json, ensure_ascii=False)
     }
-    with open(COLA_PATH, "a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=CAMPOS)
-        writer.writerow(fila)
+    storage.anadir_csv(COLA_PATH, fila, CAMPOS)
     print(f"📋 '{nombre_idea}' guardada en cola CSV para reintento")
 
 
+def leer_cola():
+    """Todas las filas de la cola (también las que agotaron intentos)."""
+    return storage.leer_csv(COLA_PATH)
+
+
 def obtener_pendientes():
-    _asegurar_archivo()
     pendientes = []
-    with open(COLA_PATH, "r", newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for fila in reader:
-            try:
-                if int(fila.get("intentos", 0)) < 3:
-                    pendientes.append(dict(fila))
-            except (ValueError, KeyError):
-                continue
+    for fila in leer_cola():
+        try:
+            if int(fila.get("intentos", 0)) < MAX_INTENTOS:
+                pendientes.append(fila)
+        except (ValueError, KeyError, TypeError):
+            continue
     return pendientes
 
 
+def aplicar_resultados(eliminar=(), reintentar=()):
+    """
+    Quita de la cola los timestamps de `eliminar` y suma un intento a los de
+    `reintentar`, releyendo bajo el bloqueo: lo que otro proceso haya
+    encolado mientras tanto se conserva.
+    """
+    eliminar, reintentar = set(eliminar), set(reintentar)
+
+    def aplicar(filas):
+        restantes = []
+        for fila in filas:
+            ts = fila.get("timestamp")
+            if ts in eliminar:
+                continue
+            if ts in reintentar:
+                fila["intentos"] = str(int(fila.get("intentos") or 1) + 1)
+            restantes.append(fila)
+        return restantes
+
+    if eliminar or reintentar:
+        storage.actualizar_csv(COLA_PATH, aplicar, CAMPOS)
+
+
 def incrementar_intentos(timestamp):
-    _asegurar_archivo()
-    filas = []
-    with open(COLA_PATH, "r", newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        filas = list(reader)
-    for fila in filas:
-        if fila.get("timestamp") == timestamp:
-            fila["intentos"] = str(int(fila.get("intentos", 1)) + 1)
-    with open(COLA_PATH, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=CAMPOS)
-        writer.writeheader()
-        writer.writerows(filas)
+    aplicar_resultados(reintentar=[timestamp])
 
 
 def eliminar_de_cola(timestamp):
-    _asegurar_archivo()
-    filas = []
-    with open(COLA_PATH, "r", newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        filas = [row for row in reader if row.get("timestamp") != timestamp]
-    with open(COLA_PATH, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=CAMPOS)
-        writer.writeheader()
-        writer.writerows(filas)
+    aplicar_resultados(eliminar=[timestamp])
 
 
 def contar_pendientes():
@@ -1,12 +1,7 @@
 """
 Competition Agent: análisis de competencia robusto
 """
-import os
-import json
-import re
-from groq import Groq
-
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+from agents import esquemas, llm
 
 def analyze_competition(idea):
     """Analiza competencia con parsing robusto"""
@@ -33,28 +28,13 @@ Responde SOLO con un objeto JSON válido (sin markdown, sin ```json):
 }}"""
 
     try:
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=1200
-        )
-        
-        content = response.choices.message.content.strip()
-        
-        # Limpiar markdown si existe
-        content = re.sub(r'^```json\s*', '', content)
-        content = re.sub(r'\s*```$', '', content)
-        content = content.strip()
-        
-        analysis = json.loads(content)
-        
-        print(f"✅ {len(analysis.get('competidores_directos', []))} competidores encontrados")
-        
-        return analysis
-        
-    except json.JSONDecodeError as e:
-        print(f"⚠️ Error JSON: {e}")
+        analysis = llm.completar_json(prompt, esquema=esquemas.COMPETENCIA, temperature=0.3,
+                                      max_tokens=1200, agente="competition")
+        if analysis:
+            print(f"✅ {len(analysis.get('competidores_directos', []))} competidores encontrados")
+            return analysis
+
+        print("⚠️ Sin JSON válido de competencia")
         return {
             "competidores_directos": [],
             "competidores_indirectos": [],
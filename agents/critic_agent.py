@@ -1,54 +1,10 @@
 ﻿import os
 import json
-import time
-import random
-from groq import Groq
-from agents.encoding_helper import fix_llm_encoding
-
-def _groq_chat(messages, max_intentos=3):
-    client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
-    model = "llama-3.3-70b-versatile"
-    for intento in range(max_intentos):
-        try:
-            return client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0.3,
-                max_tokens=600,
-            )
-        except Exception as e:
-            if "429" in str(e) or "rate" in str(e).lower():
-                espera = min(4 * (2 ** intento) + random.uniform(0, 2), 30)
-                print(f"⏳ Rate limit detectado (intento {intento+1}/{max_intentos})")
-                print(f"⏰ Esperando {espera:.1f}s (backoff)...")
-                time.sleep(espera)
-                if intento >= 1:
-                    model = "llama-3.1-8b-instant"
-                    print("🔄 Cambiando a modelo ligero: llama-3.1-8b-instant")
-            else:
-                raise
-    return None
+from agents import esquemas, llm
 
-def critique(idea):
-    nombre      = idea.get("nombre", "")
-    problema    = idea.get("problema", "")
-    solucion    = idea.get("solucion", "")
-    tipo        = idea.get("tipo", "")
-    vertical    = idea.get("vertical", "")
-    monetizacion = idea.get("monetizacion", idea.get("modelo_negocio", ""))
-    propuesta   = idea.get("propuesta_valor", "")
+CONFIG_PATH = os.path.join("config", "generator_config.json")
 
-    prompt = f"""Eres un inversor experto y crítico ESTRICTO de startups. Evalúa esta idea con RIGOR MÁXIMO.
-
-IDEA: {nombre}
-PROBLEMA: {problema}
-SOLUCIÓN: {solucion}
-TIPO: {tipo}
-MERCADO: {vertical}
-MONETIZACIÓN: {monetizacion}
-PROPUESTA VALOR: {propuesta}
-
-CRITERIOS DE EVALUACIÓN ESTRICTOS:
+CRITERIOS = """CRITERIOS DE EVALUACIÓN ESTRICTOS:
 
 score_critico (0-100): Viabilidad real
 - ¿El problema es REAL y frecuente?
@@ -71,8 +27,41 @@ score_money (0-100): Potencial de ingresos REALES
 - Sé REALISTA: la mayoría tardan en monetizar
 
 IMPORTANTE: Da scores VARIADOS y REALISTAS, no siempre 80. 
-Si algo es mediocre, pon 55. Si es excepcional, pon 90.
+Si algo es mediocre, pon 55. Si es excepcional, pon 90."""
+
+def load_config():
+    """Umbrales de publicación (config/generator_config.json)."""
+    try:
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {"umbral_critico": 55}
+
+def decide_publish(idea, critique_result, config=None):
+    """True si el score del crítico alcanza `umbral_critico`."""
+    config = config or load_config()
+    return critique_result.get("score_critico", 0) >= config.get("umbral_critico", 55)
 
+def critique(idea):
+    nombre      = idea.get("nombre", "")
+    problema    = idea.get("problema", "")
+    solucion    = idea.get("solucion", "")
+    tipo        = idea.get("tipo", "")
+    vertical    = idea.get("vertical", "")
+    monetizacion = idea.get("monetizacion", idea.get("modelo_negocio", ""))
+    propuesta   = idea.get("propuesta_valor", "")
+
+    prompt = f"""Eres un inversor experto y crítico ESTRICTO de startups. Evalúa esta idea con RIGOR MÁXIMO.
+
+IDEA: {nombre}
+PROBLEMA: {problema}
+SOLUCIÓN: {solucion}
+TIPO: {tipo}
+MERCADO: {vertical}
+MONETIZACIÓN: {monetizacion}
+PROPUESTA VALOR: {propuesta}
+
+{CRITERIOS}
 Responde SOLO JSON válido sin markdown:
 {{
   "score_critico": <numero 0-100>,
@@ -85,26 +74,10 @@ Responde SOLO JSON válido sin markdown:
 }}"""
 
     try:
-        response = _groq_chat([{"role": "user", "content": prompt}])
-        if not response:
-            raise Exception("Sin respuesta de Groq")
-
-        content = response.choices[0].message.content.strip()
-        content = fix_llm_encoding(content)
-
-        if "```" in content:
-            parts = content.split("```")
-            for part in parts:
-                if "{" in part:
-                    content = part.replace("json", "").strip()
-                    break
-
-        inicio = content.find("{")
-        fin = content.rfind("}") + 1
-        if inicio >= 0 and fin > inicio:
-            content = content[inicio:fin]
-
-        result = json.loads(content)
+        result = llm.completar_json(prompt, esquema=esquemas.CRITICA, temperature=0.3,
+                                    max_tokens=600, agente="critic")
+        if not result:
+            raise Exception("Sin respuesta JSON válida del LLM")
 
         result.setdefault("score_critico", 68)
         result.setdefault("viral_score", 50)
@@ -130,6 +103,57 @@ Responde SOLO JSON válido sin markdown:
             "score_money": 55,
             "puntos_fuertes": ["Problema real identificado", "Mercado existente"],
             "puntos_debiles": ["Necesita validación de demanda", "Analizar competencia"],
-            "resumen": "Idea con potencial moderado. Requiere validación antes de construir."
+            "resumen": "Idea con potencial moderado. Requiere validación antes de construir.",
+            "por_defecto": True,   # no es una crítica real (el predictor no aprende de ella)
         }
+def _resumen_para_lote(i, idea):
+    monetizacion = idea.get("monetizacion", idea.get("modelo_negocio", ""))
+    return (f"[{i}] {idea.get('nombre', '')}\n"
+            f"PROBLEMA: {idea.get('problema', '')}\n"
+            f"SOLUCIÓN: {idea.get('solucion', '')}\n"
+            f"TIPO: {idea.get('tipo', '')} | MERCADO: {idea.get('vertical', '')}\n"
+            f"MONETIZACIÓN: {monetizacion}")
+
+def critique_lote(ideas):
+    """Evalúa varias ideas en una sola llamada. Devuelve una crítica (o None) por idea, en orden."""
+    if not ideas:
+        return []
+    bloque = "\n\n".join(_resumen_para_lote(i, idea) for i, idea in enumerate(ideas))
+    prompt = f"""Eres un inversor experto y crítico ESTRICTO de startups. Evalúa estas {len(ideas)} ideas con RIGOR MÁXIMO, cada una por separado y comparándolas entre sí.
+
+{bloque}
+
+{CRITERIOS}
+
+Responde SOLO JSON válido sin markdown, con una evaluación por idea usando su número entre corchetes como "indice":
+{{
+  "evaluaciones": [
+    {{
+      "indice": 0,
+      "score_critico": <numero 0-100>,
+      "viral_score": <numero 0-100>,
+      "score_generador": <numero 0-100>,
+      "score_money": <numero 0-100>,
+      "puntos_fuertes": ["fortaleza concreta 1", "fortaleza concreta 2"],
+      "puntos_debiles": ["debilidad concreta 1", "debilidad concreta 2"],
+      "resumen": "Evaluación ejecutiva en 1-2 frases sobre ESTA idea"
+    }}
+  ]
+}}"""
+
+    datos = llm.completar_json(prompt, esquema=esquemas.CRITICA_LOTE, temperature=0.3,
+                               max_tokens=250 * len(ideas) + 150, agente="critic")
+    criticas = [None] * len(ideas)
+    if not datos:
+        print("❌ Crítica en lote sin respuesta válida")
+        return criticas
+    for evaluacion in datos["evaluaciones"]:
+        indice = evaluacion.pop("indice")
+        if 0 <= indice < len(ideas):
+            criticas[indice] = evaluacion
+    for idea, c in zip(ideas, criticas):
+        if c:
+            print(f"📊 {idea.get('nombre', '?')}: Critico {c['score_critico']} | Viral {c['viral_score']} | Money {c['score_money']}")
+    return criticas
+
 # FIN COMPLETO critic_agent.py
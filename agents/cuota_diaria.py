@@ -0,0 +1,65 @@
+"""
+Cupo diario de ideas compartido entre procesos (contador en SQLite).
+
+run_continuous contaba las ideas de hoy releyendo todo data/ideas.json (y
+filtrando por un campo "date" que run_batch no escribe, así que siempre
+salía 0). Aquí cada generación reserva una plaza del día antes de empezar
+con un incremento atómico; si no publica nada, la devuelve. Con varios
+workers a la vez no se puede pasar del límite.
+"""
+import os
+import sqlite3
+from datetime import datetime
+
+CUOTA_PATH = os.path.join("data", "cuota_diaria.sqlite")
+
+
+def _conectar() -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(CUOTA_PATH) or ".", exist_ok=True)
+    con = sqlite3.connect(CUOTA_PATH, timeout=30, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("CREATE TABLE IF NOT EXISTS cuotas (dia TEXT PRIMARY KEY, usadas INTEGER)")
+    return con
+
+
+def hoy() -> str:
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+def reservar(limite: int) -> str | None:
+    """
+    Ocupa una plaza de hoy si quedan. Devuelve el día reservado (para
+    `liberar`, por si se cruza la medianoche) o None si el cupo está lleno.
+    """
+    if limite <= 0:
+        return None
+    dia = hoy()
+    con = _conectar()
+    try:
+        cursor = con.execute(
+            """INSERT INTO cuotas VALUES (?, 1)
+               ON CONFLICT(dia) DO UPDATE SET usadas = usadas + 1 WHERE usadas < ?""",
+            (dia, limite),
+        )
+        return dia if cursor.rowcount else None
+    finally:
+        con.close()
+
+
+def liberar(dia: str):
+    """Devuelve una plaza reservada que no llegó a producir idea."""
+    con = _conectar()
+    try:
+        con.execute("UPDATE cuotas SET usadas = usadas - 1 WHERE dia = ? AND usadas > 0", (dia,))
+    finally:
+        con.close()
+
+
+def usadas(dia: str | None = None) -> int:
+    """Plazas ocupadas (ideas en curso o publicadas) en `dia` (hoy por defecto)."""
+    con = _conectar()
+    try:
+        fila = con.execute("SELECT usadas FROM cuotas WHERE dia = ?", (dia or hoy(),)).fetchone()
+        return fila[0] if fila else 0
+    finally:
+        con.close()
@@ -0,0 +1,27 @@
+"""
+URLs base de las APIs externas.
+
+Con API_BASE_URL (p. ej. http://127.0.0.1:8765) todas las llamadas van al
+servidor local de scripts/fake_servers.py, cada servicio bajo su prefijo
+(/groq, /gemini, /notion, /telegram, /github); sin ella, a las APIs reales.
+Se lee en cada llamada para poder cambiarla sin reiniciar.
+"""
+import os
+
+BASES = {
+    "groq":     "https://api.groq.com",
+    "gemini":   "https://generativelanguage.googleapis.com",
+    "notion":   "https://api.notion.com",
+    "telegram": "https://api.telegram.org",
+    "github":   "https://api.github.com",
+}
+
+
+def base(servicio: str) -> str:
+    local = os.environ.get("API_BASE_URL", "").rstrip("/")
+    return f"{local}/{servicio}" if local else BASES[servicio]
+
+
+def url(servicio: str, ruta: str) -> str:
+    """URL completa de `ruta` (con "/" inicial) en `servicio`."""
+    return base(servicio) + ruta
@@ -0,0 +1,170 @@
+"""
+Esquemas de las respuestas JSON de cada agente.
+
+Subconjunto de JSON Schema (type, required, properties, items) suficiente
+para comprobar que la respuesta trae lo que el agente va a leer. Los
+números que llegan como texto ("75") se convierten en lugar de provocar
+otra llamada al LLM.
+"""
+
+_TIPOS = {
+    "object":  dict,
+    "array":   list,
+    "string":  str,
+    "number":  (int, float),
+    "integer": int,
+    "boolean": bool,
+}
+
+TEXTO  = {"type": "string"}
+NUMERO = {"type": "number"}
+LISTA  = {"type": "array"}
+
+IDEA = {
+    "type": "object",
+    "required": ["nombre", "descripcion", "problema", "solucion"],
+    "properties": {
+        "nombre": TEXTO, "descripcion": TEXTO, "problema": TEXTO, "solucion": TEXTO,
+        "vertical": TEXTO, "tipo": TEXTO, "monetizacion": TEXTO,
+    },
+}
+
+IDEA_BATCH = {
+    "type": "object",
+    "required": ["nombre", "problema", "solucion", "scores"],
+    "properties": {
+        "nombre": TEXTO, "tagline": TEXTO, "problema": TEXTO, "solucion": TEXTO,
+        "mercado": {"type": "object"},
+        "modelo_negocio": {"type": "object"},
+        "estudio_economico": {"type": "object"},
+        "dafo": {"type": "object"},
+        "mvp": {"type": "object"},
+        "scores": {
+            "type": "object",
+            "required": ["critico", "generador", "ejecutabilidad", "monetizacion"],
+            "properties": {k: NUMERO for k in
+                           ("critico", "viral", "generador", "monetizacion", "ejecutabilidad", "timing")},
+        },
+        "tags": LISTA,
+    },
+}
+
+IDEAS_LOTE = {
+    "type": "object",
+    "required": ["ideas"],
+    "properties": {
+        "ideas": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["nombre", "problema", "solucion"],
+                "properties": {
+                    "nombre": TEXTO, "tagline": TEXTO, "problema": TEXTO, "solucion": TEXTO,
+                    "modelo_negocio": {"type": "object"}, "mvp": {"type": "object"},
+                    "scores": {"type": "object", "properties": {k: NUMERO for k in
+                               ("generador", "ejecutabilidad", "timing")}},
+                    "tags": LISTA,
+                },
+            },
+        },
+    },
+}
+
+CRITICA = {
+    "type": "object",
+    "required": ["score_critico", "viral_score", "score_generador", "score_money"],
+    "properties": {
+        "score_critico": NUMERO, "viral_score": NUMERO,
+        "score_generador": NUMERO, "score_money": NUMERO,
+        "puntos_fuertes": LISTA, "puntos_debiles": LISTA, "resumen": TEXTO,
+    },
+}
+
+CRITICA_LOTE = {
+    "type": "object",
+    "required": ["evaluaciones"],
+    "properties": {
+        "evaluaciones": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["indice"] + CRITICA["required"],
+                "properties": {"indice": {"type": "integer"}, **CRITICA["properties"]},
+            },
+        },
+    },
+}
+
+COMPETENCIA = {
+    "type": "object",
+    "required": ["competidores_directos", "riesgo_competitivo"],
+    "properties": {
+        "competidores_directos": {"type": "array", "items": {"type": "object"}},
+        "competidores_indirectos": LISTA,
+        "ventaja_competitiva": TEXTO, "riesgo_competitivo": TEXTO,
+        "barreras_entrada": TEXTO, "nicho_recomendado": TEXTO,
+    },
+}
+
+ESTIMACION = {
+    "type": "object",
+    "required": ["inversion_mvp_usd", "tiempo_desarrollo_semanas"],
+    "properties": {
+        "inversion_mvp_usd": NUMERO, "tiempo_desarrollo_semanas": NUMERO,
+        "equipo_necesario": LISTA, "costos_mensuales_operacion": NUMERO,
+        "tiempo_breakeven_meses": NUMERO,
+        "viabilidad_tecnica": TEXTO, "complejidad": TEXTO,
+    },
+}
+
+PRODUCTOS_TENDENCIA = {
+    "type": "object",
+    "required": ["productos"],
+    "properties": {
+        "productos": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["nombre", "descripcion_corta"],
+                "properties": {"nombre": TEXTO, "descripcion_corta": TEXTO, "pasos_rapidos": LISTA},
+            },
+        },
+    },
+}
+
+
+def _a_numero(texto: str):
+    limpio = texto.strip()
+    try:
+        return int(limpio) if limpio.lstrip("-").isdigit() else float(limpio)
+    except ValueError:
+        return None
+
+
+def validar(datos, esquema: dict, ruta: str = "$") -> list:
+    """
+    Comprueba `datos` contra `esquema` y devuelve la lista de errores
+    (vacía si es válido). Corrige en el sitio los números en texto.
+    """
+    tipo = esquema.get("type")
+    es_bool_como_numero = isinstance(datos, bool) and tipo in ("number", "integer")
+    if tipo and (not isinstance(datos, _TIPOS[tipo]) or es_bool_como_numero):
+        return [f"{ruta}: se esperaba {tipo}, llegó {type(datos).__name__}"]
+
+    errores = []
+    if tipo == "object":
+        for campo in esquema.get("required", []):
+            if campo not in datos or datos[campo] in (None, ""):
+                errores.append(f"{ruta}.{campo}: falta")
+        for campo, sub in esquema.get("properties", {}).items():
+            if datos.get(campo) in (None, ""):
+                continue
+            if sub.get("type") in ("number", "integer") and isinstance(datos[campo], str):
+                numero = _a_numero(datos[campo])
+                if numero is not None:
+                    datos[campo] = numero
+            errores += validar(datos[campo], sub, f"{ruta}.{campo}")
+    elif tipo == "array" and "items" in esquema:
+        for i, elemento in enumerate(datos):
+            errores += validar(elemento, esquema["items"], f"{ruta}[{i}]")
+    return errores
@@ -1,12 +1,7 @@
 """
 Estimation Agent: estimaciones robustas
 """
-import os
-import json
-import re
-from groq import Groq
-
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+from agents import esquemas, llm
 
 def estimate_project(idea):
     """Estima costos y tiempos con parsing robusto"""
@@ -31,28 +26,13 @@ Responde SOLO con un objeto JSON válido (sin markdown, sin ```json):
 }}"""
 
     try:
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            max_tokens=800
-        )
-        
-        content = response.choices[0].message.content.strip()
-        
-        # Limpiar markdown
-        content = re.sub(r'^```json\s*', '', content)
-        content = re.sub(r'\s*```$', '', content)
-        content = content.strip()
-        
-        estimation = json.loads(content)
-        
-        print(f"✅ Inversión: ${estimation.get('inversion_mvp_usd', 0):,}")
-        
-        return estimation
-        
-    except json.JSONDecodeError as e:
-        print(f"⚠️ Error JSON: {e}")
+        estimation = llm.completar_json(prompt, esquema=esquemas.ESTIMACION, temperature=0.2,
+                                        max_tokens=800, agente="estimation")
+        if estimation:
+            print(f"✅ Inversión: ${estimation.get('inversion_mvp_usd', 0):,}")
+            return estimation
+
+        print("⚠️ Sin JSON válido de estimación")
         return {
             "inversion_mvp_usd": 10000,
             "tiempo_desarrollo_semanas": 12,
@@ -1,74 +1,14 @@
-﻿import os
-import json
-import time
-import random
-from groq import Groq
-from agents.encoding_helper import fix_llm_encoding
-from agents.knowledge_base import get_contexto_para_generador
-
-def _groq_chat(messages, max_intentos=3):
-    client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
-    model = "llama-3.3-70b-versatile"
-    for intento in range(max_intentos):
-        try:
-            return client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0.85,
-                max_tokens=700,
-            )
-        except Exception as e:
-            if "429" in str(e) or "rate" in str(e).lower():
-                espera = min(4 * (2 ** intento) + random.uniform(0, 2), 25)
-                print(f"⏳ Rate limit (intento {intento+1}) → {espera:.0f}s...")
-                time.sleep(espera)
-                if intento >= 1:
-                    model = "llama-3.1-8b-instant"
-                    print("🔄 Cambiando a modelo ligero")
-            else:
-                print(f"❌ Error Groq: {e}")
-                return None
-    return None
-
-def es_repetida(nombre, ideas_existentes):
-    n = nombre.lower().strip()
-    for idea in ideas_existentes:
-        v = idea.get("nombre", "").lower().strip()
-        if n == v or (len(n) >= 4 and len(v) >= 4 and n[:5] == v[:5]):
-            return True
-    return False
-
-def generar_idea(ideas_existentes):
-    try:
-        contexto_kb = get_contexto_para_generador()
-        print("📚 Contexto KB inyectado en el prompt")
-    except Exception as e:
-        print(f"⚠️ Sin contexto KB: {e}")
-        contexto_kb = "Sin contexto previo"
+﻿import random
+from agents import esquemas, llm, prompt_builder
+from agents.json_stream import vigilar_campo
 
-    nombres_existentes = [i.get("nombre", "") for i in ideas_existentes[-30:]]
-
-    sectores = [
-        "salud mental digital", "turismo rural España", "educación online adultos",
-        "finanzas personales jóvenes", "productividad freelance", "comercio local Murcia",
-        "deporte amateur", "gastronomía local", "mascotas", "sostenibilidad hogar",
-        "inmobiliario pequeño", "servicios para autónomos", "bienestar mayores",
-        "idiomas online", "delivery especializado"
-    ]
-    sector = random.choice(sectores)
-
-    prompt = f"""Eres un experto mundial en startups. Crea UNA idea de negocio digital ORIGINAL.
+# Parte fija del prompt; el contexto variable va al final (prefijo estable)
+PLANTILLA_IDEA = """Eres un experto mundial en startups. Crea UNA idea de negocio digital ORIGINAL.
 
 SECTOR: {sector}
 
-IDEAS YA EXISTENTES - NO REPETIR:
-{json.dumps(nombres_existentes[-20:], ensure_ascii=False)}
-
-PATRONES EXITOSOS ANTERIORES:
-{contexto_kb}
-
 REGLAS:
-- Nombre DIFERENTE a todos los existentes
+- Nombre DIFERENTE a todas las ideas ya generadas
 - Problema REAL y concreto
 - Ejecutable en 30 días con menos de 500€
 - Ingresos recurrentes
@@ -85,31 +25,59 @@ Responde SOLO JSON válido, sin markdown, sin texto extra:
   "propuesta_valor": "Por qué pagarían",
   "mvp": "3 pasos para MVP en 30 días",
   "marketing": "Cómo conseguir 100 usuarios gratis"
-}}"""
+}}
 
-    for intento in range(3):
-        response = _groq_chat([{"role": "user", "content": prompt}])
-        if not response:
-            print(f"⚠️ Sin respuesta Groq intento {intento+1}")
-            continue
+CONTEXTO Y PATRONES EXITOSOS ANTERIORES:
+{contexto}"""
 
-        try:
-            content = response.choices[0].message.content.strip()
-            content = fix_llm_encoding(content)
+def es_repetida(nombre, ideas_existentes):
+    n = nombre.lower().strip()
+    for idea in ideas_existentes:
+        v = idea.get("nombre", "").lower().strip()
+        if n == v or (len(n) >= 4 and len(v) >= 4 and n[:5] == v[:5]):
+            return True
+    return False
 
-            if "```" in content:
-                for part in content.split("```"):
-                    if "{" in part:
-                        content = part.replace("json", "").strip()
-                        break
+def generar_idea(ideas_existentes):
+    sectores = [
+        "salud mental digital", "turismo rural España", "educación online adultos",
+        "finanzas personales jóvenes", "productividad freelance", "comercio local Murcia",
+        "deporte amateur", "gastronomía local", "mascotas", "sostenibilidad hogar",
+        "inmobiliario pequeño", "servicios para autónomos", "bienestar mayores",
+        "idiomas online", "delivery especializado"
+    ]
+    sector = random.choice(sectores)
+
+    nombres_existentes = [i.get("nombre", "") for i in reversed(ideas_existentes)]
+    try:
+        contexto = prompt_builder.contexto_kb("generator", nombres=nombres_existentes)
+        print("📚 Contexto KB inyectado en el prompt")
+    except Exception as e:
+        print(f"⚠️ Sin contexto KB: {e}")
+        contexto = prompt_builder.construir_contexto(
+            [prompt_builder.seccion("Ideas ya generadas (NO repetir)", nombres_existentes, 1)],
+            prompt_builder.PRESUPUESTOS["generator"])
 
-            inicio = content.find("{")
-            fin = content.rfind("}") + 1
-            if inicio >= 0 and fin > inicio:
-                content = content[inicio:fin]
+    prompt = PLANTILLA_IDEA.format(sector=sector, contexto=contexto)
 
-            idea = json.loads(content)
+    def _nombre_nuevo(nombre):
+        if es_repetida(nombre, ideas_existentes):
+            print(f"⚠️ Repetida: {nombre} → cortando stream y regenerando")
+            return False
+        return True
 
+    for intento in range(3):
+        try:
+            idea = llm.completar_json(prompt, esquema=esquemas.IDEA, temperature=0.85,
+                                      max_tokens=700, agente="generator", cache=intento == 0,
+                                      al_fragmento=vigilar_campo("nombre", _nombre_nuevo))
+        except llm.StreamAbortado:
+            continue
+        if not idea:
+            print(f"⚠️ Sin idea JSON válida intento {intento+1}")
+            continue
+
+        try:
             nombre = idea.get("nombre", "").strip()
             if not nombre or nombre.lower() == "desconocido":
                 print(f"⚠️ Nombre vacío intento {intento+1}")
@@ -133,8 +101,6 @@ Responde SOLO JSON válido, sin markdown, sin texto extra:
             print(f"✅ Idea generada (KB+P10): {nombre}")
             return idea
 
-        except json.JSONDecodeError as e:
-            print(f"⚠️ JSON inválido intento {intento+1}: {e}")
         except Exception as e:
             print(f"⚠️ Error intento {intento+1}: {e}")
 
@@ -0,0 +1,294 @@
+"""
+Registro de ideas en JSONL de solo añadido con índice de offsets.
+
+data/ideas.json se cargaba y reescribía entero en cada guardado (y otra vez
+para añadir URLs o la URL de Notion); buscar una idea por nombre o slug
+obligaba a parsear todo el histórico. Aquí:
+
+- Cada idea es una línea de data/ideas.jsonl. Guardar es un append.
+- Actualizar añade la versión nueva y marca la anterior como muerta en su
+  sitio: `{"_vivo": 1, ...` pasa a `{"_vivo": 0, ...` (mismo tamaño, un
+  byte escrito).
+- Un índice lateral (data/ideas.jsonl.idx) guarda id/slug/nombre → offset
+  de la versión viva; cada proceso lo pone al día leyendo solo lo añadido
+  desde la última vez. `buscar` es un seek + readline.
+- Cuando las líneas muertas pasan de COMPACTAR_MUERTAS y son mayoría, se
+  reescribe el fichero sin ellas (sustitución atómica).
+
+Al primer uso se migra data/ideas.json (lista o {"ideas": [...]}) si existe.
+
+    python -m agents.idea_store [--compactar] [--exportar data/ideas.json]
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+from contextlib import contextmanager
+
+from agents import storage
+
+IDEAS_PATH  = os.path.join("data", "ideas.jsonl")
+INDICE_PATH = IDEAS_PATH + ".idx"
+LEGADO_PATH = os.path.join("data", "ideas.json")
+
+COMPACTAR_MUERTAS  = 50          # líneas muertas mínimas para compactar...
+COMPACTAR_FRACCION = 0.5         # ...y que sean al menos esta fracción de las líneas
+INDICE_RETRASO     = 64 * 1024   # bytes sin indexar en disco tras los que se reescribe el índice
+
+_VIVA = b'{"_vivo": 1, '
+
+_estado = None          # índice en memoria de este proceso
+_lock = threading.RLock()
+
+
+@contextmanager
+def _bloqueo():
+    """Exclusión entre procesos para escrituras y compactación."""
+    with _lock, storage.bloqueo(IDEAS_PATH):
+        yield
+
+
+def _claves(registro: dict) -> list:
+    claves = [f"id:{registro['_id']}"]
+    if registro.get("slug"):
+        claves.append(f"slug:{registro['slug']}")
+    if registro.get("nombre"):
+        claves.append(f"nombre:{str(registro['nombre']).strip().lower()}")
+    return claves
+
+
+def _linea(registro: dict) -> bytes:
+    cuerpo = json.dumps(registro, ensure_ascii=False, default=str)
+    return _VIVA + cuerpo[1:].encode("utf-8") + b"\n"
+
+
+def _decodificar(linea: bytes) -> dict | None:
+    """Registro de una línea viva (sin "_vivo"), o None si está muerta o rota."""
+    if not linea.startswith(_VIVA) or not linea.endswith(b"\n"):
+        return None
+    try:
+        registro = json.loads(linea)
+    except json.JSONDecodeError:
+        return None
+    registro.pop("_vivo", None)
+    return registro
+
+
+def _vacio(inodo=None) -> dict:
+    return {"inodo": inodo, "tamano": 0, "en_disco": 0, "claves": {}, "muertas": 0}
+
+
+def _escanear(estado: dict, desde: int):
+    """Indexa las líneas completas a partir de `desde` y avanza estado["tamano"]."""
+    with open(IDEAS_PATH, "rb") as f:
+        f.seek(desde)
+        offset = desde
+        for linea in f:
+            if not linea.endswith(b"\n"):
+                break   # append de otro proceso a medio escribir
+            registro = _decodificar(linea)
+            if registro is None:
+                estado["muertas"] += 1
+            else:
+                anterior = estado["claves"].get(f"id:{registro['_id']}")
+                if anterior is not None:
+                    estado["muertas"] += 1   # versión vieja sin marcar (corte entre append y marca)
+                for clave in _claves(registro):
+                    estado["claves"][clave] = offset
+            offset += len(linea)
+    estado["tamano"] = offset
+
+
+def _guardar_indice(estado: dict):
+    # el índice se reconstruye desde ideas.jsonl si se pierde: sin fsync
+    with storage.atomico(INDICE_PATH, "w", "nunca", encoding="utf-8") as f:
+        json.dump({k: estado[k] for k in ("inodo", "tamano", "claves", "muertas")}, f, ensure_ascii=False)
+    estado["en_disco"] = estado["tamano"]
+
+
+def _migrar():
+    """Crea ideas.jsonl a partir del ideas.json de antes (una sola vez)."""
+    if os.path.exists(IDEAS_PATH) or not os.path.exists(LEGADO_PATH):
+        return
+    try:
+        with open(LEGADO_PATH, "r", encoding="utf-8-sig") as f:
+            datos = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️ [Ideas] No se pudo migrar {LEGADO_PATH}: {e}")
+        return
+    ideas = datos.get("ideas", []) if isinstance(datos, dict) else datos
+    with storage.bloqueo(IDEAS_PATH):
+        if os.path.exists(IDEAS_PATH):   # otro proceso migró mientras tanto
+            return
+        with storage.atomico(IDEAS_PATH, "wb") as f:
+            for n, idea in enumerate(ideas):
+                f.write(_linea({"_id": uuid.uuid4().hex[:12], "_alta": n, **idea}))
+    print(f"📦 [Ideas] {len(ideas)} ideas migradas de {LEGADO_PATH} a {IDEAS_PATH}")
+
+
+def _sincronizar() -> dict:
+    """Pone al día el índice en memoria con lo que otros procesos hayan añadido."""
+    global _estado
+    _migrar()
+    if not os.path.exists(IDEAS_PATH):
+        _estado = _vacio()
+        return _estado
+    info = os.stat(IDEAS_PATH)
+    if _estado is None or _estado["inodo"] != info.st_ino or _estado["tamano"] > info.st_size:
+        _estado = _vacio(info.st_ino)
+        try:
+            with open(INDICE_PATH, "r", encoding="utf-8") as f:
+                disco = json.load(f)
+            if disco.get("inodo") == info.st_ino and disco.get("tamano", 0) <= info.st_size:
+                _estado.update(disco, en_disco=disco["tamano"])
+        except (OSError, json.JSONDecodeError):
+            pass
+    if info.st_size > _estado["tamano"]:
+        _escanear(_estado, _estado["tamano"])
+    if _estado["tamano"] - _estado["en_disco"] > INDICE_RETRASO or not os.path.exists(INDICE_PATH):
+        try:
+            _guardar_indice(_estado)
+        except OSError as e:
+            print(f"⚠️ [Ideas] No se pudo guardar el índice: {e}")
+    return _estado
+
+
+def _leer(offset: int) -> dict | None:
+    with open(IDEAS_PATH, "rb") as f:
+        f.seek(offset)
+        return _decodificar(f.readline())
+
+
+def _offset(id: str = None, slug: str = None, nombre: str = None) -> int | None:
+    if id:
+        clave = f"id:{id}"
+    elif slug:
+        clave = f"slug:{slug}"
+    elif nombre:
+        clave = f"nombre:{str(nombre).strip().lower()}"
+    else:
+        return None
+    global _estado
+    offset = _sincronizar()["claves"].get(clave)
+    if offset is not None and _leer(offset) is None:
+        # otro proceso la actualizó (o compactó): se reindexa desde cero
+        _estado = None
+        offset = _sincronizar()["claves"].get(clave)
+    return offset
+
+
+def _append(linea: bytes):
+    """Añade una línea (con _bloqueo tomado). Cierra antes una línea cortada por un corte."""
+    with open(IDEAS_PATH, "ab+") as f:
+        if f.seek(0, os.SEEK_END):
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                linea = b"\n" + linea   # la línea rota queda como muerta
+        f.write(linea)
+
+
+# ── API ───────────────────────────────────────────────────────────────────────
+
+def anadir(idea: dict) -> dict:
+    """Añade la idea (un append). Le asigna "_id" y "_alta" si no los tiene."""
+    idea.setdefault("_id", uuid.uuid4().hex[:12])
+    idea.setdefault("_alta", time.time())
+    with _bloqueo():
+        _sincronizar()
+        _append(_linea(idea))
+        _sincronizar()
+    return idea
+
+
+def buscar(id: str = None, slug: str = None, nombre: str = None) -> dict | None:
+    """Versión viva de la idea con ese id, slug o nombre (la más reciente)."""
+    with _lock:
+        offset = _offset(id, slug, nombre)
+        return None if offset is None else _leer(offset)
+
+
+def actualizar(idea: dict, **cambios) -> dict | None:
+    """
+    Escribe la versión nueva de `idea` (localizada por su _id, slug o nombre)
+    con `cambios` aplicados y marca la anterior como muerta. Devuelve el
+    registro nuevo, o None si la idea no está guardada.
+    """
+    with _bloqueo():
+        offset = _offset(idea.get("_id"), idea.get("slug"), idea.get("nombre"))
+        actual = None if offset is None else _leer(offset)
+        if actual is None:
+            return None
+        nuevo = {**actual, **cambios}
+        _append(_linea(nuevo))
+        with open(IDEAS_PATH, "r+b") as f:
+            f.seek(offset + len(_VIVA) - 3)   # el "1" de {"_vivo": 1,
+            f.write(b"0")
+        estado = _sincronizar()   # el escaneo cuenta la versión anterior como muerta
+        total = estado["muertas"] + contar()
+        if estado["muertas"] >= COMPACTAR_MUERTAS and estado["muertas"] >= COMPACTAR_FRACCION * total:
+            _compactar()
+    idea.update(cambios)
+    return nuevo
+
+
+def todas() -> list:
+    """Todas las ideas vivas en orden de alta."""
+    _migrar()
+    if not os.path.exists(IDEAS_PATH):
+        return []
+    with open(IDEAS_PATH, "rb") as f:
+        ideas = [r for r in map(_decodificar, f) if r is not None]
+    ideas.sort(key=lambda r: r.get("_alta", 0))
+    return ideas
+
+
+def contar() -> int:
+    """Número de ideas vivas (del índice, sin leer el fichero)."""
+    with _lock:
+        return sum(1 for clave in _sincronizar()["claves"] if clave.startswith("id:"))
+
+
+def _compactar():
+    """Reescribe el fichero solo con las líneas vivas (con _bloqueo tomado)."""
+    global _estado
+    antes = os.path.getsize(IDEAS_PATH)
+    with open(IDEAS_PATH, "rb") as origen, storage.atomico(IDEAS_PATH, "wb") as destino:
+        for linea in origen:
+            if linea.startswith(_VIVA) and linea.endswith(b"\n"):
+                destino.write(linea)
+    _estado = None
+    _guardar_indice(_sincronizar())
+    print(f"🗜️ [Ideas] Compactado: {antes} → {os.path.getsize(IDEAS_PATH)} bytes")
+
+
+def compactar():
+    with _bloqueo():
+        _sincronizar()
+        _compactar()
+
+
+def exportar_json(ruta: str = LEGADO_PATH) -> int:
+    """Vuelca las ideas vivas como lista JSON (para scripts que leen ideas.json)."""
+    ideas = todas()
+    storage.escribir_json(ruta, ideas)
+    return len(ideas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Registro de ideas (data/ideas.jsonl)")
+    parser.add_argument("--compactar", action="store_true", help="elimina las versiones muertas")
+    parser.add_argument("--exportar", metavar="RUTA", help="vuelca las ideas vivas como JSON")
+    args = parser.parse_args(argv)
+    if args.compactar:
+        compactar()
+    if args.exportar:
+        print(f"📤 {exportar_json(args.exportar)} ideas exportadas a {args.exportar}")
+    print(f"💡 {contar()} ideas vivas en {IDEAS_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+Utilidades JSON para respuestas LLM.
+
+- ParserIncremental: no construye el objeto completo; recorre solo los
+  caracteres nuevos de cada fragmento de un stream y expone los campos de
+  texto de primer nivel en cuanto se cierra su comilla. Así `nombre` está
+  disponible tras los primeros tokens.
+- parsear_json / reparar_json: recuperan en local las respuestas casi
+  válidas (fences de markdown, texto alrededor, comas finales, salida
+  cortada por max_tokens) antes de gastar otra llamada al LLM.
+"""
+import json
+
+
+class ParserIncremental:
+    """Acumula el texto recibido y extrae los campos string de primer nivel."""
+
+    def __init__(self):
+        self.campos = {}
+        self._pos = 0
+        self._profundidad = 0
+        self._en_cadena = False
+        self._escape = False
+        self._cadena = []
+        self._clave = None
+        self._esperando_valor = False
+
+    def alimentar(self, texto: str) -> dict:
+        """
+        Procesa `texto` (acumulado desde el inicio de la respuesta) a partir
+        de donde se quedó la llamada anterior. Devuelve los campos cerrados.
+        Lo que haya antes de la primera `{` (fences de markdown) se ignora.
+        """
+        for c in texto[self._pos:]:
+            if self._en_cadena:
+                if self._escape:
+                    self._escape = False
+                    self._cadena.append(c)
+                elif c == "\\":
+                    self._escape = True
+                    self._cadena.append(c)
+                elif c == '"':
+                    self._en_cadena = False
+                    self._cerrar_cadena()
+                else:
+                    self._cadena.append(c)
+            elif self._profundidad == 0:
+                if c == "{":
+                    self._profundidad = 1
+            elif c == '"':
+                self._en_cadena = True
+                self._cadena = []
+            elif c in "{[":
+                self._profundidad += 1
+                if self._profundidad == 2:
+                    # El valor de la clave actual es un objeto/lista: no interesa
+                    self._clave = None
+                    self._esperando_valor = False
+            elif c in "}]":
+                self._profundidad -= 1
+            elif self._profundidad == 1:
+                if c == ":":
+                    self._esperando_valor = True
+                elif c == ",":
+                    self._clave = None
+                    self._esperando_valor = False
+        self._pos = len(texto)
+        return self.campos
+
+    def _cerrar_cadena(self):
+        if self._profundidad != 1:
+            return
+        crudo = "".join(self._cadena)
+        try:
+            valor = json.loads(f'"{crudo}"')
+        except json.JSONDecodeError:
+            valor = crudo
+        if self._esperando_valor and self._clave is not None:
+            self.campos[self._clave] = valor
+            self._clave = None
+            self._esperando_valor = False
+        else:
+            self._clave = valor
+
+
+def vigilar_campo(campo: str, es_valido):
+    """
+    Devuelve un callback para `llm.chat(al_fragmento=...)` que corta el
+    stream (devuelve False) en cuanto `campo` se completa y
+    `es_valido(valor)` es False.
+    """
+    parser = ParserIncremental()
+    comprobado = False
+
+    def _al_fragmento(texto: str) -> bool:
+        nonlocal comprobado
+        if comprobado:
+            return True
+        valor = parser.alimentar(texto).get(campo)
+        if valor is None:
+            return True
+        comprobado = True
+        return bool(es_valido(valor))
+
+    return _al_fragmento
+
+
+def _cerrar(salida: list, pila: list, en_cadena: bool) -> str:
+    """Cierra cadena y contenedores abiertos de un JSON cortado."""
+    texto = "".join(salida)
+    if en_cadena:
+        texto += '"'
+    texto = texto.rstrip()
+    if texto.endswith(":"):
+        texto += " null"
+    texto = texto.rstrip(",").rstrip()
+    return texto + "".join("}" if c == "{" else "]" for c in reversed(pila))
+
+
+def reparar_json(texto: str) -> str | None:
+    """
+    Devuelve la versión reparada de `texto` o None si no contiene JSON.
+    Quita fences y texto alrededor, elimina comas antes de `}`/`]` y, si la
+    salida está cortada, cierra lo abierto descartando el último elemento
+    incompleto.
+    """
+    if "```" in texto:
+        for parte in texto.split("```"):
+            parte = parte.strip()
+            if parte.startswith("json"):
+                parte = parte[4:]
+            if "{" in parte or "[" in parte:
+                texto = parte
+                break
+    inicios = [i for i in (texto.find("{"), texto.find("[")) if i >= 0]
+    if not inicios:
+        return None
+    texto = texto[min(inicios):]
+
+    salida, pila = [], []
+    en_cadena = escape = False
+    cortes = []   # (longitud de salida, pila) tras cada coma fuera de cadena
+    for c in texto:
+        if en_cadena:
+            salida.append(c)
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                en_cadena = False
+            elif c == "\n":
+                salida[-1] = "\\n"
+            continue
+        if c == '"':
+            en_cadena = True
+        elif c in "{[":
+            pila.append(c)
+        elif c in "}]":
+            while salida and salida[-1] in " \t\r\n":
+                salida.pop()
+            if salida and salida[-1] == ",":
+                salida.pop()
+            if pila:
+                pila.pop()
+            salida.append(c)
+            if not pila:
+                return "".join(salida)
+            continue
+        elif c == ",":
+            cortes.append((len(salida), list(pila)))
+        salida.append(c)
+
+    # Respuesta cortada: probar a cerrar tal cual y, si no vale, desde la última coma
+    candidato = _cerrar(salida, pila, en_cadena)
+    try:
+        json.loads(candidato)
+        return candidato
+    except json.JSONDecodeError:
+        pass
+    for longitud, pila_corte in reversed(cortes[-5:]):
+        candidato = _cerrar(salida[:longitud], pila_corte, False)
+        try:
+            json.loads(candidato)
+            return candidato
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def parsear_json(texto: str):
+    """json.loads tolerante: prueba directo y, si falla, tras reparar_json."""
+    if not texto:
+        return None
+    try:
+        return json.loads(texto.strip())
+    except json.JSONDecodeError:
+        pass
+    reparado = reparar_json(texto)
+    if reparado is None:
+        return None
+    try:
+        return json.loads(reparado)
+    except json.JSONDecodeError:
+        return None
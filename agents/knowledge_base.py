@@ -1,102 +1,384 @@
-# agents/knowledge_base.py — versión v2
+# agents/knowledge_base.py — versión v3 (SQLite)
+#
+# Antes cada llamada cargaba y reescribía data/kb.json entero. Ahora la KB vive
+# en data/kb.db (SQLite en modo WAL: el bot, el monitor y los lotes leen a la vez
+# sin bloquearse) con índices sobre score_total, vertical, tipo y fecha de
+# registro; el top-N y las estadísticas son consultas sobre índice. La idea
+# completa se guarda como JSON en la columna `datos`. Al primer uso se importa
+# data/kb.json si existe.
+#
+# Los patrones salen de agregados incrementales (tabla `agregados`: por cada
+# vertical, tipo y tag, nº de ideas, suma de scores y nº de exitosas) que
+# registrar_idea actualiza en O(1) por idea; los top-k son lecturas del índice
+# (dimension, exitosas DESC). El recálculo completo queda solo para verificar:
+#     python -m agents.knowledge_base --verificar [--reparar]
+#
+# Los handlers del bot y el resumen diario leen de snapshot(): una copia en
+# memoria ya ordenada que solo se rehace cuando cambia la firma de data/kb.db
+# (mtime y tamaño de la base y de su -wal, más un contador de generación local).
 
-import json, os
+import json, os, sys, sqlite3, argparse, threading
 from datetime import datetime
 from collections import Counter
 
-KB_PATH = "data/kb.json"
+KB_PATH = "data/kb.db"
+KB_LEGADO = "data/kb.json"
 
-def _cargar():
-    if not os.path.exists(KB_PATH):
-        return {"ideas": [], "patrones": {}, "tendencias": []}
-    with open(KB_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+UMBRAL_EXITO = 75   # score_total a partir del cual una idea cuenta como exitosa
+
+# Pesos del ranking "más ejecutables ahora" (/ranking, /ejecutar)
+PESOS_EJECUTABLE = {"ejecutabilidad": 0.40, "generador": 0.35, "timing": 0.25}
+
+_generacion = 0                 # escrituras de este proceso (el mtime puede no cambiar)
+_snapshot = {"firma": None}    # se sustituye entero en cada recarga, nunca se modifica
+_snapshot_lock = threading.Lock()
+
+def _conectar() -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(KB_PATH) or ".", exist_ok=True)
+    con = sqlite3.connect(KB_PATH, timeout=30, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.executescript("""
+        CREATE TABLE IF NOT EXISTS ideas (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre      TEXT,
+            vertical    TEXT,
+            tipo        TEXT,
+            score_total NUMERIC,
+            registrada  TEXT,
+            datos       TEXT
+        );
+        CREATE INDEX IF NOT EXISTS ideas_score      ON ideas (score_total DESC, id);
+        CREATE INDEX IF NOT EXISTS ideas_vertical   ON ideas (vertical, score_total);
+        CREATE INDEX IF NOT EXISTS ideas_tipo       ON ideas (tipo, score_total);
+        CREATE INDEX IF NOT EXISTS ideas_registrada ON ideas (registrada);
+        CREATE TABLE IF NOT EXISTS agregados (
+            dimension   TEXT,      -- 'vertical', 'tipo', 'tag' o 'total'
+            valor       TEXT,
+            n           INTEGER,   -- ideas (en 'tag', apariciones en exitosas)
+            suma        REAL,      -- suma de score_total de las que tienen scores
+            con_score   INTEGER,
+            exitosas    INTEGER,
+            orden       INTEGER,   -- primera aparición entre las exitosas (desempate como Counter)
+            PRIMARY KEY (dimension, valor)
+        );
+        CREATE INDEX IF NOT EXISTS agregados_top ON agregados (dimension, exitosas DESC, orden);
+        CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT);
+    """)
+    _migrar(con)
+    return con
+
+def _score(idea: dict):
+    scores = idea.get("scores")
+    return scores.get("score_total", 0) if isinstance(scores, dict) else None
+
+def _insertar(con, idea: dict) -> int:
+    cursor = con.execute(
+        "INSERT INTO ideas (nombre, vertical, tipo, score_total, registrada, datos) VALUES (?, ?, ?, ?, ?, ?)",
+        (idea.get("nombre", ""), idea.get("vertical", ""), idea.get("tipo", ""), _score(idea),
+         idea.get("_registrada", ""), json.dumps(idea, ensure_ascii=False, default=str)))
+    return cursor.lastrowid
+
+def _sumar_agregados(con, idea_id: int, idea: dict):
+    """Suma una idea a los agregados: una fila por vertical, tipo, total y tag."""
+    score = _score(idea)
+    exitosa = score is not None and score >= UMBRAL_EXITO
+    filas = [(dimension, valor, 1, score or 0, score is not None, exitosa, idea_id * 1000 if exitosa else None)
+             for dimension, valor in (("total", ""), ("vertical", idea.get("vertical") or ""),
+                                      ("tipo", idea.get("tipo") or ""))]
+    if exitosa:
+        filas += [("tag", str(tag), 1, 0, 0, 1, idea_id * 1000 + min(pos, 999))
+                  for pos, tag in enumerate(idea.get("tags") or [])]
+    con.executemany(
+        """INSERT INTO agregados VALUES (?, ?, ?, ?, ?, ?, ?)
+           ON CONFLICT(dimension, valor) DO UPDATE SET
+               n = n + excluded.n, suma = suma + excluded.suma,
+               con_score = con_score + excluded.con_score,
+               exitosas = exitosas + excluded.exitosas,
+               orden = COALESCE(orden, excluded.orden)""", filas)
+
+def _reconstruir_agregados(con):
+    """Rehace la tabla de agregados recorriendo todas las ideas (migración o reparación)."""
+    con.execute("DELETE FROM agregados")
+    for idea_id, datos in con.execute("SELECT id, datos FROM ideas ORDER BY id").fetchall():
+        _sumar_agregados(con, idea_id, json.loads(datos))
+
+def _migrar(con):
+    """Importa data/kb.json una sola vez (se deja el fichero como copia) y crea los agregados."""
+    pendiente = "SELECT COUNT(*) FROM meta WHERE clave IN ('migrado', 'agregados')"
+    if con.execute(pendiente).fetchone()[0] == 2:
+        return
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        if con.execute(pendiente).fetchone()[0] == 2:
+            con.execute("COMMIT")
+            return
+        if con.execute("SELECT 1 FROM meta WHERE clave = 'migrado'").fetchone():
+            ideas = []   # KB creada antes de los agregados: solo falta calcularlos
+        else:
+            ideas = _importar_legado(con)
+        _reconstruir_agregados(con)
+        con.execute("INSERT OR REPLACE INTO meta VALUES ('agregados', ?)", (datetime.now().isoformat(),))
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    if ideas:
+        print(f"📦 [KB] {len(ideas)} ideas migradas de {KB_LEGADO} a {KB_PATH}")
+
+def _importar_legado(con) -> list:
+    """Inserta las ideas de data/kb.json (si la KB está vacía) y las devuelve."""
+    ideas, tendencias = [], []
+    if os.path.exists(KB_LEGADO) and not con.execute("SELECT 1 FROM ideas LIMIT 1").fetchone():
+        try:
+            with open(KB_LEGADO, "r", encoding="utf-8-sig") as f:
+                legado = json.load(f)
+            ideas, tendencias = legado.get("ideas", []), legado.get("tendencias", [])
+        except (OSError, ValueError) as e:
+            print(f"⚠️ [KB] No se pudo migrar {KB_LEGADO}: {e}")
+    for idea in ideas:
+        _insertar(con, idea)
+    con.execute("INSERT OR REPLACE INTO meta VALUES ('tendencias', ?)",
+                (json.dumps(tendencias, ensure_ascii=False),))
+    con.execute("INSERT INTO meta VALUES ('migrado', ?)", (datetime.now().isoformat(),))
+    return ideas
+
+def _meta(con, clave, defecto):
+    fila = con.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+    return json.loads(fila[0]) if fila else defecto
 
-def _guardar(kb):
-    os.makedirs("data", exist_ok=True)
-    with open(KB_PATH, "w", encoding="utf-8") as f:
-        json.dump(kb, f, ensure_ascii=False, indent=2)
+def _ideas(con, sql, params=()) -> list:
+    return [json.loads(datos) for (datos,) in con.execute(sql, params)]
+
+def _cargar():
+    """KB completa como antes ({"ideas", "patrones", "tendencias"}); solo para recorridos totales."""
+    con = _conectar()
+    try:
+        return {
+            "ideas": _ideas(con, "SELECT datos FROM ideas ORDER BY id"),
+            "patrones": _patrones(con),
+            "tendencias": _meta(con, "tendencias", []),
+        }
+    finally:
+        con.close()
 
 def registrar_idea(idea: dict):
-    kb = _cargar()
-    
     # Guardar idea con timestamp
     idea["_registrada"] = datetime.now().isoformat()
-    kb["ideas"].append(idea)
-    
-    # Actualizar patrones automáticamente
-    _actualizar_patrones(kb)
-    _guardar(kb)
-
-def _actualizar_patrones(kb):
-    """Aprende qué funciona: extrae patrones de ideas con score alto"""
-    ideas = kb["ideas"]
-    if not ideas:
-        return
-    
+    con = _conectar()
+    try:
+        con.execute("BEGIN IMMEDIATE")
+        idea_id = _insertar(con, idea)
+        # Actualizar patrones automáticamente (agregados, O(1) por idea)
+        _sumar_agregados(con, idea_id, idea)
+        con.execute("COMMIT")
+    finally:
+        con.close()
+    global _generacion
+    _generacion += 1
+
+    # El predictor de score aprende de cada crítica nueva (import diferido: numpy)
+    if idea.get("critique"):
+        from agents import score_predictor
+        score_predictor.aprender(idea)
+
+def _patrones(con) -> dict:
+    """Qué funciona, leído de los agregados (top-k por índice, sin recorrer ideas)"""
+    fila = con.execute("SELECT n, exitosas FROM agregados WHERE dimension = 'total'").fetchone()
+    total, exitosas = fila or (0, 0)
+    if not total:
+        return {}
+
+    def mas_comunes(dimension, k):
+        return [v for (v,) in con.execute(
+            """SELECT valor FROM agregados WHERE dimension = ? AND exitosas > 0
+               ORDER BY exitosas DESC, orden LIMIT ?""", (dimension, k))]
+
+    return {
+        "mejores_verticales": mas_comunes("vertical", 3),
+        "mejores_tipos": mas_comunes("tipo", 2),
+        "tags_exitosos": mas_comunes("tag", 5),
+        "score_por_vertical": {
+            v: round(suma / n, 1) for v, suma, n in con.execute(
+                """SELECT valor, suma, con_score FROM agregados
+                   WHERE dimension = 'vertical' AND con_score > 0""")
+        },
+        "total_analizadas": total,
+        "total_exitosas": exitosas,
+        "tasa_exito": f"{round(exitosas/max(total,1)*100,1)}%",
+        "actualizado": datetime.now().isoformat()
+    }
+
+def recalcular_patrones(ideas: list) -> dict:
+    """Patrones recorriendo todas las ideas (referencia lenta, solo para verificar)"""
     # Ideas exitosas = score > 75
-    exitosas = [i for i in ideas if i.get("scores", {}).get("score_total", 0) >= 75]
-    
+    exitosas = [i for i in ideas if (_score(i) or 0) >= UMBRAL_EXITO]
+
     # Patrones de verticales exitosas
-    verticales = Counter(i.get("vertical", "") for i in exitosas)
-    tipos = Counter(i.get("tipo", "") for i in exitosas)
-    tags = Counter(t for i in exitosas for t in i.get("tags", []))
-    
+    verticales = Counter(i.get("vertical") or "" for i in exitosas)
+    tipos = Counter(i.get("tipo") or "" for i in exitosas)
+    tags = Counter(str(t) for i in exitosas for t in i.get("tags") or [])
+
     # Score promedio por vertical
-    score_por_vertical = {}
-    for v in set(i.get("vertical", "") for i in ideas):
-        grupo = [i["scores"]["score_total"] for i in ideas 
-                 if i.get("vertical") == v and "scores" in i]
-        if grupo:
-            score_por_vertical[v] = round(sum(grupo)/len(grupo), 1)
-    
-    kb["patrones"] = {
+    grupos = {}
+    for i in ideas:
+        if _score(i) is not None:
+            grupos.setdefault(i.get("vertical") or "", []).append(_score(i))
+
+    return {
         "mejores_verticales": [v for v, _ in verticales.most_common(3)],
         "mejores_tipos": [t for t, _ in tipos.most_common(2)],
         "tags_exitosos": [t for t, _ in tags.most_common(5)],
-        "score_por_vertical": score_por_vertical,
+        "score_por_vertical": {v: round(sum(g)/len(g), 1) for v, g in grupos.items()},
         "total_analizadas": len(ideas),
         "total_exitosas": len(exitosas),
         "tasa_exito": f"{round(len(exitosas)/max(len(ideas),1)*100,1)}%",
-        "actualizado": datetime.now().isoformat()
     }
 
-def get_contexto_para_prompt():
-    """Devuelve contexto rico para mejorar el siguiente prompt"""
-    kb = _cargar()
-    patrones = kb.get("patrones", {})
-    ideas = kb.get("ideas", [])
-    
-    nombres_previos = [i.get("nombre", "") for i in ideas[-30:]]  # últimas 30
-    
+def verificar(reparar=False) -> list:
+    """Compara los agregados con el recálculo completo; devuelve las claves que difieren."""
+    con = _conectar()
+    try:
+        ideas = _ideas(con, "SELECT datos FROM ideas ORDER BY id")
+        esperado = recalcular_patrones(ideas) if ideas else {}
+        actual = {k: v for k, v in _patrones(con).items() if k != "actualizado"}
+        diferencias = [k for k in esperado.keys() | actual.keys() if esperado.get(k) != actual.get(k)]
+        if diferencias and reparar:
+            con.execute("BEGIN IMMEDIATE")
+            _reconstruir_agregados(con)
+            con.execute("COMMIT")
+    finally:
+        con.close()
+    return sorted(diferencias)
+
+def get_items_contexto():
+    """Contexto de la KB en estructuras ordenadas por utilidad (para prompt_builder)"""
+    con = _conectar()
+    try:
+        patrones = _patrones(con)
+        # más recientes primero: son las que más se parecen a lo que saldrá ahora
+        previas = [n for (n,) in con.execute(
+            "SELECT nombre FROM ideas WHERE nombre != '' ORDER BY id DESC")]
+    finally:
+        con.close()
     return {
-        "ideas_previas": ", ".join(nombres_previos),
-        "mejores_verticales": ", ".join(patrones.get("mejores_verticales", [])),
-        "tags_exitosos": ", ".join(patrones.get("tags_exitosos", [])),
-        "score_por_vertical": json.dumps(patrones.get("score_por_vertical", {})),
+        "ideas_previas": previas,
+        "score_por_vertical": sorted(patrones.get("score_por_vertical", {}).items(),
+                                     key=lambda kv: kv[1], reverse=True),
+        "mejores_verticales": patrones.get("mejores_verticales", []),
+        "tags_exitosos": patrones.get("tags_exitosos", []),
         "tasa_exito": patrones.get("tasa_exito", "N/A"),
         "total_analizadas": patrones.get("total_analizadas", 0)
     }
 
+def get_contexto_para_prompt():
+    """Devuelve contexto rico para mejorar el siguiente prompt"""
+    items = get_items_contexto()
+    return {
+        "ideas_previas": ", ".join(items["ideas_previas"][:30][::-1]),  # últimas 30
+        "mejores_verticales": ", ".join(items["mejores_verticales"]),
+        "tags_exitosos": ", ".join(items["tags_exitosos"]),
+        "score_por_vertical": ", ".join(f"{v} {s}" for v, s in items["score_por_vertical"][:5]),
+        "tasa_exito": items["tasa_exito"],
+        "total_analizadas": items["total_analizadas"]
+    }
+
+def get_nombres_previos(n=None):
+    """Nombres de las ideas registradas (las últimas `n` si se indica)"""
+    con = _conectar()
+    try:
+        filas = con.execute("SELECT nombre FROM ideas ORDER BY id DESC LIMIT ?",
+                            (n or -1,)).fetchall()
+    finally:
+        con.close()
+    return [nombre for (nombre,) in reversed(filas) if nombre]
+
 def get_top_ideas(n=5):
-    kb = _cargar()
-    ideas = kb.get("ideas", [])
-    ordenadas = sorted(ideas, 
-                       key=lambda x: x.get("scores", {}).get("score_total", 0), 
-                       reverse=True)
-    return ordenadas[:n]
+    con = _conectar()
+    try:
+        return _ideas(con, "SELECT datos FROM ideas ORDER BY score_total DESC, id LIMIT ?", (n,))
+    finally:
+        con.close()
 
-def get_stats():
-    kb = _cargar()
-    patrones = kb.get("patrones", {})
-    ideas = kb.get("ideas", [])
-    scores = [i.get("scores", {}).get("score_total", 0) for i in ideas if "scores" in i]
+def _stats(con, patrones):
+    total, promedio, mejor = con.execute(
+        "SELECT COUNT(*), AVG(score_total), MAX(score_total) FROM ideas").fetchone()
+    top = con.execute(
+        "SELECT nombre FROM ideas ORDER BY score_total DESC, id LIMIT 1").fetchone()
     return {
-        "total_ideas": len(ideas),
-        "score_promedio": round(sum(scores)/max(len(scores),1), 1),
-        "mejor_score": max(scores) if scores else 0,
+        "total_ideas": total,
+        "score_promedio": round(promedio or 0, 1),
+        "mejor_score": mejor or 0,
         "mejor_vertical": patrones.get("mejores_verticales", ["N/A"])[0] if patrones.get("mejores_verticales") else "N/A",
         "mejor_tipo": patrones.get("mejores_tipos", ["N/A"])[0] if patrones.get("mejores_tipos") else "N/A",
-        "mejor_idea": get_top_ideas(1)[0].get("nombre", "N/A") if get_top_ideas(1) else "N/A",
+        "mejor_idea": (top[0] or "N/A") if top else "N/A",
         "tasa_exito": patrones.get("tasa_exito", "N/A")
     }
+
+def get_stats():
+    con = _conectar()
+    try:
+        return _stats(con, _patrones(con))
+    finally:
+        con.close()
+
+def score_ejecutable(idea: dict) -> float:
+    s = idea.get("scores", {})
+    return sum(s.get(clave, 0) * peso for clave, peso in PESOS_EJECUTABLE.items())
+
+def _firma():
+    firma = [_generacion]
+    for ruta in (KB_PATH, KB_PATH + "-wal"):
+        try:
+            st = os.stat(ruta)
+            firma.append((st.st_ino, st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            firma.append(None)
+    return tuple(firma)
+
+def snapshot() -> dict:
+    """
+    KB en memoria para lecturas frecuentes (bot, resumen diario), compartida
+    por todo el proceso: {"ideas" (orden de registro), "por_score",
+    "por_ejecutable", "patrones", "stats"}. Se revalida con un stat por
+    llamada; no modificar lo devuelto.
+    """
+    global _snapshot
+    with _snapshot_lock:
+        firma = _firma()
+        if firma == _snapshot["firma"]:
+            return _snapshot
+        con = _conectar()
+        try:
+            ideas = _ideas(con, "SELECT datos FROM ideas ORDER BY id")
+            patrones = _patrones(con)
+            stats = _stats(con, patrones)
+        finally:
+            con.close()
+        _snapshot = {
+            "firma": firma,   # la de antes de leer: una escritura a mitad fuerza otra recarga
+            "ideas": ideas,
+            "por_score": sorted(ideas, key=lambda i: i.get("scores", {}).get("score_total", 0), reverse=True),
+            "por_ejecutable": sorted(ideas, key=score_ejecutable, reverse=True),
+            "patrones": patrones,
+            "stats": stats,
+        }
+        return _snapshot
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Knowledge base (data/kb.db)")
+    parser.add_argument("--verificar", action="store_true",
+                        help="compara los agregados incrementales con un recálculo completo")
+    parser.add_argument("--reparar", action="store_true", help="reconstruye los agregados si difieren")
+    args = parser.parse_args(argv)
+    if args.verificar or args.reparar:
+        diferencias = verificar(reparar=args.reparar)
+        if not diferencias:
+            print("✅ Agregados coherentes con el recálculo completo")
+            return 0
+        print(f"❌ Difieren: {', '.join(diferencias)}" + (" — reconstruidos" if args.reparar else ""))
+        return 0 if args.reparar else 1
+    print(json.dumps(get_stats(), ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,10 @@
 import os
 import re
 import base64
-import requests
 from datetime import datetime
 
+from agents import endpoints
+
 GITHUB_TOKEN      = os.environ.get("GITHUB_TOKEN", "")
 GITHUB_PAGES_REPO = os.environ.get("GITHUB_PAGES_REPO", "")
 GITHUB_BRANCH     = "main"
@@ -105,11 +106,12 @@ def _generar_html(idea: dict) -> str:
 
 
 def _github_upsert(repo: str, path: str, contenido: str, token: str, msg: str) -> bool:
+    import requests
     headers = {
         "Authorization": f"token {token}",
         "Accept": "application/vnd.github.v3+json",
     }
-    url = f"https://api.github.com/repos/{repo}/contents/{path}"
+    url = f"{endpoints.base('github')}/repos/{repo}/contents/{path}"
 
     sha = None
     r = requests.get(url, headers=headers, timeout=15)
@@ -2,10 +2,8 @@
 Learning Agent: auto-mejora cada 3 ideas.
 """
 import json
-import os
-from groq import Groq
-
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+from datetime import datetime
+from agents import idea_store, llm, storage
 
 def learn_and_improve():
     """Analiza últimas 3 ideas y optimiza"""
@@ -13,10 +11,7 @@ def learn_and_improve():
     print("🧠 Analizando...")
     
     try:
-        with open('data/ideas.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        last_3 = data['ideas'][-3:]
+        last_3 = idea_store.todas()[-3:]
         if len(last_3) < 3:
             print("⏳ Esperando más ideas")
             return
@@ -47,31 +42,20 @@ Responde en JSON:
 }}"""
 
     try:
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=800
-        )
-        
-        analysis = json.loads(response.choices[0].message.content)
+        analysis = llm.completar_json(prompt, temperature=0.3, max_tokens=800, agente="learning")
+        if not analysis:
+            raise RuntimeError("Sin respuesta JSON válida del LLM")
         
         # Guardar
-        log_file = 'data/learning_log.json'
-        if os.path.exists(log_file):
-            with open(log_file, 'r', encoding='utf-8') as f:
-                log = json.load(f)
-        else:
-            log = {'iterations': []}
-        
-        log['iterations'].append({
-            'date': str(datetime.now()),
-            'total_ideas': len(data['ideas']),
-            'analysis': analysis
-        })
+        def anotar(log):
+            log['iterations'].append({
+                'date': str(datetime.now()),
+                'total_ideas': idea_store.contar(),
+                'analysis': analysis
+            })
+            return log
         
-        with open(log_file, 'w', encoding='utf-8') as f:
-            json.dump(log, f, ensure_ascii=False, indent=2)
+        storage.actualizar_json('data/learning_log.json', anotar, {'iterations': []})
         
         print(f"✅ {len(analysis.get('reglas', []))} reglas nuevas")
         
@@ -0,0 +1,608 @@
+"""
+Cliente LLM compartido por todos los agentes.
+
+Una sola sesión HTTP con pool keep-alive (sin handshake TLS por llamada)
+y una sola política de reintentos. El orden de modelos lo decide
+agents/router.py en cada llamada según latencia, errores, cupo y el nivel
+de calidad que exige el agente; los proveedores con el circuito abierto
+(agents/circuit_breaker.py) se saltan sin llamarlos. Cada petición
+reserva cupo en el limitador compartido (agents/rate_limiter.py) antes de
+enviarse. Con `al_fragmento` la respuesta llega en streaming (SSE) y el
+llamador puede cortarla a mitad de generación. `chat_json` pide la
+respuesta en modo JSON nativo y la valida contra el esquema del agente.
+Con `hedge` (o LLM_HEDGE) una petición lenta se duplica en el otro
+proveedor y gana la primera que termina. Cada llamada queda registrada en
+agents/telemetria.py.
+"""
+import os
+import json
+import time
+import queue
+import random
+import threading
+import contextvars
+
+from agents import circuit_breaker, endpoints, esquemas, llm_cache, rate_limiter, router, telemetria
+from agents.encoding_helper import fix_llm_encoding
+from agents.json_stream import parsear_json
+
+# Rutas bajo endpoints.base(proveedor) (API real o servidor local de pruebas)
+GROQ_RUTA   = "/openai/v1/chat/completions"
+GEMINI_RUTA = "/v1beta/models/{modelo}:generateContent"
+GEMINI_STREAM_RUTA = "/v1beta/models/{modelo}:streamGenerateContent?alt=sse"
+
+MODELO_PRINCIPAL = "llama-3.3-70b-versatile"
+MODELO_LIGERO    = "llama-3.1-8b-instant"
+MODELO_GEMINI    = "gemini-2.0-flash"
+
+MAX_INTENTOS = 3
+BACKOFF_BASE = 4     # segundos
+BACKOFF_TOPE = 30    # segundos
+TIMEOUT      = 60    # segundos por petición
+POOL_MAXSIZE = 16    # conexiones keep-alive por host
+
+# Hedging: si el primario no ha mandado nada tras su p95 de primer byte
+# (o HEDGE_ESPERA sin histórico) se lanza la misma petición al otro proveedor
+HEDGE_ESPERA     = 10.0  # segundos
+HEDGE_ESPERA_MIN = 2.0   # segundos
+
+
+class RateLimitError(RuntimeError):
+    """El proveedor respondió 429. `espera` = Retry-After en segundos, si vino."""
+
+    def __init__(self, mensaje: str, espera: float | None = None):
+        super().__init__(mensaje)
+        self.espera = espera
+
+
+class LLMCancelado(RuntimeError):
+    """La etapa que pidió la llamada fue cancelada (p. ej. la crítica rechazó la idea)."""
+
+
+class StreamAbortado(RuntimeError):
+    """El callback `al_fragmento` cortó el stream. `texto` = lo recibido hasta entonces."""
+
+    def __init__(self, texto: str):
+        super().__init__("Stream abortado por el llamador")
+        self.texto = texto
+
+
+# Evento de cancelación del contexto actual. asyncio.to_thread copia el
+# contexto al hilo, así que cada tarea de una etapa async ve el suyo.
+_cancelacion = contextvars.ContextVar("llm_cancelacion", default=None)
+
+
+# Quién quiere la respuesta en streaming nada más abrirse (la cobertura de
+# _llamada_cubierta la cierra si la otra petición gana antes del primer byte).
+_al_abrir = contextvars.ContextVar("llm_al_abrir", default=None)
+
+
+def fijar_cancelacion(evento: threading.Event | None):
+    """Asocia `evento` a las llamadas LLM de este contexto/hilo."""
+    _cancelacion.set(evento)
+
+
+def _comprobar_cancelacion():
+    evento = _cancelacion.get()
+    if evento is not None and evento.is_set():
+        raise LLMCancelado("Llamada LLM cancelada")
+
+
+def _retry_after(r) -> float | None:
+    try:
+        return float(r.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+_sesion = None
+_sesion_lock = threading.Lock()
+
+
+def _get_sesion():
+    """
+    Sesión única por proceso: reutiliza conexiones TCP/TLS entre llamadas.
+    requests se importa aquí (~0,1 s) y no al importar el módulo: los
+    procesos que salen antes de llamar a la API no lo pagan.
+    """
+    global _sesion
+    if _sesion is None:
+        with _sesion_lock:
+            if _sesion is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                sesion = requests.Session()
+                adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+                sesion.mount("https://", adaptador)
+                sesion.mount("http://", adaptador)
+                _sesion = sesion
+    return _sesion
+
+
+# ── Proveedores ───────────────────────────────────────────────────────────────
+
+def _leer_sse(r):
+    """Itera los eventos `data:` de una respuesta SSE ya decodificados."""
+    for linea in r.iter_lines(decode_unicode=True):
+        if not linea or not linea.startswith("data:"):
+            continue
+        dato = linea[5:].strip()
+        if dato == "[DONE]":
+            return
+        yield json.loads(dato)
+
+
+def _consumir_stream(r, eventos, al_fragmento) -> tuple:
+    """
+    Acumula los trozos de texto de `eventos` (pares (texto, uso)) y llama
+    a `al_fragmento(acumulado)` tras cada uno. Si devuelve False se cierra la
+    conexión (el proveedor deja de generar) y se lanza StreamAbortado.
+    """
+    texto, usados = "", None
+    al_abrir = _al_abrir.get()
+    if al_abrir is not None:
+        al_abrir(r)
+    try:
+        for trozo, uso in eventos:
+            usados = uso or usados
+            if not trozo:
+                continue
+            texto += trozo
+            if al_fragmento(texto) is False:
+                raise StreamAbortado(texto)
+    finally:
+        r.close()
+    return texto, usados
+
+
+def _uso_groq(usage: dict | None) -> dict | None:
+    if not usage:
+        return None
+    return {"prompt": usage.get("prompt_tokens"), "respuesta": usage.get("completion_tokens"),
+            "total": usage.get("total_tokens")}
+
+
+def _uso_gemini(meta: dict | None) -> dict | None:
+    if not meta:
+        return None
+    return {"prompt": meta.get("promptTokenCount"), "respuesta": meta.get("candidatesTokenCount"),
+            "total": meta.get("totalTokenCount")}
+
+
+def _groq(messages: list, modelo: str, temperature: float, max_tokens: int, timeout: float,
+          al_fragmento=None, formato_json: bool = False) -> tuple:
+    body = {
+        "model": modelo,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    if al_fragmento:
+        # Groq no admite response_format junto con stream: ahí manda el prompt
+        body["stream"] = True
+    elif formato_json:
+        body["response_format"] = {"type": "json_object"}
+    r = _get_sesion().post(
+        endpoints.url("groq", GROQ_RUTA),
+        headers={"Authorization": f"Bearer {os.environ.get('GROQ_API_KEY', '')}"},
+        json=body,
+        timeout=timeout,
+        stream=bool(al_fragmento),
+    )
+    router.registrar_cuota("groq", modelo, r.headers)
+    if r.status_code == 429:
+        raise RateLimitError("RATE_LIMIT_GROQ", _retry_after(r))
+    r.raise_for_status()
+    if al_fragmento:
+        eventos = (
+            ((e.get("choices") or [{}])[0].get("delta", {}).get("content"),
+             _uso_groq((e.get("x_groq") or e).get("usage")))
+            for e in _leer_sse(r)
+        )
+        return _consumir_stream(r, eventos, al_fragmento)
+    data = r.json()
+    return data["choices"][0]["message"]["content"] or "", _uso_groq(data.get("usage"))
+
+
+def _gemini(messages: list, modelo: str, temperature: float, max_tokens: int, timeout: float,
+            al_fragmento=None, formato_json: bool = False) -> tuple:
+    sistema = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+    contents = [
+        {"role": "model" if m["role"] == "assistant" else "user", "parts": [{"text": m["content"]}]}
+        for m in messages if m["role"] != "system"
+    ]
+    body = {
+        "contents": contents,
+        "generationConfig": {"maxOutputTokens": max_tokens, "temperature": temperature},
+    }
+    if formato_json:
+        body["generationConfig"]["responseMimeType"] = "application/json"
+    if sistema:
+        body["systemInstruction"] = {"parts": [{"text": sistema}]}
+    ruta = GEMINI_STREAM_RUTA if al_fragmento else GEMINI_RUTA
+    r = _get_sesion().post(
+        endpoints.url("gemini", ruta.format(modelo=modelo)),
+        headers={"x-goog-api-key": os.environ.get("GEMINI_API_KEY", "")},
+        json=body,
+        timeout=timeout,
+        stream=bool(al_fragmento),
+    )
+    if r.status_code == 429:
+        raise RateLimitError("RATE_LIMIT_GEMINI", _retry_after(r))
+    r.raise_for_status()
+    if al_fragmento:
+        eventos = (
+            ("".join(p.get("text", "") for p in
+                     ((e.get("candidates") or [{}])[0].get("content") or {}).get("parts", [])),
+             _uso_gemini(e.get("usageMetadata")))
+            for e in _leer_sse(r)
+        )
+        return _consumir_stream(r, eventos, al_fragmento)
+    data = r.json()
+    texto = data["candidates"][0]["content"]["parts"][0]["text"] or ""
+    return texto, _uso_gemini(data.get("usageMetadata"))
+
+
+_PROVEEDORES = {"groq": _groq, "gemini": _gemini}
+
+
+# ── Política de reintentos ───────────────────────────────────────────────────
+
+def _es_transitorio(e: Exception) -> bool:
+    """429, timeouts, errores de red y 5xx se reintentan; el resto no."""
+    import requests
+    if isinstance(e, (RateLimitError, requests.Timeout, requests.ConnectionError)):
+        return True
+    if isinstance(e, requests.HTTPError) and e.response is not None:
+        return e.response.status_code >= 500
+    return False
+
+
+def _es_caida(e: Exception) -> bool:
+    """Fallo transitorio que cuenta para el circuit breaker (el 429 no: es cupo)."""
+    return _es_transitorio(e) and not isinstance(e, RateLimitError)
+
+
+def _backoff(intento: int) -> float:
+    return min(BACKOFF_BASE * (2 ** intento) + random.uniform(0, 2), BACKOFF_TOPE)
+
+
+def hedge_activo(agente: str, hedge: bool | None = None) -> bool:
+    """
+    `hedge` explícito manda; si es None decide LLM_HEDGE: "1"/"*" para
+    todos los agentes o una lista separada por comas ("analyzer,report").
+    """
+    if hedge is not None:
+        return hedge
+    valor = os.environ.get("LLM_HEDGE", "").strip()
+    if valor in ("1", "*"):
+        return True
+    return bool(agente) and agente in {a.strip() for a in valor.split(",")}
+
+
+def _umbral_hedge(proveedor: str, modelo: str) -> float:
+    p95 = router.estado(proveedor, modelo)["p95_primer_byte"]
+    return HEDGE_ESPERA if p95 is None else max(p95, HEDGE_ESPERA_MIN)
+
+
+def _llamada_cubierta(messages: list, candidatos: list, temperature: float, max_tokens: int,
+                      timeout: float, formato_json: bool, reservados: int):
+    """
+    Lanza el primer candidato en streaming; si a los `_umbral_hedge`
+    segundos no ha llegado ningún byte, duplica la petición en el primer
+    candidato de otro proveedor. La primera que termina gana y la otra se
+    corta: se cierra su respuesta aunque siga esperando el primer byte.
+    Los tokens reservados de una petición cortada o fallida se devuelven.
+
+    Devuelve (texto, proveedor, modelo, uso, peticiones) o None si no se
+    pudo cubrir o ninguna respondió; entonces `chat` sigue por la vía normal.
+    Pensado para texto libre largo (informes): en streaming Groq ignora el
+    modo JSON.
+    """
+    primario = candidatos[0]
+    secundario = next((c for c in candidatos[1:] if c[0] != primario[0]), None)
+    if secundario is None or not rate_limiter.adquirir(*primario, reservados, max_espera=0):
+        return None
+
+    resultados = queue.Queue()
+    ganador = threading.Event()
+    con_bytes = threading.Event()   # el primario ya mandó algún byte
+    arrancado = threading.Event()   # ... o ha terminado (bien o mal)
+    cancelacion = _cancelacion.get()
+    abiertas = []
+    abiertas_lock = threading.Lock()
+
+    def _abierta(r):
+        with abiertas_lock:
+            abiertas.append(r)
+        if ganador.is_set():   # llegó tarde: la otra ya ganó
+            r.close()
+
+    def _lanzar(proveedor, modelo):
+        inicio = time.perf_counter()
+        primer_byte = []
+        _al_abrir.set(_abierta)
+
+        def al_fragmento(_texto):
+            if not primer_byte:
+                primer_byte.append(time.perf_counter() - inicio)
+                router.registrar_primer_byte(proveedor, modelo, primer_byte[0])
+                if (proveedor, modelo) == primario:
+                    con_bytes.set()
+                    arrancado.set()
+            return not ganador.is_set() and not (cancelacion is not None and cancelacion.is_set())
+
+        try:
+            texto, uso = _PROVEEDORES[proveedor](messages, modelo, temperature, max_tokens,
+                                                 timeout, al_fragmento, formato_json)
+            router.registrar(proveedor, modelo, time.perf_counter() - inicio, True)
+            circuit_breaker.exito(proveedor)
+            if uso and uso.get("total"):
+                rate_limiter.ajustar(proveedor, modelo, reservados, uso["total"])
+            resultados.put((proveedor, modelo, texto, uso))
+        except StreamAbortado as e:
+            rate_limiter.ajustar(proveedor, modelo, reservados,
+                                 estimar_tokens(messages, len(e.texto) // 4))
+            resultados.put((proveedor, modelo, None, None))
+        except Exception as e:
+            # sin respuesta útil: `chat` volverá a reservar para la vía normal
+            rate_limiter.ajustar(proveedor, modelo, reservados, estimar_tokens(messages, 0))
+            if ganador.is_set():   # se le cerró la conexión al perder
+                resultados.put((proveedor, modelo, None, None))
+                return
+            router.registrar(proveedor, modelo, time.perf_counter() - inicio, False)
+            if _es_caida(e):
+                circuit_breaker.fallo(proveedor)
+            if isinstance(e, RateLimitError):
+                rate_limiter.penalizar(proveedor, modelo, e.espera)
+            print(f"⚠️ [Hedge] {modelo}: {e}")
+            resultados.put((proveedor, modelo, None, None))
+        finally:
+            if (proveedor, modelo) == primario:
+                arrancado.set()
+
+    def _hilo(clave):
+        hilo = threading.Thread(target=contextvars.copy_context().run, args=(_lanzar, *clave),
+                                daemon=True)
+        hilo.start()
+
+    _hilo(primario)
+    lanzadas = 1
+    arrancado.wait(_umbral_hedge(*primario))
+    if not con_bytes.is_set():
+        if rate_limiter.adquirir(*secundario, reservados, max_espera=0):
+            print(f"🪁 [Hedge] {primario[1]} sin respuesta → duplicando en {secundario[1]}")
+            _hilo(secundario)
+            lanzadas += 1
+        elif not arrancado.is_set():
+            print(f"⏳ [Hedge] Sin cupo en {secundario[1]} — se espera a {primario[1]}")
+
+    for _ in range(lanzadas):
+        try:
+            proveedor, modelo, texto, uso = resultados.get(timeout=timeout * 2)
+        except queue.Empty:
+            break
+        if texto is not None:
+            _cortar_perdedoras(ganador, abiertas, abiertas_lock)
+            return texto, proveedor, modelo, uso, lanzadas
+    _cortar_perdedoras(ganador, abiertas, abiertas_lock)
+    return None
+
+
+def _cortar_perdedoras(ganador: threading.Event, abiertas: list, lock: threading.Lock):
+    """Marca el fin de la cobertura y cierra las respuestas que siguen abiertas."""
+    ganador.set()
+    with lock:
+        pendientes = list(abiertas)
+    for r in pendientes:
+        try:
+            r.close()
+        except Exception:
+            pass
+
+
+def estimar_tokens(messages: list, max_tokens: int) -> int:
+    """Aproximación barata (~4 caracteres por token) + la salida máxima pedida."""
+    return sum(len(m.get("content") or "") for m in messages) // 4 + max_tokens
+
+
+def chat(messages: list, modelo: str = MODELO_PRINCIPAL, temperature: float = 0.7,
+         max_tokens: int = 1024, timeout: float = TIMEOUT, max_intentos: int = MAX_INTENTOS,
+         usar_gemini: bool = True,
+         agente: str = "", cache: bool = True, al_fragmento=None,
+         formato_json: bool = False, hedge: bool | None = None) -> str | None:
+    """
+    Envía `messages` (formato OpenAI) y devuelve el texto de la respuesta.
+
+    Antes de llamar consulta la caché en disco (TTL según `agente`); con
+    `cache=False` se fuerza una respuesta nueva, que sí se guarda.
+    `modelo` es el preferido; router.ordenar() decide las alternativas que
+    cumplen el nivel de `agente`. Un 429 bloquea el modelo para todos los
+    procesos y cualquier error transitorio pasa al siguiente modelo sin
+    esperar; solo el último candidato hace cola y backoff exponencial.
+    Devuelve None si nadie responde. Lanza LLMCancelado si el contexto se
+    cancela antes de enviar.
+
+    Con `al_fragmento(texto_acumulado) -> bool` la respuesta se pide en
+    streaming; si el callback devuelve False se corta la generación y se
+    lanza StreamAbortado (la respuesta parcial no se guarda en caché).
+    `formato_json=True` activa el modo JSON del proveedor (el prompt debe
+    pedir un objeto JSON).
+
+    Con `hedge` (por defecto según LLM_HEDGE, ver `hedge_activo`) el
+    primer intento va cubierto: si el modelo elegido tarda más que su p95
+    de primer byte se duplica en el otro proveedor (`_llamada_cubierta`).
+    """
+    inicio_total = time.perf_counter()
+    peticiones = 0
+
+    def _metrica(estado: str, proveedor: str = "", modelo_usado: str = "", uso: dict | None = None,
+                 **extra):
+        uso = uso or {}
+        telemetria.registrar(
+            "llamada", agente=agente or "llm", estado=estado,
+            proveedor=proveedor, modelo=modelo_usado or modelo,
+            fallback=bool(modelo_usado) and modelo_usado != modelo,
+            tokens_prompt=uso.get("prompt"), tokens_respuesta=uso.get("respuesta"),
+            segundos=round(time.perf_counter() - inicio_total, 3),
+            reintentos=max(peticiones - 1, 0), streaming=bool(al_fragmento), **extra,
+        )
+
+    preferido = ("gemini" if modelo.startswith("gemini") else "groq", modelo)
+    clave = None
+    if llm_cache.activa():
+        # La clave es la petición (proveedor y modelo pedidos), no quién contestó:
+        # la respuesta de un fallback vale para repetir la misma petición.
+        clave = llm_cache.calcular_clave(*preferido, messages, temperature, max_tokens, formato_json)
+        if cache:
+            cacheada = llm_cache.obtener(clave)
+            if cacheada is not None:
+                print(f"💾 [Cache LLM] Respuesta reutilizada ({agente or 'llm'})")
+                _metrica("cache")
+                return cacheada
+
+    reservados = estimar_tokens(messages, max_tokens)
+    candidatos = router.ordenar(agente, preferido, reservados,
+                                usar_gemini=usar_gemini and bool(os.environ.get("GEMINI_API_KEY")))
+    abiertos = {p for p in dict.fromkeys(p for p, _ in candidatos) if not circuit_breaker.permitir(p)}
+    if abiertos:
+        candidatos = [c for c in candidatos if c[0] not in abiertos]
+        print(f"🔌 [LLM] Circuito abierto: {', '.join(sorted(abiertos))} — se salta")
+        if not candidatos:
+            _metrica("error")
+            return None
+
+    if not al_fragmento and len(candidatos) > 1 and hedge_activo(agente, hedge):
+        _comprobar_cancelacion()
+        cubierta = _llamada_cubierta(messages, candidatos, temperature, max_tokens, timeout,
+                                     formato_json, reservados)
+        if cubierta is not None:
+            texto, proveedor, modelo_actual, uso, peticiones = cubierta
+            texto = fix_llm_encoding(texto)
+            if clave:
+                llm_cache.guardar(clave, texto, agente)
+            _metrica("ok", proveedor, modelo_actual, uso, hedge=peticiones > 1)
+            return texto
+
+    descartados = set()   # proveedores con error no transitorio (clave, petición inválida)
+    for n, (proveedor, modelo_actual) in enumerate(candidatos):
+        if proveedor in descartados:
+            continue
+        llamar = _PROVEEDORES[proveedor]
+        etiqueta = proveedor.capitalize()
+        ultimo = all(p in descartados for p, _ in candidatos[n + 1:])
+        for intento in range(max_intentos):
+            _comprobar_cancelacion()
+            # Con alternativas no se hace cola: si no hay cupo ya, siguiente modelo
+            if not rate_limiter.adquirir(proveedor, modelo_actual, reservados,
+                                         max_espera=rate_limiter.MAX_ESPERA if ultimo else 0,
+                                         cancelado=_cancelacion.get()):
+                _comprobar_cancelacion()
+                print(f"⏳ [{etiqueta}] Sin cupo para {modelo_actual} — siguiente modelo")
+                break
+            inicio = time.perf_counter()
+            peticiones += 1
+            try:
+                texto, uso = llamar(messages, modelo_actual, temperature, max_tokens, timeout,
+                                    al_fragmento, formato_json)
+                router.registrar(proveedor, modelo_actual, time.perf_counter() - inicio, True)
+                circuit_breaker.exito(proveedor)
+                if uso and uso.get("total"):
+                    rate_limiter.ajustar(proveedor, modelo_actual, reservados, uso["total"])
+                texto = fix_llm_encoding(texto)
+                if clave:
+                    llm_cache.guardar(clave, texto, agente)
+                _metrica("ok", proveedor, modelo_actual, uso)
+                return texto
+            except StreamAbortado as e:
+                # Se cobra solo lo generado hasta el corte (~4 caracteres por token)
+                generados = len(e.texto) // 4
+                rate_limiter.ajustar(proveedor, modelo_actual, reservados,
+                                     estimar_tokens(messages, generados))
+                print(f"✂️ [{etiqueta}] Stream cortado tras {len(e.texto)} caracteres")
+                _metrica("abortado", proveedor, modelo_actual, {
+                    "prompt": estimar_tokens(messages, 0), "respuesta": generados})
+                raise
+            except Exception as e:
+                router.registrar(proveedor, modelo_actual, time.perf_counter() - inicio, False)
+                if not _es_transitorio(e):
+                    print(f"❌ [{etiqueta}] Error: {e}")
+                    descartados.add(proveedor)
+                    break
+                if _es_caida(e) and circuit_breaker.fallo(proveedor):
+                    print(f"🔌 [{etiqueta}] Circuito abierto — no se reintenta")
+                    descartados.add(proveedor)
+                    break
+                if isinstance(e, RateLimitError):
+                    # El limitador bloquea el modelo para todos los procesos
+                    rate_limiter.penalizar(proveedor, modelo_actual, e.espera)
+                if intento == max_intentos - 1:
+                    print(f"❌ [{etiqueta}] Sin respuesta tras {max_intentos} intentos: {e}")
+                    break
+                if not ultimo:
+                    print(f"⏳ [{etiqueta}] {modelo_actual}: {e} → siguiente modelo")
+                    break
+                if isinstance(e, RateLimitError):
+                    # El siguiente adquirir() hace cola en lugar de dormir aquí
+                    print(f"⏳ [{etiqueta}] Rate limit (intento {intento+1}/{max_intentos})")
+                    continue
+                espera = _backoff(intento)
+                print(f"⏳ [{etiqueta}] {e} (intento {intento+1}/{max_intentos}) → {espera:.0f}s...")
+                evento = _cancelacion.get()
+                if evento is not None:
+                    evento.wait(espera)
+                else:
+                    time.sleep(espera)
+    _metrica("error")
+    return None
+
+
+def chat_json(messages: list, esquema: dict | None = None, reintentos: int = 1, **kwargs):
+    """
+    Como `chat` pero en modo JSON: devuelve el objeto ya parseado y validado
+    contra `esquema` (ver agents/esquemas.py), o None.
+
+    Una respuesta casi válida se repara en local (parsear_json) antes de
+    plantearse otra llamada; solo si sigue sin parsear o no cumple el
+    esquema se repite la petición, hasta `reintentos` veces y sin caché.
+    """
+    agente = kwargs.get("agente") or "llm"
+    for intento in range(reintentos + 1):
+        if intento:
+            kwargs["cache"] = False
+        texto = chat(messages, formato_json=True, **kwargs)
+        if texto is None:
+            return None
+        datos = parsear_json(texto)
+        if datos is None:
+            telemetria.registrar("parseo", agente=agente, ok=False, motivo="json")
+            print(f"⚠️ [{agente}] JSON irreparable (intento {intento+1}/{reintentos+1})")
+            continue
+        errores = esquemas.validar(datos, esquema) if esquema else []
+        telemetria.registrar("parseo", agente=agente, ok=not errores, motivo="esquema" if errores else "")
+        if not errores:
+            return datos
+        print(f"⚠️ [{agente}] Respuesta fuera de esquema (intento {intento+1}/{reintentos+1}): "
+              f"{'; '.join(errores[:3])}")
+    return None
+
+
+def _mensajes(prompt: str, sistema: str | None) -> list:
+    messages = [{"role": "system", "content": sistema}] if sistema else []
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def completar(prompt: str, sistema: str | None = None, **kwargs) -> str | None:
+    """Atajo de `chat` para un único prompt de usuario (y system opcional)."""
+    return chat(_mensajes(prompt, sistema), **kwargs)
+
+
+def completar_json(prompt: str, sistema: str | None = None, **kwargs):
+    """Atajo de `chat_json` para un único prompt de usuario (y system opcional)."""
+    return chat_json(_mensajes(prompt, sistema), **kwargs)
+
+
+def ping(timeout: float = 10) -> str:
+    """Petición mínima a Groq para health checks. Lanza excepción si falla."""
+    return _groq([{"role": "user", "content": "ok"}], MODELO_PRINCIPAL, 0, 3, timeout)[0]
@@ -0,0 +1,145 @@
+"""
+Caché en disco de respuestas LLM, direccionada por contenido.
+
+Clave = sha256(proveedor, modelo, sha256(prompt), temperature, max_tokens,
+formato_json): una respuesta en modo JSON no se sirve a una petición de
+texto libre ni al revés.
+Se guarda en SQLite con TTL por agente y expulsión LRU cuando el fichero
+supera MAX_BYTES. Evita reenviar prompts idénticos tras caídas y reintentos.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from contextlib import contextmanager
+
+CACHE_PATH = os.path.join("data", "llm_cache.sqlite")
+MAX_BYTES  = 20 * 1024 * 1024
+
+HORA = 3600
+DIA  = 24 * HORA
+
+# TTL en segundos por agente; 0 desactiva la caché para ese agente
+TTL_POR_AGENTE = {
+    "critic":       7 * DIA,
+    "estimation":   7 * DIA,
+    "competition":  3 * DIA,
+    "analyzer":     3 * DIA,
+    "trend_hunter": 6 * HORA,
+    "generator":    1 * HORA,
+    "batch":        1 * HORA,
+}
+TTL_DEFECTO = DIA
+
+
+def activa() -> bool:
+    return os.environ.get("LLM_CACHE", "1") != "0"
+
+
+@contextmanager
+def _conexion():
+    """Conexión corta por operación: commit al salir y cierre siempre."""
+    con = _conectar()
+    try:
+        with con:
+            yield con
+    finally:
+        con.close()
+
+
+def _conectar() -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(CACHE_PATH) or ".", exist_ok=True)
+    con = sqlite3.connect(CACHE_PATH, timeout=10)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS respuestas (
+            clave     TEXT PRIMARY KEY,
+            agente    TEXT,
+            respuesta TEXT,
+            creado    REAL,
+            expira    REAL,
+            usado     REAL,
+            bytes     INTEGER
+        )""")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_respuestas_usado ON respuestas(usado)")
+    return con
+
+
+def calcular_clave(proveedor: str, modelo: str, messages: list,
+                   temperature: float, max_tokens: int, formato_json: bool = False) -> str:
+    prompt_hash = hashlib.sha256(
+        json.dumps(messages, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    base = json.dumps([proveedor, modelo, prompt_hash, round(float(temperature), 3), int(max_tokens),
+                       bool(formato_json)])
+    return hashlib.sha256(base.encode("utf-8")).hexdigest()
+
+
+def ttl(agente: str) -> int:
+    return TTL_POR_AGENTE.get(agente, TTL_DEFECTO)
+
+
+def obtener(clave: str) -> str | None:
+    """Devuelve la respuesta cacheada vigente o None."""
+    ahora = time.time()
+    try:
+        with _conexion() as con:
+            fila = con.execute(
+                "SELECT respuesta FROM respuestas WHERE clave = ? AND expira > ?",
+                (clave, ahora),
+            ).fetchone()
+            if fila:
+                con.execute("UPDATE respuestas SET usado = ? WHERE clave = ?", (ahora, clave))
+                return fila[0]
+    except sqlite3.Error as e:
+        print(f"⚠️ [Cache LLM] Error leyendo: {e}")
+    return None
+
+
+def guardar(clave: str, respuesta: str, agente: str = ""):
+    """Guarda la respuesta con el TTL del agente y aplica la expulsión LRU."""
+    segundos = ttl(agente)
+    if segundos <= 0 or not respuesta:
+        return
+    ahora = time.time()
+    try:
+        with _conexion() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO respuestas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (clave, agente, respuesta, ahora, ahora + segundos, ahora,
+                 len(respuesta.encode("utf-8"))),
+            )
+            _expulsar(con, ahora)
+    except sqlite3.Error as e:
+        print(f"⚠️ [Cache LLM] Error guardando: {e}")
+
+
+def _expulsar(con: sqlite3.Connection, ahora: float):
+    """Borra caducadas y, si se supera MAX_BYTES, las menos usadas recientemente."""
+    con.execute("DELETE FROM respuestas WHERE expira <= ?", (ahora,))
+    total = con.execute("SELECT COALESCE(SUM(bytes), 0) FROM respuestas").fetchone()[0]
+    if total <= MAX_BYTES:
+        return
+    sobrante = total - MAX_BYTES
+    borrar = []
+    for clave, nbytes in con.execute("SELECT clave, bytes FROM respuestas ORDER BY usado ASC"):
+        borrar.append((clave,))
+        sobrante -= nbytes
+        if sobrante <= 0:
+            break
+    con.executemany("DELETE FROM respuestas WHERE clave = ?", borrar)
+
+
+def invalidar(clave: str):
+    try:
+        with _conexion() as con:
+            con.execute("DELETE FROM respuestas WHERE clave = ?", (clave,))
+    except sqlite3.Error as e:
+        print(f"⚠️ [Cache LLM] Error invalidando: {e}")
+
+
+def limpiar():
+    """Vacía la caché completa."""
+    with _conexion() as con:
+        con.execute("DELETE FROM respuestas")
@@ -1,6 +1,8 @@
-﻿import os, json, requests
+﻿import os, json
 from datetime import datetime
 
+from agents import endpoints
+
 NOTION_TOKEN = os.environ.get("NOTION_TOKEN", "")
 DATABASE_ID  = os.environ.get("NOTION_DATABASE_ID", "308313aca133800981cfc48f32c52146")
 
@@ -180,6 +182,7 @@ def construir_bloques(idea: dict) -> list:
 
 def sync_idea_to_notion(idea: dict) -> str:
     """Sincroniza idea completa a Notion. Devuelve URL o None."""
+    import requests
     global HEADERS
     HEADERS["Authorization"] = f"Bearer {os.environ.get('NOTION_TOKEN', NOTION_TOKEN)}"
 
@@ -217,7 +220,7 @@ def sync_idea_to_notion(idea: dict) -> str:
     }
 
     resp = requests.post(
-        "https://api.notion.com/v1/pages",
+        endpoints.url("notion", "/v1/pages"),
         headers=HEADERS, json=payload, timeout=20
     )
 
@@ -234,7 +237,7 @@ def sync_idea_to_notion(idea: dict) -> str:
     for i in range(0, len(bloques), 90):  # Notion límite 100 bloques/request
         chunk = bloques[i:i+90]
         r2 = requests.patch(
-            f"https://api.notion.com/v1/blocks/{page_id}/children",
+            f"{endpoints.base('notion')}/v1/blocks/{page_id}/children",
             headers=HEADERS,
             json={"children": chunk},
             timeout=30
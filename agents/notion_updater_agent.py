@@ -1,6 +1,7 @@
 import os
 import time
-import requests
+
+from agents import endpoints
 
 NOTION_API_KEY = os.environ.get("NOTION_TOKEN") or os.environ.get("NOTION_API_KEY")
 NOTION_VERSION = "2022-06-28"
@@ -57,7 +58,8 @@ def texto_a_bloques(texto: str) -> list:
 
 
 def marcar_informe_completo(page_id: str) -> bool:
-    url = f"https://api.notion.com/v1/pages/{page_id}"
+    import requests
+    url = f"{endpoints.base('notion')}/v1/pages/{page_id}"
     payload = {
         "properties": {
             "Informe Completo": {
@@ -74,7 +76,8 @@ def marcar_informe_completo(page_id: str) -> bool:
 
 def escribir_bloques(page_id: str, bloques: list) -> int:
     """Envía en lotes de 100 — límite oficial Notion API."""
-    url = f"https://api.notion.com/v1/blocks/{page_id}/children"
+    import requests
+    url = f"{endpoints.base('notion')}/v1/blocks/{page_id}/children"
     total = len(bloques)
     escritos = 0
     for i in range(0, total, 100):
@@ -0,0 +1,129 @@
+"""
+Ejecutor de etapas declaradas como grafo (DAG).
+
+Cada etapa dice de qué otras depende; el ejecutor lanza a la vez (hilos)
+todas las que ya tienen sus dependencias resueltas. Así, tras guardar la
+idea, landing, informe, Notion y Telegram corren en paralelo y la fase dura
+lo que la rama más lenta, no la suma.
+
+- Una etapa que falla solo arrastra a las que dependen de ella; sus
+  hermanas siguen. Con `opcional=True` ni eso: sus dependientes corren igual.
+- Una etapa que lanza `Detener` (p. ej. idea rechazada) para el pipeline:
+  lo pendiente se omite sin contarlo como fallo.
+- Cada etapa recibe el mismo dict `contexto` y su valor de retorno se
+  guarda en contexto[nombre]. Se anota estado y tiempo de cada una.
+- `hechas` + `al_completar` permiten reanudar: las etapas de `hechas` no se
+  vuelven a ejecutar y tras cada etapa terminada se llama al callback para
+  guardar el checkpoint (ver agents/checkpoints.py).
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+MAX_HILOS = 4
+
+OK       = "ok"
+ERROR    = "error"
+OMITIDA  = "omitida"
+DETENIDA = "detenida"
+
+
+class Detener(Exception):
+    """Corte voluntario del pipeline (no es un fallo)."""
+
+
+def etapa(nombre: str, funcion, depende=(), opcional: bool = False) -> dict:
+    """Declara una etapa: `funcion(contexto)` tras todas las de `depende`."""
+    return {"nombre": nombre, "funcion": funcion, "depende": list(depende), "opcional": opcional}
+
+
+def validar(etapas: list):
+    """ValueError si hay nombres repetidos, dependencias desconocidas o ciclos."""
+    nombres = [e["nombre"] for e in etapas]
+    if len(set(nombres)) != len(nombres):
+        raise ValueError("Etapas con nombre repetido")
+    for e in etapas:
+        desconocidas = set(e["depende"]) - set(nombres)
+        if desconocidas:
+            raise ValueError(f"{e['nombre']} depende de etapas inexistentes: {sorted(desconocidas)}")
+    resueltas, restantes = set(), list(etapas)
+    while restantes:
+        listas = [e for e in restantes if set(e["depende"]) <= resueltas]
+        if not listas:
+            raise ValueError(f"Ciclo entre: {sorted(e['nombre'] for e in restantes)}")
+        resueltas |= {e["nombre"] for e in listas}
+        restantes = [e for e in restantes if e["nombre"] not in resueltas]
+
+
+def _correr(e: dict, contexto: dict) -> tuple:
+    inicio = time.perf_counter()
+    try:
+        contexto[e["nombre"]] = e["funcion"](contexto)
+        return OK, "", time.perf_counter() - inicio
+    except Detener as d:
+        return DETENIDA, str(d), time.perf_counter() - inicio
+    except Exception as ex:
+        return ERROR, f"{type(ex).__name__}: {ex}", time.perf_counter() - inicio
+
+
+def ejecutar(etapas: list, contexto: dict | None = None, max_hilos: int = MAX_HILOS,
+             hechas=(), al_completar=None) -> dict:
+    """
+    Ejecuta el grafo y devuelve {"contexto", "etapas": {nombre: {"estado",
+    "segundos", "error"}}, "detenido": motivo o None, "segundos": total}.
+
+    Las etapas de `hechas` cuentan como OK sin ejecutarse (su salida ya está
+    en `contexto`). `al_completar(contexto, completadas)` se llama en este
+    hilo tras cada etapa OK con la lista de las ya resueltas (OK, o con
+    error pero opcionales: no se reintentan al reanudar).
+    """
+    validar(etapas)
+    contexto = {} if contexto is None else contexto
+    por_nombre = {e["nombre"]: e for e in etapas}
+    estados, detenido = {}, None
+    for nombre in hechas:
+        if nombre in por_nombre:
+            estados[nombre] = {"estado": OK, "segundos": 0.0, "error": ""}
+            print(f"↩️ [Pipeline] {nombre}: reanudada desde checkpoint")
+    pendientes = [e["nombre"] for e in etapas if e["nombre"] not in estados]
+    inicio_total = time.perf_counter()
+
+    def _resuelta(dep: str) -> bool:
+        estado = estados.get(dep, {}).get("estado")
+        return estado == OK or (estado == ERROR and por_nombre[dep]["opcional"])
+
+    def _bloqueo(nombre: str) -> str | None:
+        if detenido is not None:
+            return f"pipeline detenido: {detenido}"
+        for dep in por_nombre[nombre]["depende"]:
+            if dep in estados and not _resuelta(dep):
+                return f"depende de {dep} ({estados[dep]['estado']})"
+        return None
+
+    with ThreadPoolExecutor(max_workers=max_hilos) as pool:
+        en_curso = {}
+        while pendientes or en_curso:
+            for nombre in list(pendientes):
+                motivo = _bloqueo(nombre)
+                if motivo:
+                    estados[nombre] = {"estado": OMITIDA, "segundos": 0.0, "error": motivo}
+                    pendientes.remove(nombre)
+                    print(f"⏭️ [Pipeline] {nombre}: omitida ({motivo})")
+                elif all(_resuelta(d) for d in por_nombre[nombre]["depende"]):
+                    en_curso[pool.submit(_correr, por_nombre[nombre], contexto)] = nombre
+                    pendientes.remove(nombre)
+            if not en_curso:
+                continue   # solo quedan omisiones en cascada por resolver
+            hechos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                nombre = en_curso.pop(futuro)
+                estado, error, segundos = futuro.result()
+                estados[nombre] = {"estado": estado, "segundos": round(segundos, 2), "error": error}
+                icono = {OK: "✅", DETENIDA: "🛑"}.get(estado, "❌")
+                print(f"⏱️ [Pipeline] {icono} {nombre}: {segundos:.1f}s" + (f" — {error}" if error else ""))
+                if estado == DETENIDA:
+                    detenido = error or nombre
+                elif estado == OK and al_completar is not None:
+                    al_completar(contexto, [n for n in estados if _resuelta(n)])
+
+    return {"contexto": contexto, "etapas": estados, "detenido": detenido,
+            "segundos": round(time.perf_counter() - inicio_total, 2)}
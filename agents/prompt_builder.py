@@ -0,0 +1,77 @@
+"""
+Montaje de prompts con presupuesto de tokens.
+
+Las plantillas (instrucciones + esquema JSON) son texto fijo y van al
+principio; el contexto variable (historial de la KB, tendencias) se mete al
+final en el hueco `{contexto}`. Ese contexto se arma por secciones
+ordenadas por utilidad y se recorta al presupuesto del agente, así que el
+tamaño del prompt no crece con la KB.
+"""
+from agents import knowledge_base
+
+# Tokens máximos para el contexto variable de cada agente
+PRESUPUESTOS = {
+    "batch":     600,
+    "generator": 400,
+}
+PRESUPUESTO_DEFECTO = 400
+
+
+def tokens(texto: str) -> int:
+    """Aproximación barata: ~4 caracteres por token."""
+    return (len(texto) + 3) // 4
+
+
+def seccion(titulo: str, elementos: list, prioridad: int, tope: float = 1.0,
+            separador: str = ", ") -> dict:
+    """
+    Sección de contexto. `elementos` va ordenado del más útil al menos;
+    `prioridad` menor entra antes; `tope` = fracción máxima del presupuesto.
+    """
+    return {"titulo": titulo, "elementos": [str(e) for e in elementos if e not in (None, "")],
+            "prioridad": prioridad, "tope": tope, "separador": separador}
+
+
+def construir_contexto(secciones: list, presupuesto: int) -> str:
+    """Añade secciones por prioridad y, en cada una, elementos hasta agotar su cupo."""
+    lineas, restante = [], presupuesto
+    for s in sorted(secciones, key=lambda s: s["prioridad"]):
+        cabecera = f"- {s['titulo']}: "
+        cupo = min(restante, int(presupuesto * s["tope"])) - tokens(cabecera)
+        incluidos = []
+        for elemento in s["elementos"]:
+            coste = tokens(elemento + s["separador"])
+            if coste > cupo:
+                break
+            incluidos.append(elemento)
+            cupo -= coste
+        if not incluidos:
+            continue
+        linea = cabecera + s["separador"].join(incluidos)
+        lineas.append(linea)
+        restante -= tokens(linea)
+    return "\n".join(lineas)
+
+
+def contexto_kb(agente: str, nombres: list | None = None, tendencias: list | None = None,
+                presupuesto: int | None = None) -> str:
+    """
+    Contexto de aprendizaje (KB + tendencias) recortado al presupuesto de
+    `agente`. `nombres`: ideas a no repetir, más recientes primero (por
+    defecto las de la KB).
+    """
+    items = knowledge_base.get_items_contexto()
+    if nombres is None:
+        nombres = items["ideas_previas"]
+    verticales = [f"{v} ({s})" for v, s in items["score_por_vertical"]]
+    secciones = [
+        seccion("Historial", [f"{items['total_analizadas']} ideas analizadas, "
+                              f"tasa de éxito {items['tasa_exito']}"], prioridad=0),
+        seccion("Ideas ya generadas (NO repetir)", nombres, prioridad=1, tope=0.45),
+        seccion("Tendencias actuales del mercado tech", tendencias or [], prioridad=2,
+                tope=0.3, separador="; "),
+        seccion("Verticales con mejor score medio", verticales, prioridad=3, tope=0.15),
+        seccion("Tags exitosos", items["tags_exitosos"], prioridad=4, tope=0.1),
+    ]
+    return construir_contexto(secciones, presupuesto or PRESUPUESTOS.get(agente, PRESUPUESTO_DEFECTO))
+
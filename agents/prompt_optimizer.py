@@ -1,34 +1,39 @@
 ﻿"""
 Prompt Optimizer - Auto-refina prompts basándose en resultados
 """
-import json
-import os
 from datetime import datetime
+from agents import storage
 
 class PromptOptimizer:
     def __init__(self, knowledge_base):
         self.kb = knowledge_base
         self.history_file = 'data/prompt_evolution.json'
-        self.history = self._load_history()
+        self.history, self._version = self._load_history()
     
     def _load_history(self):
-        if os.path.exists(self.history_file):
-            try:
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
-        
-        return {
+        vacio = {
             'version': 1,
             'prompts': [],
             'performance': [],
             'created_at': datetime.now().isoformat()
         }
+        try:
+            return storage.leer_json(self.history_file, vacio)
+        except ValueError:
+            return vacio, storage.version_actual(self.history_file)
     
-    def _save_history(self):
-        with open(self.history_file, 'w', encoding='utf-8') as f:
-            json.dump(self.history, f, indent=2, ensure_ascii=False)
+    def _save_history(self, intentos=3):
+        """Guarda si nadie más escribió desde que se cargó; si no, recarga y reañade el último prompt"""
+        for _ in range(intentos):
+            try:
+                self._version = storage.escribir_json(self.history_file, self.history, version=self._version)
+                return
+            except storage.Conflicto:
+                ultimo = self.history['prompts'][-1]
+                self.history, self._version = self._load_history()
+                ultimo['version'] = len(self.history['prompts']) + 1
+                self.history['prompts'].append(ultimo)
+        print(f"⚠️ {self.history_file} cambia demasiado a menudo: no se guardó la evolución")
     
     def get_optimized_prompt(self, base_product):
         insights = self.kb.get_insights()
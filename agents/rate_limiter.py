@@ -0,0 +1,212 @@
+"""
+Limitador de peticiones compartido entre procesos (token bucket en SQLite).
+
+monitor_nocturno, el /idea del bot, run_batch y run_continuous consultan el
+mismo fichero: cada llamada reserva 1 petición y sus tokens estimados antes
+de enviarse, en lugar de descubrir el límite con un 429 y dormir después.
+
+También cuenta peticiones concedidas y 429 recibidos (`contadores`), que
+run_continuous usa para ajustar cuántas generaciones lanza a la vez.
+"""
+import os
+import time
+import random
+import sqlite3
+
+LIMITER_PATH = os.path.join("data", "rate_limits.sqlite")
+
+# Presupuesto por (proveedor, modelo): peticiones y tokens por minuto
+LIMITES = {
+    ("groq",   "llama-3.3-70b-versatile"): {"rpm": 30, "tpm": 12000},
+    ("groq",   "llama-3.1-8b-instant"):    {"rpm": 30, "tpm": 6000},
+    ("gemini", "gemini-2.0-flash"):        {"rpm": 15, "tpm": 1000000},
+}
+LIMITE_DEFECTO = {"rpm": 30, "tpm": 6000}
+
+MAX_ESPERA   = 300   # segundos máximos en cola antes de rendirse
+PAUSA_MAXIMA = 5     # re-evaluar el bucket al menos cada 5 s
+PENALIZACION = 10    # segundos de bloqueo tras un 429 sin Retry-After
+
+
+def _conectar() -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(LIMITER_PATH) or ".", exist_ok=True)
+    con = sqlite3.connect(LIMITER_PATH, timeout=30, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS buckets (
+            clave           TEXT PRIMARY KEY,
+            peticiones      REAL,
+            tokens          REAL,
+            actualizado     REAL,
+            bloqueado_hasta REAL
+        )""")
+    con.execute("CREATE TABLE IF NOT EXISTS contadores (clave TEXT PRIMARY KEY, valor INTEGER)")
+    return con
+
+
+def _sumar(con, clave: str):
+    con.execute(
+        "INSERT INTO contadores VALUES (?, 1) ON CONFLICT(clave) DO UPDATE SET valor = valor + 1",
+        (clave,),
+    )
+
+
+def _limite(proveedor: str, modelo: str) -> dict:
+    return LIMITES.get((proveedor, modelo), LIMITE_DEFECTO)
+
+
+def _leer_bucket(con, clave: str, limite: dict, ahora: float) -> list:
+    """Lee el bucket y lo rellena según el tiempo transcurrido."""
+    fila = con.execute(
+        "SELECT peticiones, tokens, actualizado, bloqueado_hasta FROM buckets WHERE clave = ?",
+        (clave,),
+    ).fetchone()
+    if not fila:
+        return [float(limite["rpm"]), float(limite["tpm"]), 0.0]
+    peticiones, tokens, actualizado, bloqueado = fila
+    transcurrido = max(ahora - actualizado, 0)
+    peticiones = min(limite["rpm"], peticiones + transcurrido * limite["rpm"] / 60)
+    tokens     = min(limite["tpm"], tokens + transcurrido * limite["tpm"] / 60)
+    return [peticiones, tokens, bloqueado]
+
+
+def _escribir_bucket(con, clave: str, bucket: list, ahora: float):
+    con.execute(
+        "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?, ?)",
+        (clave, bucket[0], bucket[1], ahora, bucket[2]),
+    )
+
+
+def _intentar(proveedor: str, modelo: str, tokens: int) -> float:
+    """Reserva cupo si hay; devuelve 0 si se concedió o los segundos a esperar."""
+    limite = _limite(proveedor, modelo)
+    tokens = min(tokens, limite["tpm"])
+    clave  = f"{proveedor}:{modelo}"
+    con = _conectar()
+    try:
+        con.execute("BEGIN IMMEDIATE")
+        ahora = time.time()
+        bucket = _leer_bucket(con, clave, limite, ahora)
+        if ahora < bucket[2]:
+            espera = bucket[2] - ahora
+        elif bucket[0] >= 1 and bucket[1] >= tokens:
+            bucket[0] -= 1
+            bucket[1] -= tokens
+            espera = 0
+            _sumar(con, "concedidas")
+        else:
+            espera = max(
+                (1 - bucket[0]) * 60 / limite["rpm"],
+                (tokens - bucket[1]) * 60 / limite["tpm"],
+            )
+        _escribir_bucket(con, clave, bucket, ahora)
+        con.execute("COMMIT")
+        return espera
+    except sqlite3.Error as e:
+        print(f"⚠️ [RateLimiter] Error SQLite, se continúa sin limitar: {e}")
+        return 0
+    finally:
+        con.close()
+
+
+def espera_estimada(proveedor: str, modelo: str, tokens: int) -> float:
+    """Como `_intentar` pero sin reservar: segundos hasta que habría cupo (0 = ya)."""
+    limite = _limite(proveedor, modelo)
+    tokens = min(tokens, limite["tpm"])
+    con = _conectar()
+    try:
+        ahora = time.time()
+        bucket = _leer_bucket(con, f"{proveedor}:{modelo}", limite, ahora)
+        if ahora < bucket[2]:
+            return bucket[2] - ahora
+        return max(
+            (1 - bucket[0]) * 60 / limite["rpm"],
+            (tokens - bucket[1]) * 60 / limite["tpm"],
+            0,
+        )
+    except sqlite3.Error:
+        return 0
+    finally:
+        con.close()
+
+
+def adquirir(proveedor: str, modelo: str, tokens: int, max_espera: float = MAX_ESPERA,
+             cancelado=None) -> bool:
+    """
+    Espera en cola hasta obtener 1 petición + `tokens` del presupuesto.
+    Devuelve False si no hay cupo en `max_espera` segundos o si se activa
+    el threading.Event `cancelado` mientras espera.
+    """
+    limite_espera = time.time() + max_espera
+    avisado = False
+    while True:
+        espera = _intentar(proveedor, modelo, tokens)
+        if espera <= 0:
+            return True
+        restante = limite_espera - time.time()
+        if restante <= 0:
+            return False
+        if not avisado:
+            print(f"🚦 [RateLimiter] {proveedor}/{modelo} sin cupo → en cola {espera:.1f}s...")
+            avisado = True
+        pausa = min(espera, PAUSA_MAXIMA, restante) + random.uniform(0, 0.25)
+        if cancelado is not None:
+            if cancelado.wait(pausa):
+                return False
+        else:
+            time.sleep(pausa)
+
+
+def ajustar(proveedor: str, modelo: str, reservados: int, reales: int):
+    """Devuelve al bucket los tokens reservados que no se consumieron."""
+    limite = _limite(proveedor, modelo)
+    # _intentar no descuenta más que el tpm: no se devuelve más de lo tomado
+    diferencia = min(reservados, limite["tpm"]) - reales
+    if not diferencia:
+        return
+    clave  = f"{proveedor}:{modelo}"
+    con = _conectar()
+    try:
+        con.execute("BEGIN IMMEDIATE")
+        ahora = time.time()
+        bucket = _leer_bucket(con, clave, limite, ahora)
+        bucket[1] = min(limite["tpm"], bucket[1] + diferencia)
+        _escribir_bucket(con, clave, bucket, ahora)
+        con.execute("COMMIT")
+    except sqlite3.Error as e:
+        print(f"⚠️ [RateLimiter] Error ajustando tokens: {e}")
+    finally:
+        con.close()
+
+
+def penalizar(proveedor: str, modelo: str, segundos: float | None = None):
+    """Tras un 429: vacía el bucket y bloquea el modelo para todos los procesos."""
+    limite = _limite(proveedor, modelo)
+    clave  = f"{proveedor}:{modelo}"
+    con = _conectar()
+    try:
+        con.execute("BEGIN IMMEDIATE")
+        ahora = time.time()
+        bucket = _leer_bucket(con, clave, limite, ahora)
+        bucket[0] = 0
+        bucket[2] = max(bucket[2], ahora + (PENALIZACION if segundos is None else segundos))
+        _escribir_bucket(con, clave, bucket, ahora)
+        _sumar(con, "limitados")
+        con.execute("COMMIT")
+    except sqlite3.Error as e:
+        print(f"⚠️ [RateLimiter] Error penalizando: {e}")
+    finally:
+        con.close()
+
+
+def contadores() -> dict:
+    """Totales acumulados de todos los procesos: {"concedidas", "limitados" (429)}."""
+    try:
+        con = _conectar()
+        try:
+            filas = dict(con.execute("SELECT clave, valor FROM contadores").fetchall())
+        finally:
+            con.close()
+    except sqlite3.Error:
+        filas = {}
+    return {"concedidas": filas.get("concedidas", 0), "limitados": filas.get("limitados", 0)}
@@ -1,7 +1,7 @@
 import os
 import json
 from datetime import datetime
-from groq import Groq
+from agents import llm
 
 def generate(idea, critique):
     """Genera informe markdown en carpeta informes/slug/"""
@@ -133,8 +133,6 @@ def generate_professional_opinion(idea, critique):
     print("🧠 Generando opinión profesional...")
     
     try:
-        client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
-        
         prompt = f"""Eres un experto en monetización de productos digitales con 10 años de experiencia.
 
 Analiza este producto y da tu opinión profesional:
@@ -170,17 +168,17 @@ Da tu opinión en este formato:
 
 Sé directo y honesto."""
 
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": "Eres un experto en monetización de productos digitales. Das opiniones honestas."},
-                {"role": "user", "content": prompt}
-            ],
+        opinion = llm.completar(
+            prompt,
+            sistema="Eres un experto en monetización de productos digitales. Das opiniones honestas.",
+            modelo=llm.MODELO_LIGERO,
             temperature=0.7,
-            max_tokens=800
+            max_tokens=800,
+            agente="report",
         )
-        
-        opinion = response.choices[0].message.content.strip()
+        if not opinion:
+            raise RuntimeError("Sin respuesta del LLM")
+        opinion = opinion.strip()
         return opinion
     
     except Exception as e:
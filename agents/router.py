@@ -0,0 +1,182 @@
+"""
+Router de modelos LLM según latencia, errores y cupo.
+
+Cada modelo tiene un nivel de calidad y un coste relativo; cada agente un
+nivel mínimo aceptable. Para cada llamada se ordenan los modelos: primero
+el preferido del agente si está sano, después los sanos del nivel exigido
+del más barato al más caro y, al final, los degradados como último
+recurso. "Sano" = sin bloqueo ni cupo agotado (limitador compartido y
+cabeceras x-ratelimit del proveedor), tasa de error reciente por debajo de
+UMBRAL_ERRORES y p95 de latencia por debajo de LATENCIA_P95_MAX.
+
+Las estadísticas de latencia y errores son del proceso (ventana móvil);
+el cupo viene del limitador, que es compartido entre procesos.
+"""
+import time
+import threading
+from collections import deque
+
+from agents import rate_limiter
+
+# (proveedor, modelo) → nivel de calidad (1-3) y coste relativo
+MODELOS = {
+    ("groq",   "llama-3.1-8b-instant"):    {"nivel": 1, "coste": 1},
+    ("gemini", "gemini-2.0-flash"):        {"nivel": 3, "coste": 2},
+    ("groq",   "llama-3.3-70b-versatile"): {"nivel": 3, "coste": 3},
+}
+
+# Nivel mínimo por agente: el generador tolera 8b en picos, el informe no
+NIVEL_MINIMO = {
+    "analyzer":    3,
+    "critic":      3,
+    "batch":       3,
+    "competition": 3,
+    "estimation":  1,
+    "generator":   1,
+    "learning":    1,
+    "report":      1,
+    "trend_hunter": 1,
+}
+NIVEL_DEFECTO = 1
+
+VENTANA           = 50     # últimas llamadas por modelo
+MIN_MUESTRAS      = 4      # antes de esto no se juzga la tasa de error
+UMBRAL_ERRORES    = 0.5
+LATENCIA_P95_MAX  = 45.0   # segundos
+
+_lock = threading.Lock()
+_latencias = {}   # (proveedor, modelo) → deque de segundos (solo éxitos)
+_resultados = {}  # (proveedor, modelo) → deque de bool
+_cuotas = {}      # (proveedor, modelo) → {"peticiones", "tokens", "hasta"}
+_primeros = {}    # (proveedor, modelo) → deque de segundos hasta el primer byte (streaming)
+
+
+def _percentil(valores: list, p: float) -> float | None:
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(int(len(ordenados) * p), len(ordenados) - 1)]
+
+
+def registrar(proveedor: str, modelo: str, segundos: float, ok: bool):
+    """Anota el resultado de una llamada en la ventana móvil del modelo."""
+    clave = (proveedor, modelo)
+    with _lock:
+        _resultados.setdefault(clave, deque(maxlen=VENTANA)).append(ok)
+        if ok:
+            _latencias.setdefault(clave, deque(maxlen=VENTANA)).append(segundos)
+
+
+def registrar_primer_byte(proveedor: str, modelo: str, segundos: float):
+    """Anota cuánto tardó en llegar el primer fragmento de una respuesta en streaming."""
+    with _lock:
+        _primeros.setdefault((proveedor, modelo), deque(maxlen=VENTANA)).append(segundos)
+
+
+def _segundos_reset(valor) -> float:
+    """Groq manda el reset como '2m59.56s', '7.66s' o '120ms'."""
+    try:
+        texto = str(valor).strip()
+        if texto.endswith("ms"):
+            return float(texto[:-2]) / 1000
+        minutos, _, resto = texto.rpartition("m")
+        return float(minutos or 0) * 60 + float(resto.rstrip("s") or 0)
+    except ValueError:
+        return 0.0
+
+
+def registrar_cuota(proveedor: str, modelo: str, cabeceras):
+    """Guarda el cupo restante que informan las cabeceras x-ratelimit-*."""
+    try:
+        peticiones = int(cabeceras.get("x-ratelimit-remaining-requests"))
+        tokens     = int(cabeceras.get("x-ratelimit-remaining-tokens"))
+    except (TypeError, ValueError):
+        return
+    reset = max(_segundos_reset(cabeceras.get("x-ratelimit-reset-requests", 0)),
+                _segundos_reset(cabeceras.get("x-ratelimit-reset-tokens", 0)))
+    with _lock:
+        _cuotas[(proveedor, modelo)] = {
+            "peticiones": peticiones, "tokens": tokens, "hasta": time.time() + reset,
+        }
+
+
+def _sin_cupo_remoto(clave, tokens: int) -> bool:
+    cuota = _cuotas.get(clave)
+    if not cuota or time.time() >= cuota["hasta"]:
+        return False
+    return cuota["peticiones"] <= 0 or cuota["tokens"] < tokens
+
+
+def estado(proveedor: str, modelo: str) -> dict:
+    """p50/p95 de latencia (y del primer byte), tasa de error y cupo remoto del modelo."""
+    clave = (proveedor, modelo)
+    with _lock:
+        latencias  = list(_latencias.get(clave, []))
+        resultados = list(_resultados.get(clave, []))
+        cuota      = dict(_cuotas.get(clave, {}))
+        primeros   = list(_primeros.get(clave, []))
+    return {
+        "p50": _percentil(latencias, 0.5),
+        "p95": _percentil(latencias, 0.95),
+        "p95_primer_byte": _percentil(primeros, 0.95) if len(primeros) >= MIN_MUESTRAS else None,
+        "errores": (resultados.count(False) / len(resultados)) if resultados else 0.0,
+        "muestras": len(resultados),
+        "cuota": cuota,
+    }
+
+
+def _motivo_degradado(clave, tokens: int) -> str | None:
+    """Por qué el modelo no está sano ahora mismo, o None si lo está."""
+    if rate_limiter.espera_estimada(clave[0], clave[1], tokens) > 0:
+        return "sin cupo"
+    with _lock:
+        if _sin_cupo_remoto(clave, tokens):
+            return "cupo del proveedor agotado"
+    e = estado(*clave)
+    if e["muestras"] >= MIN_MUESTRAS and e["errores"] >= UMBRAL_ERRORES:
+        return f"errores {e['errores']:.0%}"
+    if e["p95"] is not None and e["p95"] > LATENCIA_P95_MAX:
+        return f"p95 {e['p95']:.0f}s"
+    return None
+
+
+def ordenar(agente: str, preferido: tuple, tokens: int, usar_gemini: bool = True) -> list:
+    """
+    Devuelve los (proveedor, modelo) a probar en orden para `agente`.
+    `preferido` va primero si está sano; nunca se incluyen modelos por
+    debajo del nivel mínimo del agente (salvo el propio preferido).
+    """
+    minimo = NIVEL_MINIMO.get(agente, NIVEL_DEFECTO)
+    elegibles = [
+        clave for clave, info in MODELOS.items()
+        if info["nivel"] >= minimo and (usar_gemini or clave[0] != "gemini")
+    ]
+    if preferido not in elegibles:
+        elegibles.append(preferido)
+
+    sanos, degradados = [], []
+    for clave in elegibles:
+        motivo = _motivo_degradado(clave, tokens)
+        if motivo:
+            degradados.append((clave, motivo))
+        else:
+            sanos.append(clave)
+
+    coste = lambda clave: MODELOS.get(clave, {}).get("coste", 0)
+    orden = sorted(sanos, key=lambda c: (c != preferido, coste(c)))
+    orden += [c for c, _ in sorted(degradados, key=lambda d: (
+        rate_limiter.espera_estimada(d[0][0], d[0][1], tokens), coste(d[0])))]
+
+    if orden and orden[0] != preferido:
+        motivo = dict(degradados).get(preferido, "")
+        print(f"🔀 [Router] {agente or 'llm'}: {preferido[1]} ({motivo}) → {orden[0][1]}")
+    return orden
+
+
+def reiniciar():
+    """Olvida las estadísticas del proceso (tests y diagnósticos)."""
+    with _lock:
+        _latencias.clear()
+        _resultados.clear()
+        _cuotas.clear()
+        _primeros.clear()
@@ -0,0 +1,161 @@
+"""
+Planificador de tareas periódicas por eventos (montículo de próximas ejecuciones).
+
+monitor_nocturno despertaba cada 60 s, comprobaba cinco condiciones de
+tiempo y ejecutaba en el mismo hilo lo que tocara: un lote lento retrasaba
+el health check, la cola y el resumen de las 08:00. Aquí:
+
+- El hilo planificador duerme hasta la próxima ejecución del montículo (sin
+  despertares en vacío) y lanza cada tarea en su propio hilo, así que una
+  tarea larga no retrasa a las cortas.
+- Deriva compensada: la siguiente ejecución se calcula desde la hora
+  programada, no desde la hora a la que terminó la anterior.
+- Ejecuciones perdidas: si al tocar la tarea sigue en curso, si el
+  planificador se retrasó más de un intervalo (suspensión, reloj) o si una
+  diaria llega más de TOLERANCIA_DIARIA tarde, no se recupera en ráfaga: se
+  anota en `estado()` y en el log.
+
+    plan = Planificador(log=log)
+    plan.cada("batch", 30 * 60, generar_nueva_idea)
+    plan.diaria("resumen", 8, enviar_resumen_diario, zona=ZONA)
+    plan.ejecutar()   # bloquea hasta plan.detener()
+"""
+import time
+import heapq
+import itertools
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+TOLERANCIA_DIARIA = 3600   # segundos de retraso tras los que una diaria se da por perdida
+MAX_HISTORIAL     = 50     # ejecuciones perdidas que se recuerdan por tarea
+
+
+def proxima_diaria(hora: int, minuto: int, desde: float, zona=None) -> float:
+    """Epoch de la primera hora:minuto (en `zona`, o la local) posterior a `desde`."""
+    local = datetime.fromtimestamp(desde, zona).replace(tzinfo=None)
+    objetivo = local.replace(hour=hora, minute=minuto, second=0, microsecond=0)
+    for dias in (0, 1):
+        candidato = objetivo + timedelta(days=dias)
+        if zona is None:
+            epoch = candidato.timestamp()
+        elif hasattr(zona, "localize"):   # pytz: resuelve el cambio de hora
+            epoch = zona.localize(candidato).timestamp()
+        else:
+            epoch = candidato.replace(tzinfo=zona).timestamp()
+        if epoch > desde:
+            return epoch
+    return epoch
+
+
+class Planificador:
+    """Tareas `cada` N segundos y `diaria`s; `ejecutar()` las dispara en hilos propios."""
+
+    def __init__(self, log=print):
+        self._log = log
+        self._tareas = {}
+        self._cola = []                 # (proximo, orden, nombre)
+        self._orden = itertools.count()
+        self._cond = threading.Condition()
+        self._parar = False
+
+    def cada(self, nombre: str, segundos: float, funcion, primera: float = 0.0):
+        """`funcion()` cada `segundos`; la primera vez a los `primera` segundos."""
+        self._anadir({"nombre": nombre, "funcion": funcion, "intervalo": segundos, "hora": None},
+                     time.time() + primera)
+
+    def diaria(self, nombre: str, hora: int, funcion, minuto: int = 0, zona=None):
+        """`funcion()` todos los días a hora:minuto (en `zona`, o la hora local)."""
+        self._anadir({"nombre": nombre, "funcion": funcion, "intervalo": None,
+                      "hora": (hora, minuto), "zona": zona},
+                     proxima_diaria(hora, minuto, time.time(), zona))
+
+    def _anadir(self, tarea: dict, cuando: float):
+        tarea.update(proximo=cuando, en_curso=False, ejecuciones=0, errores=0, perdidas=0,
+                     ultima_duracion=None, ultimo_error="", historial=deque(maxlen=MAX_HISTORIAL))
+        with self._cond:
+            if tarea["nombre"] in self._tareas:
+                raise ValueError(f"Tarea repetida: {tarea['nombre']}")
+            self._tareas[tarea["nombre"]] = tarea
+            heapq.heappush(self._cola, (cuando, next(self._orden), tarea["nombre"]))
+            self._cond.notify()
+
+    def ejecutar(self):
+        """Bucle del planificador: duerme hasta la próxima tarea y la lanza."""
+        with self._cond:
+            while not self._parar:
+                if not self._cola:
+                    self._cond.wait()
+                    continue
+                cuando, _, nombre = self._cola[0]
+                espera = cuando - time.time()
+                if espera > 0:
+                    self._cond.wait(espera)
+                    continue
+                heapq.heappop(self._cola)
+                tarea = self._tareas[nombre]
+                self._disparar(tarea, cuando)
+                self._reprogramar(tarea, cuando)
+
+    def detener(self):
+        with self._cond:
+            self._parar = True
+            self._cond.notify_all()
+
+    def _perdida(self, tarea: dict, cuando: float, motivo: str, veces: int = 1):
+        tarea["perdidas"] += veces
+        tarea["historial"].append({"programada": round(cuando, 3), "motivo": motivo, "veces": veces})
+        self._log(f"⏭️ [Planificador] {tarea['nombre']}: {veces} ejecución(es) perdida(s) — {motivo}")
+
+    def _disparar(self, tarea: dict, cuando: float):
+        retraso = time.time() - cuando
+        if tarea["en_curso"]:
+            self._perdida(tarea, cuando, "la anterior sigue en curso")
+        elif tarea["hora"] and retraso > TOLERANCIA_DIARIA:
+            self._perdida(tarea, cuando, f"planificador retrasado {retraso / 60:.0f} min")
+        else:
+            tarea["en_curso"] = True
+            threading.Thread(target=self._correr, args=(tarea,), name=f"tarea-{tarea['nombre']}",
+                             daemon=True).start()
+
+    def _reprogramar(self, tarea: dict, cuando: float):
+        ahora = time.time()
+        if tarea["intervalo"]:
+            proximo = cuando + tarea["intervalo"]
+            if proximo <= ahora:
+                saltadas = int((ahora - proximo) // tarea["intervalo"]) + 1
+                self._perdida(tarea, proximo, "planificador retrasado más de un intervalo", saltadas)
+                proximo += saltadas * tarea["intervalo"]
+        else:
+            hora, minuto = tarea["hora"]
+            proximo = proxima_diaria(hora, minuto, max(ahora, cuando), tarea["zona"])
+        tarea["proximo"] = proximo
+        heapq.heappush(self._cola, (proximo, next(self._orden), tarea["nombre"]))
+
+    def _correr(self, tarea: dict):
+        inicio = time.perf_counter()
+        error = ""
+        try:
+            tarea["funcion"]()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            self._log(f"❌ [Planificador] {tarea['nombre']}: {error}")
+        with self._cond:
+            tarea["en_curso"] = False
+            tarea["ejecuciones"] += 1
+            tarea["errores"] += bool(error)
+            tarea["ultimo_error"] = error or tarea["ultimo_error"]
+            tarea["ultima_duracion"] = round(time.perf_counter() - inicio, 2)
+
+    def estado(self) -> dict:
+        """{nombre: {"proximo", "en_curso", "ejecuciones", "errores", "perdidas", ...}}"""
+        with self._cond:
+            return {
+                nombre: {
+                    "proximo": t["proximo"], "en_curso": t["en_curso"],
+                    "ejecuciones": t["ejecuciones"], "errores": t["errores"],
+                    "perdidas": t["perdidas"], "historial_perdidas": list(t["historial"]),
+                    "ultima_duracion": t["ultima_duracion"], "ultimo_error": t["ultimo_error"],
+                }
+                for nombre, t in self._tareas.items()
+            }
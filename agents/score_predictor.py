@@ -0,0 +1,254 @@
+"""
+Predictor local del score del crítico (regresión ridge sobre n-gramas con hashing).
+
+Cada crítica cuesta una llamada al 70b, también para ideas que iban a ser
+rechazadas. Este modelo aprende de las críticas ya hechas (texto de la
+idea, vertical, tipo, tags y los scores que trae la idea antes de la
+crítica) y predice score_critico en microsegundos: si la predicción queda
+claramente por debajo de `umbral_critico`, la idea se descarta sin crítica.
+
+- Entrenamiento incremental: se guardan XᵀX, Xᵀy e yᵀy en SQLite (como el
+  resto del estado compartido) y cada crítica nueva solo las suma; los
+  pesos se recalculan resolviendo un sistema de DIMENSIONES x DIMENSIONES.
+- Hasta MIN_MUESTRAS críticas no predice nada. Un EXPLORACION de las ideas
+  descartables se critica igualmente para que el modelo siga viendo
+  ejemplos de la zona baja.
+- numpy es opcional: sin él `activo()` es False y todo pasa por el crítico.
+
+    python -m agents.score_predictor [--reentrenar]
+"""
+import os
+import re
+import sys
+import time
+import zlib
+import random
+import sqlite3
+import argparse
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PREDICTOR_PATH = os.path.join("data", "score_predictor.sqlite")
+
+DIMENSIONES  = 512    # cubetas de hashing para n-gramas y categorías
+LAMBDA       = 1.0    # regularización ridge
+MIN_MUESTRAS = 30     # críticas necesarias antes de predecir
+SIGMAS       = 1.5    # se descarta si predicción + SIGMAS·rmse < umbral...
+MARGEN       = 10     # ...y en todo caso con al menos MARGEN puntos de distancia
+EXPLORACION  = 0.1    # fracción de descartables que se critica igualmente
+REFRESCO     = 60     # segundos entre relecturas del modelo compartido
+
+CAMPOS_TEXTO   = ("nombre", "problema", "solucion", "propuesta_valor")
+SCORES_PREVIOS = ("generador", "ejecutabilidad", "timing")   # los trae la idea antes de la crítica
+_TOTAL = DIMENSIONES + 1 + len(SCORES_PREVIOS)               # + término independiente
+
+_PALABRA = re.compile(r"\w+", re.UNICODE)
+_cache = {"n": -1, "pesos": None, "rmse": None, "leido": 0.0}
+_cache_lock = threading.Lock()
+
+
+def activo() -> bool:
+    return np is not None and os.environ.get("SCORE_PREDICTOR", "1") != "0"
+
+
+def _conectar() -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(PREDICTOR_PATH) or ".", exist_ok=True)
+    con = sqlite3.connect(PREDICTOR_PATH, timeout=30, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS modelo (
+            clave       TEXT PRIMARY KEY,
+            n           INTEGER,
+            xtx         BLOB,
+            xty         BLOB,
+            yty         REAL,
+            actualizado REAL
+        )""")
+    return con
+
+
+# ── Características ───────────────────────────────────────────────────────────
+
+def _sumar_hash(x, token: str, peso: float):
+    h = zlib.crc32(token.encode("utf-8"))
+    x[h % DIMENSIONES] += peso if h & 0x80000000 else -peso
+
+
+def vector(idea: dict):
+    """Vector denso de características de `idea` (longitud _TOTAL)."""
+    x = np.zeros(_TOTAL)
+    for campo in CAMPOS_TEXTO:
+        palabras = _PALABRA.findall(str(idea.get(campo, "")).lower())
+        tokens = palabras + [f"{a} {b}" for a, b in zip(palabras, palabras[1:])]
+        peso = 1 / len(tokens) ** 0.5 if tokens else 0
+        for token in tokens:
+            _sumar_hash(x, token, peso)
+    _sumar_hash(x, f"vertical={str(idea.get('vertical', '')).lower()}", 1.0)
+    _sumar_hash(x, f"tipo={str(idea.get('tipo', '')).lower()}", 1.0)
+    for tag in idea.get("tags") or []:
+        _sumar_hash(x, f"tag={str(tag).lower()}", 0.5)
+    x[DIMENSIONES] = 1.0
+    scores = idea.get("scores") or {}
+    for i, clave in enumerate(SCORES_PREVIOS):
+        valor = scores.get(clave, idea.get(f"score_{clave}"))
+        x[DIMENSIONES + 1 + i] = (float(valor) - 50) / 50 if isinstance(valor, (int, float)) else 0.0
+    return x
+
+
+def etiqueta(idea: dict) -> float | None:
+    """Score del crítico de una idea ya criticada, o None."""
+    if (idea.get("critique") or {}).get("por_defecto"):
+        return None
+    # scores["critico"] no vale: sin crítica es la autoevaluación del generador
+    for valor in (idea.get("score_critico"), (idea.get("critique") or {}).get("score_critico")):
+        if isinstance(valor, (int, float)):
+            return float(valor)
+    return None
+
+
+# ── Entrenamiento ─────────────────────────────────────────────────────────────
+
+def _leer(con):
+    fila = con.execute("SELECT n, xtx, xty, yty FROM modelo WHERE clave = 'critico'").fetchone()
+    if not fila:
+        return 0, np.zeros((_TOTAL, _TOTAL)), np.zeros(_TOTAL), 0.0
+    n, xtx, xty, yty = fila
+    if len(xty) != _TOTAL * 8:   # cambió DIMENSIONES: se empieza de cero
+        return 0, np.zeros((_TOTAL, _TOTAL)), np.zeros(_TOTAL), 0.0
+    return (n, np.frombuffer(xtx).reshape(_TOTAL, _TOTAL).copy(),
+            np.frombuffer(xty).copy(), yty)
+
+
+def _escribir(con, n, xtx, xty, yty):
+    con.execute("INSERT OR REPLACE INTO modelo VALUES ('critico', ?, ?, ?, ?, ?)",
+                (n, xtx.tobytes(), xty.tobytes(), yty, time.time()))
+
+
+def aprender(ideas) -> int:
+    """Suma al modelo las ideas (dict o lista) que ya tienen crítica. Devuelve cuántas."""
+    if not activo():
+        return 0
+    ideas = [ideas] if isinstance(ideas, dict) else list(ideas)
+    muestras = [(vector(i), y) for i in ideas if (y := etiqueta(i)) is not None]
+    if not muestras:
+        return 0
+    try:
+        con = _conectar()
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            n, xtx, xty, yty = _leer(con)
+            for x, y in muestras:
+                xtx += np.outer(x, x)
+                xty += y * x
+                yty += y * y
+            _escribir(con, n + len(muestras), xtx, xty, yty)
+            con.execute("COMMIT")
+        finally:
+            con.close()
+    except sqlite3.Error as e:
+        print(f"⚠️ [Predictor] No se pudo actualizar el modelo: {e}")
+        return 0
+    with _cache_lock:
+        _cache["leido"] = 0.0
+    return len(muestras)
+
+
+def reentrenar(ideas: list | None = None) -> int:
+    """Reconstruye el modelo desde cero con `ideas` (por defecto, las de la KB)."""
+    if not activo():
+        return 0
+    if ideas is None:
+        from agents.knowledge_base import _cargar
+        ideas = _cargar().get("ideas", [])
+    con = _conectar()
+    try:
+        con.execute("DELETE FROM modelo")
+    finally:
+        con.close()
+    with _cache_lock:
+        _cache["n"] = -1
+    return aprender(ideas)
+
+
+def _modelo():
+    """(n, pesos, rmse) resueltos desde el estado compartido, cacheados REFRESCO s."""
+    with _cache_lock:
+        if time.time() - _cache["leido"] < REFRESCO:
+            return _cache["n"], _cache["pesos"], _cache["rmse"]
+        try:
+            con = _conectar()
+            try:
+                n, xtx, xty, yty = _leer(con)
+            finally:
+                con.close()
+        except sqlite3.Error:
+            n = 0
+        if n != _cache["n"]:
+            pesos = rmse = None
+            if n >= MIN_MUESTRAS:
+                regularizacion = np.full(_TOTAL, LAMBDA)
+                regularizacion[DIMENSIONES] = 1e-6   # el término independiente casi no se penaliza
+                pesos = np.linalg.solve(xtx + np.diag(regularizacion), xty)
+                residuo = yty - 2 * pesos @ xty + pesos @ xtx @ pesos
+                rmse = float(np.sqrt(max(residuo, 0.0) / n))
+            _cache.update(n=n, pesos=pesos, rmse=rmse)
+        _cache["leido"] = time.time()
+        return _cache["n"], _cache["pesos"], _cache["rmse"]
+
+
+# ── Predicción ────────────────────────────────────────────────────────────────
+
+def predecir(idea: dict) -> dict | None:
+    """{"score", "rmse", "muestras"} o None si no hay numpy o faltan críticas."""
+    if not activo():
+        return None
+    n, pesos, rmse = _modelo()
+    if pesos is None:
+        return None
+    score = float(np.clip(vector(idea) @ pesos, 0, 100))
+    return {"score": round(score, 1), "rmse": round(rmse, 1), "muestras": n}
+
+
+def descartar(idea: dict, umbral: float) -> bool:
+    """
+    True si la idea se puede rechazar sin crítica: su predicción queda por
+    debajo de `umbral` con margen. Anota la predicción en idea["score_predicho"].
+    """
+    prediccion = predecir(idea)
+    if prediccion is None:
+        return False
+    idea["score_predicho"] = prediccion["score"]
+    if prediccion["score"] + max(MARGEN, SIGMAS * prediccion["rmse"]) >= umbral:
+        return False
+    nombre = idea.get("nombre", "?")
+    if random.random() < EXPLORACION:
+        print(f"🔮 [Predictor] {nombre}: {prediccion['score']} previsto, se critica igualmente (exploración)")
+        return False
+    print(f"🔮 [Predictor] {nombre}: {prediccion['score']} previsto (±{prediccion['rmse']}) "
+          f"< umbral {umbral} — descartada sin crítica")
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Predictor local del score del crítico")
+    parser.add_argument("--reentrenar", action="store_true", help="reconstruye el modelo con la KB")
+    args = parser.parse_args(argv)
+    if not activo():
+        print("❌ Predictor inactivo (falta numpy o SCORE_PREDICTOR=0)")
+        return 1
+    if args.reentrenar:
+        print(f"🧮 Modelo reconstruido con {reentrenar()} ideas criticadas")
+    n, pesos, rmse = _modelo()
+    if pesos is None:
+        print(f"⏳ {n}/{MIN_MUESTRAS} críticas: todavía no predice")
+    else:
+        print(f"✅ {n} críticas | error medio (rmse) {rmse:.1f} puntos")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Escritura segura de los ficheros de data/ que comparten varios procesos.
+
+El hilo del bot, el bucle del monitor y los subprocesos de run_batch
+escribían JSON y CSV con `open(..., "w")`: un lector podía ver el fichero
+truncado y dos escritores se pisaban los cambios. Aquí:
+
+- `bloqueo(ruta)`: flock exclusivo sobre `ruta + ".lock"` (entre procesos
+  y entre hilos; reentrante dentro del mismo hilo). Sin fcntl (Windows)
+  no bloquea.
+- `atomico(ruta)`: se escribe en un temporal del mismo directorio y se
+  sustituye con os.replace: los lectores ven la versión anterior o la
+  nueva, nunca media.
+- Política de fsync (STORAGE_FSYNC o parámetro `fsync`): "nunca", "datos"
+  (fsync del temporal antes de sustituir; por defecto) o "total" (además,
+  fsync del directorio para que el rename sobreviva a un corte).
+- Versiones optimistas: `leer_json` devuelve también la versión del
+  fichero (inodo, mtime y tamaño, ver `version_actual`) y
+  `escribir_json(..., version=v)` lanza Conflicto si alguien lo cambió
+  desde entonces.
+- `actualizar_json` / `actualizar_csv`: leer-modificar-escribir bajo el
+  bloqueo, para cambios cortos que no deben perderse.
+
+    datos, version = storage.leer_json(RUTA, {})
+    ...
+    storage.escribir_json(RUTA, datos, version=version)   # o Conflicto
+"""
+import os
+import csv
+import json
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:   # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+FSYNC = os.environ.get("STORAGE_FSYNC", "datos")   # "nunca" | "datos" | "total"
+
+CUALQUIERA = object()   # `version` por defecto: escribir sin comprobar
+
+_tenidos = threading.local()   # rutas bloqueadas por el hilo actual
+
+
+class Conflicto(Exception):
+    """El fichero cambió desde que se leyó (versión distinta)."""
+
+
+@contextmanager
+def bloqueo(ruta: str):
+    """Exclusión entre procesos para escribir `ruta`."""
+    rutas = _tenidos.__dict__.setdefault("rutas", set())
+    clave = os.path.abspath(ruta)
+    if clave in rutas:   # ya lo tiene este hilo (flock no es reentrante entre descriptores)
+        yield
+        return
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    with open(ruta + ".lock", "a") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        rutas.add(clave)
+        try:
+            yield
+        finally:
+            rutas.discard(clave)
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def version_actual(ruta: str):
+    """Identificador de la versión actual de `ruta` (None si no existe)."""
+    try:
+        st = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+@contextmanager
+def atomico(ruta: str, modo: str = "w", fsync: str | None = None, **kwargs):
+    """Fichero temporal que sustituye a `ruta` al salir sin error."""
+    fsync = fsync or FSYNC
+    directorio = os.path.dirname(ruta) or "."
+    os.makedirs(directorio, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(prefix=os.path.basename(ruta) + ".", suffix=".tmp", dir=directorio)
+    try:
+        try:   # mkstemp crea con 0600: se conservan los permisos del fichero actual
+            os.chmod(temporal, stat.S_IMODE(os.stat(ruta).st_mode))
+        except FileNotFoundError:
+            os.chmod(temporal, 0o644)
+        with open(fd, modo, **kwargs) as f:
+            yield f
+            f.flush()
+            if fsync != "nunca":
+                os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.unlink(temporal)
+        except FileNotFoundError:
+            pass
+        raise
+    if fsync == "total" and hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directorio, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+# ── JSON ──────────────────────────────────────────────────────────────────────
+
+def _leer_json(ruta: str, defecto):
+    try:
+        with open(ruta, "r", encoding="utf-8-sig") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return defecto
+
+
+def leer_json(ruta: str, defecto=None):
+    """(datos, version). `defecto` si el fichero no existe."""
+    antes = version_actual(ruta)
+    datos = _leer_json(ruta, defecto)
+    # con reemplazo atómico, si la versión no cambió durante la lectura es la leída
+    for _ in range(3):
+        despues = version_actual(ruta)
+        if despues == antes:
+            break
+        antes, datos = despues, _leer_json(ruta, defecto)
+    return datos, antes
+
+
+def escribir_json(ruta: str, datos, version=CUALQUIERA, fsync: str | None = None, indent=2):
+    """Escribe `datos` de forma atómica; con `version`, solo si el fichero sigue en ella."""
+    with bloqueo(ruta):
+        if version is not CUALQUIERA and version_actual(ruta) != version:
+            raise Conflicto(ruta)
+        with atomico(ruta, "w", fsync, encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, indent=indent)
+        return version_actual(ruta)
+
+
+def actualizar_json(ruta: str, funcion, defecto=None, fsync: str | None = None):
+    """Aplica `funcion(datos) -> datos` bajo el bloqueo y guarda el resultado."""
+    with bloqueo(ruta):
+        datos = funcion(_leer_json(ruta, defecto))
+        with atomico(ruta, "w", fsync, encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, indent=2)
+    return datos
+
+
+# ── CSV ───────────────────────────────────────────────────────────────────────
+
+def leer_csv(ruta: str) -> list:
+    try:
+        with open(ruta, "r", newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+    except FileNotFoundError:
+        return []
+
+
+def _escribir_csv(ruta: str, filas: list, campos: list, fsync: str | None):
+    with atomico(ruta, "w", fsync, newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=campos, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(filas)
+
+
+def actualizar_csv(ruta: str, funcion, campos: list, fsync: str | None = None) -> list:
+    """Aplica `funcion(filas) -> filas` bajo el bloqueo y reescribe el CSV."""
+    with bloqueo(ruta):
+        filas = funcion(leer_csv(ruta))
+        _escribir_csv(ruta, filas, campos, fsync)
+    return filas
+
+
+def anadir_csv(ruta: str, fila: dict, campos: list, fsync: str | None = None):
+    """Añade una fila (y la cabecera si el fichero es nuevo) bajo el bloqueo."""
+    with bloqueo(ruta):
+        if not os.path.exists(ruta):
+            _escribir_csv(ruta, [fila], campos, fsync)
+            return
+        with open(ruta, "a", newline="", encoding="utf-8") as f:
+            csv.DictWriter(f, fieldnames=campos, extrasaction="ignore").writerow(fila)
+            f.flush()
+            if (fsync or FSYNC) != "nunca":
+                os.fsync(f.fileno())
@@ -2,13 +2,15 @@
 Telegram Agent: notificaciones de nuevas ideas
 """
 import os
-import requests
+
+from agents import endpoints
 
 BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 def send_notification(idea):
     """Envía notificación de nueva idea"""
+    import requests
     
     if not BOT_TOKEN or not CHAT_ID:
         print('⚠️ Telegram no configurado')
@@ -39,7 +41,7 @@ def send_notification(idea):
     
     # Enviar
     try:
-        url = f'https://api.telegram.org/bot{BOT_TOKEN}/sendMessage'
+        url = f'{endpoints.base("telegram")}/bot{BOT_TOKEN}/sendMessage'
         data = {
             'chat_id': CHAT_ID,
             'text': message,
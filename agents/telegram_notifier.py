@@ -1,12 +1,15 @@
 import os
-import requests
 from datetime import datetime
-import pytz
+
+from agents import endpoints
+
 
 def send_telegram_notification(idea, critique, landing_url, report_url):
     """
     Envía notificación Telegram con hora CORRECTA (CET/CEST)
     """
+    import requests
+    import pytz
     
     bot_token = os.environ.get('TELEGRAM_BOT_TOKEN')
     chat_id = os.environ.get('TELEGRAM_CHAT_ID')
@@ -58,7 +61,7 @@ _{descripcion}_
 _Generado automáticamente_
 """
     
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+    url = f"{endpoints.base('telegram')}/bot{bot_token}/sendMessage"
     payload = {
         'chat_id': chat_id,
         'text': message,
@@ -0,0 +1,191 @@
+"""
+Telemetría de llamadas LLM.
+
+Cada llamada de llm.chat añade una línea JSON a data/llm_metrics.jsonl
+(agente, modelo, tokens de prompt/respuesta, tiempo, reintentos, fallback,
+caché); chat_json añade si el JSON se pudo parsear y validar, y los
+orquestadores anotan cada idea aceptada. El fichero es solo de añadido:
+varios procesos escriben a la vez con una única write() por línea. Las
+lecturas con ventana (`leer(desde)`, el /status) recorren el fichero desde
+el final y paran al salir de la ventana: no dependen del histórico.
+
+Informe por agente (p50/p95/p99, tokens por idea aceptada):
+    python -m agents.telemetria [--horas 24]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from collections import defaultdict
+
+METRICAS_PATH = os.path.join("data", "llm_metrics.jsonl")
+
+BLOQUE   = 64 * 1024   # bytes leídos de cada vez al recorrer el fichero hacia atrás
+DESORDEN = 300         # segundos: escritores concurrentes pueden desordenar un poco las líneas
+
+
+def activa() -> bool:
+    return os.environ.get("LLM_METRICAS", "1") != "0"
+
+
+def registrar(tipo: str, **campos):
+    """Añade un evento `tipo` ("llamada", "parseo", "idea") al fichero."""
+    if not activa():
+        return
+    evento = {"ts": round(time.time(), 3), "tipo": tipo, **campos}
+    try:
+        os.makedirs(os.path.dirname(METRICAS_PATH) or ".", exist_ok=True)
+        with open(METRICAS_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(evento, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"⚠️ [Telemetría] No se pudo registrar: {e}")
+
+
+def registrar_idea(nombre: str, aceptada: bool = True, origen: str = ""):
+    """Anota una idea que sale del pipeline (para tokens por idea aceptada)."""
+    registrar("idea", nombre=nombre, aceptada=aceptada, origen=origen)
+
+
+def _lineas_al_reves(f):
+    """Líneas de `f` (binario) de la última a la primera, leyendo por bloques."""
+    posicion = f.seek(0, os.SEEK_END)
+    resto = b""
+    while posicion > 0:
+        tamano = min(BLOQUE, posicion)
+        posicion -= tamano
+        f.seek(posicion)
+        lineas = (f.read(tamano) + resto).split(b"\n")
+        resto = lineas.pop(0)   # puede seguir en el bloque anterior
+        yield from reversed(lineas)
+    yield resto
+
+
+def leer(desde: float | None = None) -> list:
+    """
+    Eventos con ts >= `desde` (epoch), en orden de escritura. Ignora líneas
+    corruptas. Con `desde` solo se lee la cola del fichero que cubre la ventana.
+    """
+    if not os.path.exists(METRICAS_PATH):
+        return []
+    eventos = []
+    if desde is None:
+        with open(METRICAS_PATH, "r", encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    eventos.append(json.loads(linea))
+                except json.JSONDecodeError:
+                    continue
+        return eventos
+    with open(METRICAS_PATH, "rb") as f:
+        for linea in _lineas_al_reves(f):
+            try:
+                evento = json.loads(linea)
+            except ValueError:   # vacía, cortada o mal codificada
+                continue
+            ts = evento.get("ts", 0)
+            if ts >= desde:
+                eventos.append(evento)
+            elif ts < desde - DESORDEN:
+                break
+    eventos.reverse()
+    return eventos
+
+
+def _percentil(valores: list, p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(int(len(ordenados) * p), len(ordenados) - 1)]
+
+
+def resumir(eventos: list) -> dict:
+    """Agrega los eventos por agente y calcula los tokens por idea aceptada."""
+    agentes = defaultdict(lambda: {
+        "llamadas": 0, "errores": 0, "cache": 0, "reintentos": 0, "fallback": 0,
+        "tokens_prompt": 0, "tokens_respuesta": 0, "segundos": [],
+        "parseos": 0, "parseos_ok": 0,
+    })
+    aceptadas = 0
+    for e in eventos:
+        if e.get("tipo") == "idea":
+            aceptadas += bool(e.get("aceptada"))
+            continue
+        a = agentes[e.get("agente") or "llm"]
+        if e.get("tipo") == "parseo":
+            a["parseos"] += 1
+            a["parseos_ok"] += bool(e.get("ok"))
+            continue
+        a["llamadas"] += 1
+        if e.get("estado") == "cache":
+            a["cache"] += 1
+            continue
+        a["errores"]          += e.get("estado") == "error"
+        a["reintentos"]       += e.get("reintentos", 0)
+        a["fallback"]         += bool(e.get("fallback"))
+        a["tokens_prompt"]    += e.get("tokens_prompt") or 0
+        a["tokens_respuesta"] += e.get("tokens_respuesta") or 0
+        a["segundos"].append(e.get("segundos", 0))
+
+    resumen = {}
+    for nombre, a in agentes.items():
+        seg = a.pop("segundos")
+        a["p50"], a["p95"], a["p99"] = (_percentil(seg, p) for p in (0.5, 0.95, 0.99))
+        a["tiempo_total"] = round(sum(seg), 1)
+        resumen[nombre] = a
+    tokens = sum(a["tokens_prompt"] + a["tokens_respuesta"] for a in resumen.values())
+    return {
+        "agentes": resumen,
+        "ideas_aceptadas": aceptadas,
+        "tokens_totales": tokens,
+        "tokens_por_idea": round(tokens / aceptadas) if aceptadas else None,
+    }
+
+
+def resumen_status(horas: float = 24) -> str:
+    """Bloque HTML para /status: agentes que más tiempo consumen y tokens por idea."""
+    r = resumir(leer(time.time() - horas * 3600))
+    if not r["agentes"]:
+        return "📈 Sin métricas LLM todavía"
+    lineas = [f"📈 <b>LLM últimas {horas:g}h</b>"]
+    por_tiempo = sorted(r["agentes"].items(), key=lambda kv: kv[1]["tiempo_total"], reverse=True)
+    for nombre, a in por_tiempo[:5]:
+        lineas.append(
+            f"• {nombre}: {a['llamadas']} llamadas | p50 {a['p50']:.1f}s p95 {a['p95']:.1f}s"
+            f" | {a['tiempo_total']:.0f}s total"
+        )
+    por_idea = r["tokens_por_idea"]
+    lineas.append(f"🔢 Tokens/idea aceptada: <b>{por_idea if por_idea is not None else 'N/A'}</b>")
+    return "\n".join(lineas)
+
+
+def _imprimir(r: dict):
+    cabecera = (f"{'agente':<18}{'llamadas':>9}{'cache':>7}{'error':>7}{'reint':>7}{'fallb':>7}"
+                f"{'p50':>8}{'p95':>8}{'p99':>8}{'total':>9}{'tok_in':>9}{'tok_out':>9}{'json_ok':>9}")
+    print(cabecera)
+    print("-" * len(cabecera))
+    for nombre, a in sorted(r["agentes"].items(), key=lambda kv: kv[1]["tiempo_total"], reverse=True):
+        json_ok = f"{a['parseos_ok'] / a['parseos']:.0%}" if a["parseos"] else "-"
+        print(f"{nombre:<18}{a['llamadas']:>9}{a['cache']:>7}{a['errores']:>7}{a['reintentos']:>7}"
+              f"{a['fallback']:>7}{a['p50']:>7.1f}s{a['p95']:>7.1f}s{a['p99']:>7.1f}s"
+              f"{a['tiempo_total']:>8.0f}s{a['tokens_prompt']:>9}{a['tokens_respuesta']:>9}{json_ok:>9}")
+    print()
+    print(f"Ideas aceptadas: {r['ideas_aceptadas']} | Tokens totales: {r['tokens_totales']} | "
+          f"Tokens por idea aceptada: {r['tokens_por_idea'] if r['tokens_por_idea'] is not None else 'N/A'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Informe de telemetría LLM")
+    parser.add_argument("--horas", type=float, default=None, help="Solo las últimas N horas")
+    args = parser.parse_args(argv)
+    desde = time.time() - args.horas * 3600 if args.horas else None
+    eventos = leer(desde)
+    if not eventos:
+        print(f"Sin métricas en {METRICAS_PATH}")
+        return 1
+    _imprimir(resumir(eventos))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
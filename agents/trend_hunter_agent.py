@@ -1,9 +1,8 @@
 import os
 import json
-import requests
 import time
 from datetime import datetime, timedelta
-from groq import Groq
+from agents import esquemas, llm, storage
 
 TRENDS_FILE = 'data/viral-trends.json'
 CACHE_HOURS = 6
@@ -11,6 +10,7 @@ CACHE_HOURS = 6
 # ============ FUENTE 1: AnswerThePublic (Apify) ============
 def fetch_answerthepublic(keyword, apify_token):
     """Obtiene preguntas reales de AnswerThePublic vÃ­a Apify"""
+    import requests
     
     url = "https://api.apify.com/v2/acts/deadlyaccurate~answer-the-public/run-sync-get-dataset-items"
     
@@ -273,7 +273,7 @@ def calculate_viral_score(trend_data):
     }
 
 # ============ IDEA GENERATOR ============
-def generate_quick_win_ideas(trend, client):
+def generate_quick_win_ideas(trend):
     """Genera productos rÃ¡pidos (24-48h) para capitalizar tendencia"""
     
     print(f"\nðŸ”¥ Generando ideas para: {trend.get('keyword', trend.get('name', trend.get('title', 'trend')))}")
@@ -338,8 +338,8 @@ CRITERIOS OBLIGATORIOS:
 âœ“ Aprovecha el timing perfecto (tendencia estÃ¡ creciendo AHORA)
 âœ“ Precio entre â‚¬9-â‚¬49
 
-Responde SOLO con JSON (sin markdown):
-[
+Responde SOLO con un objeto JSON (sin markdown):
+{{"productos": [
   {{
     "nombre": "Nombre especÃ­fico y atractivo",
     "tipo": "Template/GuÃ­a/Extension/Tool/Service",
@@ -353,28 +353,21 @@ Responde SOLO con JSON (sin markdown):
     "pasos_rapidos": ["Paso 1", "Paso 2", "Paso 3"],
     "porque_funciona_ahora": "Por quÃ© este timing es perfecto (2 frases)"
   }}
-]"""
+]}}"""
 
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": "Eres experto en trend-jacking: crear productos rÃ¡pidos que capitalizan tendencias virales. Solo sugieres productos REALISTAS que alguien puede crear en 48h mÃ¡ximo."},
-                {"role": "user", "content": prompt}
-            ],
+        datos = llm.completar_json(
+            prompt,
+            sistema="Eres experto en trend-jacking: crear productos rÃ¡pidos que capitalizan tendencias virales. Solo sugieres productos REALISTAS que alguien puede crear en 48h mÃ¡ximo.",
+            modelo=llm.MODELO_LIGERO,
             temperature=0.8,
-            max_tokens=2000
+            max_tokens=2000,
+            agente="trend_hunter",
+            esquema=esquemas.PRODUCTOS_TENDENCIA,
         )
-        
-        content = response.choices[0].message.content.strip()
-        
-        # Limpiar markdown si existe
-        if '```json' in content:
-            content = content.split('```json').split('```').strip()[1]
-        elif '```' in content:
-            content = content.split('```').split('```')[0].strip()
-        
-        ideas = json.loads(content)
+        if not datos:
+            raise RuntimeError("Sin respuesta JSON válida del LLM")
+        ideas = datos["productos"]
         
         # Enriquecer con metadata
         for idea in ideas:
@@ -399,7 +392,6 @@ def hunt_viral_opportunities():
     print("ðŸ”¥ TREND HUNTER AGENT - Cazando Tendencias Virales en Tiempo Real")
     print("="*80)
     
-    client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
     all_opportunities = []
     
     # 1. AnswerThePublic
@@ -414,7 +406,7 @@ def hunt_viral_opportunities():
             atp_data = fetch_answerthepublic(keyword, apify_token)
             
             if atp_data:
-                ideas = generate_quick_win_ideas(atp_data, client)
+                ideas = generate_quick_win_ideas(atp_data)
                 all_opportunities.extend(ideas)
                 time.sleep(2)
     else:
@@ -426,7 +418,7 @@ def hunt_viral_opportunities():
     
     for trend in google_trends[:2]:
         print(f"   {trend['keyword']} ({trend['growth']})")
-        ideas = generate_quick_win_ideas(trend, client)
+        ideas = generate_quick_win_ideas(trend)
         all_opportunities.extend(ideas)
         time.sleep(2)
     
@@ -436,7 +428,7 @@ def hunt_viral_opportunities():
     
     for post in reddit_posts[:2]:
         print(f"   {post['subreddit']}: {post['title'][:50]}...")
-        ideas = generate_quick_win_ideas(post, client)
+        ideas = generate_quick_win_ideas(post)
         all_opportunities.extend(ideas)
         time.sleep(2)
     
@@ -446,7 +438,7 @@ def hunt_viral_opportunities():
     
     for product in ph_today:
         print(f"   {product['name']}: {product['upvotes']} upvotes")
-        ideas = generate_quick_win_ideas(product, client)
+        ideas = generate_quick_win_ideas(product)
         all_opportunities.extend(ideas)
         time.sleep(2)
     
@@ -456,7 +448,7 @@ def hunt_viral_opportunities():
     
     for trend in twitter_trends[:1]:
         print(f"   {trend['name']}: {trend.get('tweet_volume', 'N/A')} tweets")
-        ideas = generate_quick_win_ideas(trend, client)
+        ideas = generate_quick_win_ideas(trend)
         all_opportunities.extend(ideas)
         time.sleep(2)
     
@@ -479,9 +471,7 @@ def hunt_viral_opportunities():
         "all_opportunities": all_opportunities
     }
     
-    os.makedirs('data', exist_ok=True)
-    with open(TRENDS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(trends_output, f, indent=2, ensure_ascii=False)
+    storage.escribir_json(TRENDS_FILE, trends_output)
     
     print(f"\nâœ… {len(all_opportunities)} oportunidades detectadas")
     print(f"ðŸ“ Guardado en: {TRENDS_FILE}")
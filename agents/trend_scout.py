@@ -1,5 +1,5 @@
 # agents/trend_scout.py
-import requests, json
+import json
 from datetime import datetime
 
 def obtener_tendencias():
@@ -8,6 +8,7 @@ def obtener_tendencias():
     - HackerNews top stories
     - Product Hunt via RSS
     """
+    import requests
     tendencias = []
     
     # HackerNews API (gratis, sin auth)
@@ -30,11 +31,11 @@ def obtener_tendencias():
     # Guardar en KB
     if tendencias:
         try:
-            with open("data/tendencias.json", "w", encoding="utf-8") as f:
-                json.dump({
-                    "fecha": datetime.now().isoformat(),
-                    "tendencias": tendencias
-                }, f, ensure_ascii=False, indent=2)
+            from agents import storage
+            storage.escribir_json("data/tendencias.json", {
+                "fecha": datetime.now().isoformat(),
+                "tendencias": tendencias
+            })
         except:
             pass
     
@@ -0,0 +1,134 @@
+"""
+Pool de procesos worker persistentes.
+
+monitor_nocturno lanzaba un intérprete nuevo por idea (`python run_batch.py`)
+y luego buscaba "✅ Sincronizada:" en su stdout. Aquí los workers arrancan
+una vez, importan run_batch y los agentes por adelantado y se quedan
+esperando trabajos: cada trabajo es `modulo.funcion(*args, **kwargs)` y
+vuelve el valor que devuelve la función (un dict), no texto.
+
+Aislamiento: cada trabajo corre en otro proceso, así que un cuelgue o un
+crash no tumba al monitor. Si un trabajo pasa de su timeout el worker se
+mata y se sustituye por uno nuevo; si muere solo, igual.
+
+    pool = PoolWorkers(tamano=2)
+    r = pool.ejecutar("run_batch", "ejecutar_batch", timeout=240, lote=1)
+    if r["estado"] == "ok": r["resultado"]["publicadas"] ...
+"""
+import time
+import queue
+import threading
+import importlib
+import traceback
+import multiprocessing
+
+PRECARGA = ["run_batch", "agents.llm", "agents.knowledge_base", "agents.critic_agent",
+            "agents.notion_sync_agent"]
+TIMEOUT_DEFECTO = 240   # segundos por trabajo
+ESPERA_CIERRE   = 5     # segundos para que un worker salga limpio al cerrar
+
+
+def _bucle_worker(conexion, precarga: list):
+    """Proceso worker: importa `precarga` y atiende trabajos hasta recibir None."""
+    for modulo in precarga:
+        try:
+            importlib.import_module(modulo)
+        except Exception as e:
+            print(f"⚠️ [Worker] No se pudo precargar {modulo}: {e}")
+    while True:
+        try:
+            trabajo = conexion.recv()
+        except (EOFError, OSError):
+            return
+        if trabajo is None:
+            return
+        modulo, funcion, args, kwargs = trabajo
+        try:
+            resultado = getattr(importlib.import_module(modulo), funcion)(*args, **kwargs)
+            respuesta = {"estado": "ok", "resultado": resultado, "error": ""}
+        except Exception as e:
+            traceback.print_exc()
+            respuesta = {"estado": "error", "resultado": None, "error": f"{type(e).__name__}: {e}"}
+        conexion.send(respuesta)
+
+
+class _Worker:
+    def __init__(self, contexto, precarga: list):
+        self.conexion, extremo = contexto.Pipe()
+        self.proceso = contexto.Process(target=_bucle_worker, args=(extremo, precarga), daemon=True)
+        self.proceso.start()
+        extremo.close()
+
+    def matar(self):
+        if self.proceso.is_alive():
+            self.proceso.terminate()
+        self.proceso.join(ESPERA_CIERRE)
+        if self.proceso.is_alive():
+            self.proceso.kill()
+            self.proceso.join()
+        self.conexion.close()
+
+
+class PoolWorkers:
+    """`tamano` workers calientes; `ejecutar` bloquea hasta que uno queda libre."""
+
+    def __init__(self, tamano: int = 1, precarga: list | None = None):
+        # spawn: no hereda hilos ni locks del monitor (fork con hilos puede colgarse)
+        self._contexto = multiprocessing.get_context("spawn")
+        self._precarga = PRECARGA if precarga is None else precarga
+        self._libres = queue.Queue()
+        self._todos = []
+        self._lock = threading.Lock()
+        for _ in range(tamano):
+            self._libres.put(self._nuevo())
+
+    def _nuevo(self) -> _Worker:
+        worker = _Worker(self._contexto, self._precarga)
+        with self._lock:
+            self._todos.append(worker)
+        return worker
+
+    def _reemplazar(self, worker: _Worker) -> _Worker:
+        worker.matar()
+        with self._lock:
+            self._todos.remove(worker)
+        return self._nuevo()
+
+    def ejecutar(self, modulo: str, funcion: str, *args, timeout: float = TIMEOUT_DEFECTO,
+                 **kwargs) -> dict:
+        """
+        Ejecuta `modulo.funcion(*args, **kwargs)` en un worker. Devuelve
+        {"estado": "ok"|"error"|"timeout"|"caido", "resultado", "error", "segundos"}.
+        """
+        worker = self._libres.get()
+        inicio = time.perf_counter()
+        try:
+            if not worker.proceso.is_alive():
+                worker = self._reemplazar(worker)
+            worker.conexion.send((modulo, funcion, args, kwargs))
+            if not worker.conexion.poll(timeout):
+                print(f"⏰ [Pool] {modulo}.{funcion} superó {timeout:.0f}s — worker reiniciado")
+                worker = self._reemplazar(worker)
+                respuesta = {"estado": "timeout", "resultado": None, "error": f"timeout {timeout:.0f}s"}
+            else:
+                respuesta = worker.conexion.recv()
+        except (EOFError, OSError) as e:
+            print(f"💥 [Pool] Worker caído en {modulo}.{funcion} — reiniciado")
+            worker = self._reemplazar(worker)
+            respuesta = {"estado": "caido", "resultado": None, "error": f"worker caído: {e}"}
+        finally:
+            self._libres.put(worker)
+        respuesta["segundos"] = round(time.perf_counter() - inicio, 2)
+        return respuesta
+
+    def cerrar(self):
+        """Pide a los workers que salgan y mata a los que no lo hagan."""
+        with self._lock:
+            todos, self._todos = list(self._todos), []
+        for worker in todos:
+            try:
+                worker.conexion.send(None)
+            except (OSError, ValueError):
+                pass
+            worker.proceso.join(ESPERA_CIERRE)
+            worker.matar()
@@ -2,14 +2,12 @@ import os
 import time
 import requests
 from dotenv import load_dotenv
-from agents.encoding_helper import fix_llm_encoding
+from agents import llm
 
 load_dotenv()
 
 NOTION_API_KEY     = os.environ.get("NOTION_TOKEN") or os.environ.get("NOTION_API_KEY")
 NOTION_DATABASE_ID = os.environ.get("NOTION_DATABASE_ID")
-GROQ_API_KEY       = os.environ.get("GROQ_API_KEY")
-GEMINI_API_KEY     = os.environ.get("GEMINI_API_KEY")
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID   = os.environ.get("TELEGRAM_CHAT_ID")
 NOTION_VERSION     = "2022-06-28"
@@ -54,48 +52,10 @@ def telegram(msg: str):
         pass
 
 
-def _groq(prompt: str, max_tokens: int = 400) -> str:
-    r = requests.post(
-        "https://api.groq.com/openai/v1/chat/completions",
-        headers={"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"},
-        json={"model": "llama-3.3-70b-versatile",
-              "messages": [{"role": "user", "content": prompt}],
-              "temperature": 0.6, "max_tokens": max_tokens},
-        timeout=60,
-    )
-    if r.status_code == 429:
-        raise RuntimeError("RATE_LIMIT")
-    r.raise_for_status()
-    return fix_llm_encoding(r.json()["choices"][0]["message"]["content"].strip())
-
-
-def _gemini(prompt: str, max_tokens: int = 400) -> str:
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GEMINI_API_KEY}"
-    r = requests.post(url,
-        json={"contents": [{"parts": [{"text": prompt}]}],
-              "generationConfig": {"maxOutputTokens": max_tokens, "temperature": 0.6}},
-        timeout=60,
-    )
-    r.raise_for_status()
-    return fix_llm_encoding(r.json()["candidates"][0]["content"]["parts"][0]["text"].strip())
-
-
 def ia(prompt: str, max_tokens: int = 400) -> str | None:
-    for i in range(3):
-        try:
-            return _groq(prompt, max_tokens)
-        except RuntimeError:
-            time.sleep(20 * (i + 1))
-        except Exception as e:
-            print(f"[Groq] {e}")
-            break
-    for i in range(3):
-        try:
-            return _gemini(prompt, max_tokens)
-        except Exception as e:
-            print(f"[Gemini] {e}")
-            time.sleep(30)
-    return None
+    res = llm.completar(prompt, temperature=0.6, max_tokens=max_tokens, timeout=60,
+                        agente="completar_campos")
+    return res.strip() if res else None
 
 
 def get_ideas_con_vacios() -> list:
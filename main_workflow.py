@@ -2,17 +2,11 @@ import os
 import json
 import time
 from datetime import datetime, timedelta
-from agents import generator_agent, researcher_agent
-
-# ============ TREND HUNTER INTEGRATION ============
-try:
-    from agents import trend_hunter_agent
-    TRENDS_ENABLED = True
-except ImportError:
-    TRENDS_ENABLED = False
+from agents import checkpoints, idea_store, pipeline, storage
+# generator_agent y trend_hunter_agent se importan en su etapa: si el cache
+# cancela el workflow (lo habitual en el cron de 15 min) no se pagan.
 
 # ============ CONFIGURACIÃ“N ============
-IDEAS_FILE = 'data/ideas.json'
 CACHE_FILE = 'data/cache.json'
 CACHE_HOURS = 24
 
@@ -44,14 +38,15 @@ def update_cache():
         'next_run': (datetime.now() + timedelta(hours=CACHE_HOURS)).isoformat()
     }
     
-    with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-        json.dump(cache, f, indent=2)
+    storage.escribir_json(CACHE_FILE, cache)
 
 # ============ TRENDS UPDATE ============
 def update_viral_trends():
     """Actualiza trends virales si cache expirÃ³ (>6h)"""
     
-    if not TRENDS_ENABLED:
+    try:
+        from agents import trend_hunter_agent
+    except ImportError:
         print("â„¹ï¸  Trend Hunter no disponible")
         return
     
@@ -71,35 +66,15 @@ def update_viral_trends():
         print("   Continuando con generaciÃ³n normal...")
 
 # ============ IDEAS MANAGEMENT ============
-def load_ideas():
-    """Carga ideas desde JSON"""
-    if os.path.exists(IDEAS_FILE):
-        try:
-            with open(IDEAS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {'ideas': [], 'last_update': datetime.now().isoformat()}
-    
-    return {'ideas': [], 'last_update': datetime.now().isoformat()}
-
 def save_idea(idea):
-    """Guarda nueva idea en JSON"""
-    data = load_ideas()
-    
+    """Añade la idea al registro (data/ideas.jsonl, un append)"""
     # AÃ±adir metadata
     idea['created_at'] = datetime.now().isoformat()
     idea['status'] = 'pendiente'
     
-    data['ideas'].append(idea)
-    data['last_update'] = datetime.now().isoformat()
-    data['total_ideas'] = len(data['ideas'])
-    
-    os.makedirs('data', exist_ok=True)
-    
-    with open(IDEAS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    idea_store.anadir(idea)
     
-    print(f"ðŸ’¾ Idea guardada en {IDEAS_FILE}")
+    print(f"ðŸ’¾ Idea guardada en {idea_store.IDEAS_PATH}")
 
 # ============ WORKFLOW PRINCIPAL ============
 def print_header():
@@ -110,234 +85,202 @@ def print_header():
     print(f"ðŸ“… Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("="*80)
 
-def main():
-    """Workflow principal"""
-    
-    print_header()
-    
-    # 1. Verificar cache
-    if is_cache_valid():
-        print("\nâ­ï¸  EjecuciÃ³n reciente detectada - workflow cancelado")
-        print("   (Para forzar ejecuciÃ³n, elimina data/cache.json)")
-        return
-    
-    print("\nâ–¶ï¸  Iniciando workflow completo...")
-    
-    # 2. ðŸ”¥ Actualizar trends virales (si estÃ¡ habilitado)
-    print("\n" + "-"*80)
-    print("PASO 1: ACTUALIZAR TENDENCIAS VIRALES")
-    print("-"*80)
-    
+# ============ ETAPAS DEL PIPELINE ============
+# Cada etapa recibe el contexto compartido; lo que devuelve queda en
+# contexto[nombre]. Tras "guardar", las cuatro ramas corren en paralelo.
+BASE_URL = "https://mipromptingeniering-alt.github.io/validationidea"
+
+def etapa_tendencias(ctx):
     update_viral_trends()
-    
-    # 3. Generar idea
-    print("\n" + "-"*80)
-    print("PASO 2: GENERAR IDEA DE PRODUCTO")
-    print("-"*80)
-    
-    idea = generator_agent.generate()
-    
+
+def etapa_generar(ctx):
+    from agents import generator_agent
+    idea = generator_agent.generar_idea(idea_store.todas())
     if not idea:
-        print("\nâŒ No se pudo generar idea - abortando workflow")
-        return
-    
+        raise RuntimeError("No se pudo generar idea")
     print(f"\nâœ… Idea generada: {idea['nombre']}")
-    
-    # Mostrar si es viral
     if idea.get('viral_score'):
         print(f"   ðŸ”¥ VIRAL - Score: {idea['viral_score']}/100")
         print(f"   {idea.get('urgency', 'N/A')} - Ventana: {idea.get('window', 'N/A')}")
-    
-    # 4. Investigar idea
-    print("\n" + "-"*80)
+    ctx['idea'] = idea
+    return idea['nombre']
 
-    # -------------------------------------------------------------------------
-    # PASO 3: CRITICAR IDEA
-    # -------------------------------------------------------------------------
-    print("\n" + "-"*80)
-    print("PASO 3: CRITICAR IDEA")
-    print("-"*80)
-    
-    from agents import critic_agent
-    
-    critique_result = critic_agent.critique(idea)
-    
+def etapa_analisis(ctx):
+    """Crítica + competencia + estimación + research en paralelo (analysis_stage)."""
+    from agents import analysis_stage, critic_agent, score_predictor, telemetria
+
+    idea = ctx['idea']
+    config = critic_agent.load_config()
+    if score_predictor.descartar(idea, config.get('umbral_critico', 55)):
+        telemetria.registrar_idea(idea.get('nombre', ''), aceptada=False, origen="workflow")
+        raise pipeline.Detener(f"Idea descartada por el predictor ({idea['score_predicho']} previsto)")
+    aprobada = analysis_stage.analizar(
+        idea,
+        aprobar=lambda i, critica: critic_agent.decide_publish(i, critica, config),
+    )
+
+    critique_result = idea.get('critique')
     if not critique_result:
         print("⚠️ Crítica falló - usando scores por defecto")
         critique_result = {
             'score_critico': idea.get('score_generador', 75),
             'puntos_fuertes': ['Pendiente de evaluar'],
             'puntos_debiles': ['Pendiente de evaluar'],
-            'resumen': 'Aprobada por defecto'
+            'resumen': 'Aprobada por defecto',
+            'por_defecto': True
         }
-    
-    score_critico = critique_result.get('score_critico', 75)
+        idea['critique'] = critique_result
+        idea['score_critico'] = critique_result['score_critico']
+
+    score_critico = idea['score_critico']
     print(f"📊 Score Crítico: {score_critico}/100")
     print(f"✅ Puntos fuertes: {', '.join(critique_result.get('puntos_fuertes', []))}")
     print(f"⚠️ Puntos débiles: {', '.join(critique_result.get('puntos_debiles', []))}")
-    
-    # Añadir crítica a la idea
-    idea['score_critico'] = score_critico
-    idea['critique'] = critique_result
-    
-    # Decidir si publicar
-    config = critic_agent.load_config()
-    should_publish = critic_agent.decide_publish(idea, critique_result, config)
-    
-    if not should_publish:
-        print(f"❌ Idea RECHAZADA - Score {score_critico} muy bajo")
+
+    score_predictor.aprender(idea)
+    telemetria.registrar_idea(idea.get('nombre', ''), aceptada=aprobada, origen="workflow")
+    if not aprobada:
         print("   No se guardará ni notificará")
-        return
-    
+        raise pipeline.Detener(f"Idea RECHAZADA - Score {score_critico} muy bajo")
+
     print(f"✅ Idea APROBADA para continuar")
+    if not idea.get('research'):
+        print("\nâš ï¸  InvestigaciÃ³n fallÃ³ - guardando idea sin research")
+    return score_critico
 
-    # -------------------------------------------------------------------------
-    # PASO 4: INVESTIGAR IDEA (antes PASO 3)
-    print("PASO 4: INVESTIGAR IDEA")
-    print("-"*80)
-    
-    research = researcher_agent.research(idea)
-    
-    if not research:
-        print("\nâš ï¸  InvestigaciÃ³n fallÃ³ - guardando idea sin research")
-    else:
-        print(f"\nâœ… InvestigaciÃ³n completada")
-        idea['research'] = research
-    
-    # 5. Guardar idea
-    print("\n" + "-"*80)
-    print("PASO 5: GUARDAR IDEA")
-    print("-"*80)
-    
-    save_idea(idea)
-    save_idea(idea)
-    
-    # ===================================================================
-    # AÑADIR URLs DE LANDING Y REPORT
-    # ===================================================================
+def etapa_guardar(ctx):
+    """URLs de landing y report + un append al registro de ideas."""
+    idea = ctx['idea']
     slug = idea.get('slug', 'unknown')
-    base_url = "https://mipromptingeniering-alt.github.io/validationidea"
-    idea['landing_url'] = f"{base_url}/landing-pages/{slug}/index.html"
-    idea['report_url'] = f"{base_url}/reports/{slug}.html"
-    
+    idea['landing_url'] = f"{BASE_URL}/landing-pages/{slug}/index.html"
+    idea['report_url'] = f"{BASE_URL}/reports/{slug}.html"
     print(f"📄 Landing: {idea['landing_url']}")
     print(f"📊 Report: {idea['report_url']}")
-    
-    # Actualizar idea en ideas.json con URLs
-    with open('data/ideas.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    # Actualizar la última idea con URLs
-# ===================================================================
-    # GENERAR LANDING PAGE Y REPORT HTML
-    # ===================================================================
-    print("\n" + "-"*80)
-    print("GENERANDO ARCHIVOS HTML")
-    print("-"*80 + "\n")
+    save_idea(idea)
+    return slug
 
-    try:
-        from agents import landing_generator, report_agent
+def etapa_landing(ctx):
+    from agents import landing_generator
+    landing_path = landing_generator.generate_landing(ctx['idea'])
+    if not landing_path:
+        raise RuntimeError("No se pudo generar landing page")
+    print(f"✅ Landing page generada: {landing_path}")
+    return landing_path
 
-        # Generar Landing Page
-        landing_path = landing_generator.generate_landing(idea)
-        if landing_path:
-            print(f"✅ Landing page generada: {landing_path}")
-        else:
-            print("⚠️ No se pudo generar landing page")
+def etapa_informe(ctx):
+    from agents import report_agent
+    report_path = report_agent.generate_report(ctx['idea'])
+    if not report_path:
+        raise RuntimeError("No se pudo generar report")
+    print(f"✅ Report generado: {report_path}")
+    return report_path
 
-        # Generar Report
-        report_path = report_agent.generate_report(idea)
-        if report_path:
-            print(f"✅ Report generado: {report_path}")
-        else:
-            print("⚠️ No se pudo generar report")
+def etapa_notion(ctx):
+    from agents import notion_sync_agent
+    return notion_sync_agent.sync_idea_to_notion(ctx['idea'])
 
-    except Exception as e:
-        print(f"⚠️ Error generando HTML: {e}")
-    for i, stored_idea in enumerate(data['ideas']):
-        if stored_idea.get('slug') == slug:
-            data['ideas'][i]['landing_url'] = idea['landing_url']
-            data['ideas'][i]['report_url'] = idea['report_url']
-            break
+def etapa_telegram(ctx):
+    from agents import telegram_notifier
+    idea = ctx['idea']
+    critique = {
+        'score_critico': idea.get('viral_score', idea.get('score_generador', 85))
+    }
+    success = telegram_notifier.send_telegram_notification(
+        idea=idea,
+        critique=critique,
+        landing_url=f"landing-pages/{idea.get('id', idea.get('slug', ''))}.html",
+        report_url=f"reports/{idea.get('id', idea.get('slug', ''))}.html"
+    )
+    if not success:
+        raise RuntimeError("No se pudo enviar notificación")
+    print("✅ Notificación enviada a Telegram")
+    return True
+
+def _checkpoint(ctx, completadas):
+    """Tras cada etapa: guarda contexto y etapas hechas (agents/checkpoints.py)."""
+    if ctx.get('idea'):
+        checkpoints.guardar(checkpoints.huella(ctx['idea']), "workflow", completadas, ctx)
+
+def construir_grafo():
+    """tendencias → generar → análisis → guardar → {landing, informe, notion, telegram}"""
+    return [
+        pipeline.etapa("tendencias", etapa_tendencias, opcional=True),
+        pipeline.etapa("generar",    etapa_generar,  depende=["tendencias"]),
+        pipeline.etapa("analisis",   etapa_analisis, depende=["generar"]),
+        pipeline.etapa("guardar",    etapa_guardar,  depende=["analisis"]),
+        pipeline.etapa("landing",    etapa_landing,  depende=["guardar"]),
+        pipeline.etapa("informe",    etapa_informe,  depende=["guardar"]),
+        pipeline.etapa("notion",     etapa_notion,   depende=["guardar"]),
+        pipeline.etapa("telegram",   etapa_telegram, depende=["guardar"]),
+    ]
+
+def main():
+    """Workflow principal"""
     
-    with open('data/ideas.json', 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    print_header()
     
+    # 0. Idea de una ejecución anterior que murió a medias
+    pendientes = checkpoints.reclamar("workflow", limite=1)
+    trabajo = pendientes[0] if pendientes else None
+
+    # 1. Verificar cache
+    if trabajo:
+        print(f"\n↩️ Reanudando idea pendiente: {trabajo['datos']['idea'].get('nombre', '?')}"
+              f" (hechas: {', '.join(trabajo['etapas'])})")
+    elif is_cache_valid():
+        print("\nâ­ï¸  EjecuciÃ³n reciente detectada - workflow cancelado")
+        print("   (Para forzar ejecuciÃ³n, elimina data/cache.json)")
+        return
     
-        print(f"⚠️ Error generando HTML: {e}")
+    print("\nâ–¶ï¸  Iniciando workflow completo...")
+    
+    grafo = construir_grafo()
+    resultado = pipeline.ejecutar(
+        grafo,
+        contexto=trabajo['datos'] if trabajo else None,
+        hechas=trabajo['etapas'] if trabajo else (),
+        al_completar=_checkpoint,
+    )
+    etapas = resultado['etapas']
+    idea = resultado['contexto'].get('idea')
+    if idea:
+        # Rechazada o todo hecho: no se reanuda. Si algo falló queda pendiente.
+        if resultado['detenido']:
+            checkpoints.cerrar(checkpoints.huella(idea), checkpoints.DESCARTADO)
+        elif all(etapas[e['nombre']]['estado'] == pipeline.OK or e['opcional'] for e in grafo):
+            checkpoints.cerrar(checkpoints.huella(idea))
     
-    # 5. Notificar Telegram
-
-    # 5. Notificar Telegram
-
-    # 5. Notificar Telegram
     print("\n" + "-"*80)
-    print("PASO 6: NOTIFICAR TELEGRAM")
+    print(f"⏱️ TIEMPOS POR ETAPA (total {resultado['segundos']:.1f}s)")
     print("-"*80)
+    for nombre, e in etapas.items():
+        print(f"   {nombre:<11} {e['estado']:<9} {e['segundos']:>6.1f}s {e['error']}")
     
-    try:
-        from agents import telegram_notifier
-        
-        # Preparar critique
-        critique = {
-            'score_critico': idea.get('viral_score', idea.get('score_generador', 85))
-        }
-        
-        # URLs
-        landing_url = f"landing-pages/{idea['id']}.html"
-        report_url = f"reports/{idea['id']}.html"
-        
-        # Llamar función correcta
-        success = telegram_notifier.send_telegram_notification(
-            idea=idea,
-            critique=critique,
-            landing_url=landing_url,
-            report_url=report_url
-        )
-        
-        if success:
-            print("✅ Notificación enviada a Telegram")
-        else:
-            print("⚠️ No se pudo enviar notificación")
-    
-    except Exception as e:
-        print(f"⚠️ Error Telegram: {e}")
+    if resultado['detenido'] or etapas['guardar']['estado'] != pipeline.OK:
+        print("\n❌ Workflow terminado sin guardar idea")
+        return
     
-    # 6. Actualizar cache
+    # Actualizar cache
     update_cache()
     
-# ===================================================================
-    # PASO 7: SINCRONIZAR A NOTION
-    # ===================================================================
-    print("\n" + "="*80)
-    print("PASO 7: SINCRONIZAR A NOTION")
-    print("="*80 + "\n")
-    
-    try:
-        from agents import notion_sync_agent
-        notion_sync_agent.sync_idea_to_notion(idea)
-    except Exception as e:
-        print(f"⚠️ Error en Notion sync: {str(e)}")
-        print("   Continuando sin sync...")
-
-    # 7. Resumen final
+    # Resumen final
     print("\n" + "="*80)
     print("âœ… WORKFLOW COMPLETADO CON Ã‰XITO")
     print("="*80)
     print(f"\nðŸ“¦ Producto: {idea['nombre']}")
-    print(f"ðŸ’° Precio: â‚¬{idea['precio_sugerido']}")
-    print(f"â±ï¸  Tiempo: {idea['tiempo_estimado']}")
-    print(f"ðŸ’µ Revenue 6m: {idea['revenue_6_meses']}")
+    print(f"ðŸ’° Precio: â‚¬{idea.get('precio_sugerido', 'N/A')}")
+    print(f"â±ï¸  Tiempo: {idea.get('tiempo_estimado', 'N/A')}")
+    print(f"ðŸ’µ Revenue 6m: {idea.get('revenue_6_meses', 'N/A')}")
     
     if idea.get('viral_score'):
         print(f"\nðŸ”¥ OPORTUNIDAD VIRAL:")
         print(f"   Score: {idea['viral_score']}/100")
-        print(f"   Urgencia: {idea['urgency']}")
-        print(f"   Ventana: {idea['window']}")
+        print(f"   Urgencia: {idea.get('urgency', 'N/A')}")
+        print(f"   Ventana: {idea.get('window', 'N/A')}")
         print(f"   Fuente: {idea.get('source_type', 'N/A')}")
     
-    print(f"\nðŸ“ Guardado en: {IDEAS_FILE}")
-    print(f"ðŸ“Š Total ideas en sistema: {len(load_ideas()['ideas'])}")
+    print(f"\nðŸ“ Guardado en: {idea_store.IDEAS_PATH}")
+    print(f"ðŸ“Š Total ideas en sistema: {idea_store.contar()}")
     print("\n" + "="*80)
 
 if __name__ == "__main__":
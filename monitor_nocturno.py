@@ -5,13 +5,14 @@ import time
 import logging
 import subprocess
 import threading
-import csv
 import requests
-from datetime import datetime, timedelta, timezone
+from datetime import datetime
 from logging.handlers import TimedRotatingFileHandler
 
 import pytz
 
+from agents import endpoints, scheduler
+
 os.environ["PYTHONUTF8"] = "1"
 ZONA = pytz.timezone("Europe/Madrid")
 
@@ -42,7 +43,7 @@ TELEGRAM_TOKEN   = ""
 TELEGRAM_CHAT_ID = ""
 
 def _base():
-    return f"https://api.telegram.org/bot{TELEGRAM_TOKEN}"
+    return f"{endpoints.base('telegram')}/bot{TELEGRAM_TOKEN}"
 
 def enviar_telegram(mensaje):
     if not TELEGRAM_TOKEN or not TELEGRAM_CHAT_ID:
@@ -88,13 +89,15 @@ def handle_start(chat_id):
 
 def handle_status(chat_id):
     try:
-        from agents.knowledge_base import get_stats, contar_pendientes
-        stats  = get_stats()
+        from agents.knowledge_base import snapshot
+        from agents.cola_csv import contar_pendientes
+        from agents.telemetria import resumen_status
+        stats  = snapshot()["stats"]
         cola_n = contar_pendientes()
         total_local = 0
         try:
-            with open("data/ideas.json", "r", encoding="utf-8") as f:
-                total_local = len(json.load(f))
+            from agents import idea_store
+            total_local = idea_store.contar()
         except:
             pass
         responder(chat_id,
@@ -108,15 +111,16 @@ def handle_status(chat_id):
             f"📊 Score promedio: <b>{stats.get('score_promedio', 0)}/100</b>\n"
             f"🏆 Mejor score: <b>{stats.get('mejor_score', 0)}/100</b>\n"
             f"🎯 Tasa de éxito: <b>{stats.get('tasa_exito', 'N/A')}</b>\n"
-            f"⏳ Cola pendiente: <b>{cola_n}</b>"
+            f"⏳ Cola pendiente: <b>{cola_n}</b>\n\n"
+            f"{resumen_status()}"
         )
     except Exception as e:
         responder(chat_id, f"❌ Error: {e}")
 
 def handle_top(chat_id):
     try:
-        from agents.knowledge_base import get_top_ideas
-        top = get_top_ideas(5)
+        from agents.knowledge_base import snapshot
+        top = snapshot()["por_score"][:5]
         if not top:
             responder(chat_id, "📭 Aún no hay ideas en el TOP.")
             return
@@ -135,8 +139,8 @@ def handle_top(chat_id):
 
 def handle_stats(chat_id):
     try:
-        from agents.knowledge_base import get_stats
-        stats = get_stats()
+        from agents.knowledge_base import snapshot
+        stats = snapshot()["stats"]
         responder(chat_id,
             f"📈 <b>Estadísticas KB</b>\n\n"
             f"💡 Ideas analizadas: <b>{stats.get('total_ideas', 0)}</b>\n"
@@ -157,42 +161,30 @@ def handle_idea(chat_id):
         "(DAFO + estudio económico + prompt MVP incluidos)"
     )
     try:
-        resultado = subprocess.run(
-            [sys.executable, "run_batch.py"],
-            capture_output=True, timeout=150
-        )
-        salida = resultado.stdout.decode("utf-8", errors="replace")
-        nombre = score = url = ""
-        for linea in salida.split("\n"):
-            l = linea.strip().replace("│", "").strip()
-            if "✅ Sincronizada:" in l:
-                nombre = l.split("✅ Sincronizada:")[-1].strip()
-            if "📊 Score:" in l:
-                score = l.split("📊 Score:")[-1].strip().split("|")[0].strip()
-            if "notion.so" in l and "http" in l:
-                url = l
-        if nombre:
+        r = ejecutar_batch_en_pool(timeout=150)
+        if r["estado"] == "timeout":
+            responder(chat_id, "⏰ La generación tardó demasiado — reintenta en unos minutos.")
+            return
+        if r["estado"] != "ok":
+            responder(chat_id, f"❌ Error: {r['error']}")
+            return
+        publicadas = r["resultado"]["publicadas"]
+        if not publicadas:
+            responder(chat_id, f"⚠️ Sin idea publicada: {r['resultado']['error'] or 'revisa el log'}")
+        for p in publicadas:
             responder(chat_id,
                 f"✅ <b>¡Idea generada!</b>\n\n"
-                f"🚀 <b>{nombre}</b>\n"
-                f"📊 Score: <b>{score}</b>\n"
-                f"📋 Informe completo en Notion:\n{url}"
+                f"🚀 <b>{p['nombre']}</b>\n"
+                f"📊 Score: <b>{p['score']}/100</b>\n"
+                f"📋 Informe completo en Notion:\n{p['url'] or 'pendiente de sincronizar'}"
             )
-        else:
-            responder(chat_id, "⚠️ Generada — revisa Notion en 1 minuto.")
-    except subprocess.TimeoutExpired:
-        responder(chat_id, "⏰ Generando en background — revisa Notion en 2 min.")
     except Exception as e:
         responder(chat_id, f"❌ Error: {e}")
 
 def handle_cola(chat_id):
     try:
-        ruta = "data/cola_pendientes.csv"
-        if not os.path.exists(ruta):
-            responder(chat_id, "✅ Cola vacía — todo sincronizado.")
-            return
-        with open(ruta, newline="", encoding="utf-8") as f:
-            pendientes = list(csv.DictReader(f))
+        from agents.cola_csv import leer_cola
+        pendientes = leer_cola()
         if not pendientes:
             responder(chat_id, "✅ Cola vacía — todo sincronizado.")
             return
@@ -205,20 +197,11 @@ def handle_cola(chat_id):
 
 def handle_ranking(chat_id):
     try:
-        from agents.knowledge_base import _cargar
-        kb    = _cargar()
-        ideas = kb.get("ideas", [])
-        if not ideas:
+        from agents.knowledge_base import snapshot
+        top = snapshot()["por_ejecutable"][:5]
+        if not top:
             responder(chat_id, "📭 Aún no hay ideas. Usa /idea para generar.")
             return
-        def score_ejecutable(idea):
-            s = idea.get("scores", {})
-            return (
-                s.get("ejecutabilidad", 0) * 0.40 +
-                s.get("generador",      0) * 0.35 +
-                s.get("timing",         0) * 0.25
-            )
-        top = sorted(ideas, key=score_ejecutable, reverse=True)[:5]
         texto = "🚀 <b>TOP 5 IDEAS MÁS EJECUTABLES AHORA</b>\n\n"
         for i, idea in enumerate(top, 1):
             s = idea.get("scores", {})
@@ -236,32 +219,22 @@ def handle_ranking(chat_id):
 
 def handle_ejecutar(chat_id):
     try:
-        from agents.knowledge_base import _cargar
-        kb    = _cargar()
-        ideas = kb.get("ideas", [])
+        from agents.knowledge_base import snapshot
+        ideas = snapshot()["por_ejecutable"]
         if not ideas:
             responder(chat_id, "📭 Sin ideas. Usa /idea primero.")
             return
-        def score_ejecutable(idea):
-            s = idea.get("scores", {})
-            return (
-                s.get("ejecutabilidad", 0) * 0.40 +
-                s.get("generador",      0) * 0.35 +
-                s.get("timing",         0) * 0.25
-            )
-        top1       = sorted(ideas, key=score_ejecutable, reverse=True)[0]
+        top1       = ideas[0]
         nombre_top = top1.get("nombre", "")
         prompt_texto = ""
         ia_rec = "Claude 3.5 Sonnet en Cursor IDE"
         try:
-            with open("data/ideas.json", "r", encoding="utf-8") as f:
-                todas = json.load(f)
-            for idea in reversed(todas):
-                if idea.get("nombre") == nombre_top:
-                    pm = idea.get("prompt_mvp", {})
-                    prompt_texto = pm.get("prompt_completo", "")
-                    ia_rec = pm.get("ia_recomendada", ia_rec)
-                    break
+            from agents import idea_store
+            idea = idea_store.buscar(nombre=nombre_top)
+            if idea:
+                pm = idea.get("prompt_mvp", {})
+                prompt_texto = pm.get("prompt_completo", "")
+                ia_rec = pm.get("ia_recomendada", ia_rec)
         except:
             pass
         if not prompt_texto:
@@ -376,6 +349,30 @@ def iniciar_bot():
 # ════════════════════════════════════════════════════════
 #  FUNCIONES DEL MONITOR
 # ════════════════════════════════════════════════════════
+# Workers calientes para run_batch: el lote programado y un /idea a la vez
+POOL_TAMANO = 2
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from agents.worker_pool import PoolWorkers
+            _pool = PoolWorkers(tamano=POOL_TAMANO)
+    return _pool
+
+def ejecutar_batch_en_pool(timeout):
+    """run_batch.ejecutar_batch() en un worker del pool; devuelve la respuesta del pool."""
+    log("▶️  run_batch.ejecutar_batch (worker)...")
+    r = _get_pool().ejecutar("run_batch", "ejecutar_batch", timeout=timeout)
+    if r["estado"] == "ok":
+        publicadas = ", ".join(p["nombre"] for p in r["resultado"]["publicadas"]) or "ninguna"
+        log(f"  │ {r['segundos']}s — publicadas: {publicadas}")
+    else:
+        log(f"❌ run_batch {r['estado']} ({r['segundos']}s): {r['error']}")
+    return r
+
 def ejecutar_script(nombre):
     log(f"▶️  {nombre}...")
     try:
@@ -403,13 +400,8 @@ def ejecutar_script(nombre):
 
 def hc_groq():
     try:
-        import groq
-        client = groq.Groq(api_key=os.environ.get("GROQ_API_KEY"), timeout=10)
-        client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": "ok"}],
-            max_tokens=3, temperature=0
-        )
+        from agents import llm
+        llm.ping(timeout=10)
         return True, "OK"
     except Exception as e:
         return False, str(e)[:200]
@@ -419,7 +411,7 @@ def hc_notion():
         token = os.environ.get("NOTION_TOKEN", "")
         db_id = os.environ.get("NOTION_DATABASE_ID", "308313aca133800981cfc48f32c52146")
         resp  = requests.get(
-            f"https://api.notion.com/v1/databases/{db_id}",
+            f"{endpoints.base('notion')}/v1/databases/{db_id}",
             headers={"Authorization": f"Bearer {token}", "Notion-Version": "2022-06-28"},
             timeout=10
         )
@@ -440,16 +432,15 @@ def ejecutar_health_check():
 
 def procesar_cola_csv():
     try:
-        ruta = "data/cola_pendientes.csv"
-        if not os.path.exists(ruta):
+        from agents import cola_csv
+        if not os.path.exists(cola_csv.COLA_PATH):
             return
         from agents.notion_sync_agent import sync_idea_to_notion
-        with open(ruta, newline="", encoding="utf-8") as f:
-            pendientes = list(csv.DictReader(f))
+        pendientes = cola_csv.leer_cola()
         if not pendientes:
             return
         log(f"📋 Cola CSV: {len(pendientes)} pendiente(s)")
-        eliminados = []
+        eliminados, fallidos = [], []
         for fila in pendientes:
             nombre   = fila.get("nombre_idea", "?")
             intentos = int(fila.get("intentos", 1))
@@ -464,63 +455,66 @@ def procesar_cola_csv():
                     log(f"✅ Reintento exitoso: '{nombre}'")
                     eliminados.append(ts)
                 else:
-                    fila["intentos"] = str(intentos + 1)
+                    fallidos.append(ts)
             except Exception as e:
                 log(f"❌ Reintento fallido '{nombre}': {e}")
-                fila["intentos"] = str(intentos + 1)
-        restantes = [f for f in pendientes if f.get("timestamp") not in eliminados]
-        with open(ruta, "w", newline="", encoding="utf-8") as f:
-            if restantes:
-                writer = csv.DictWriter(f, fieldnames=restantes[0].keys())
-                writer.writeheader()
-                writer.writerows(restantes)
-            else:
-                f.write("")
+                fallidos.append(ts)
+        cola_csv.aplicar_resultados(eliminar=eliminados, reintentar=fallidos)
     except Exception as e:
         log(f"❌ Error cola CSV: {e}")
 
 def generar_nueva_idea():
     log("🧠 Generando nueva idea...")
-    exito, salida = ejecutar_script("run_batch.py")
-    if exito and "✅ Sincronizada:" in salida:
+    r = ejecutar_batch_en_pool(timeout=240)
+    if r["estado"] != "ok":
+        return False
+    for p in r["resultado"]["publicadas"]:
         try:
-            nombre = score = url = ""
-            for linea in salida.split("\n"):
-                l = linea.strip().replace("│", "").strip()
-                if "✅ Sincronizada:" in l:
-                    nombre = l.split("✅ Sincronizada:")[-1].strip()
-                if "📊 Score:" in l:
-                    score = l.split("📊 Score:")[-1].strip().split("|")[0].strip()
-                if "notion.so" in l and "http" in l:
-                    url = l
-            try:
-                score_num = float(str(score).split("/")[0].strip())
-            except:
-                score_num = 0
-            if score_num >= 75:
+            if p["score"] >= 75:
                 enviar_telegram(
-                    f"⭐ <b>IDEA DESTACADA — score {score}</b>\n\n"
-                    f"🚀 <b>{nombre}</b>\n"
-                    f"🔗 {url}\n\n"
+                    f"⭐ <b>IDEA DESTACADA — score {p['score']}/100</b>\n\n"
+                    f"🚀 <b>{p['nombre']}</b>\n"
+                    f"🔗 {p['url']}\n\n"
                     f"Usa /ejecutar para el prompt MVP."
                 )
             else:
                 enviar_telegram(
                     f"💡 <b>Nueva idea generada</b>\n\n"
-                    f"🚀 <b>{nombre}</b>\n"
-                    f"📊 Score: <b>{score}</b>\n"
-                    f"🔗 {url}"
+                    f"🚀 <b>{p['nombre']}</b>\n"
+                    f"📊 Score: <b>{p['score']}/100</b>\n"
+                    f"🔗 {p['url']}"
                 )
         except Exception as e:
             log(f"⚠️ Error notificando idea: {e}")
-    return exito
+    return r["resultado"]["ok"]
+
+# "informes" y "mantenimiento" lanzan el mismo script: nunca dos a la vez
+_run_monitor_lock = threading.Lock()
+
+def ejecutar_run_monitor():
+    with _run_monitor_lock:
+        ejecutar_script("run_monitor.py")
+
+def procesar_informes():
+    ejecutar_run_monitor()
+    procesar_cola_csv()
+
+def actualizar_tendencias_auto():
+    try:
+        from agents.trend_scout import actualizar_tendencias
+        actualizar_tendencias()
+        log("🌐 Tendencias actualizadas automáticamente")
+    except Exception as e:
+        log(f"⚠️ Error tendencias: {e}")
 
 def enviar_resumen_diario():
     log("☀️ Resumen diario (08:00)...")
     try:
-        from agents.knowledge_base import get_stats, get_top_ideas, contar_pendientes
-        stats  = get_stats()
-        top3   = get_top_ideas(3)
+        from agents.knowledge_base import snapshot
+        from agents.cola_csv import contar_pendientes
+        kb     = snapshot()
+        stats  = kb["stats"]
+        top3   = kb["por_score"][:3]
         top_txt = ""
         for i, idea in enumerate(top3, 1):
             top_txt += f"\n{i}. <b>{idea.get('nombre','?')}</b> → {idea.get('score_total',0)}pts"
@@ -566,55 +560,19 @@ def main():
     bot_thread.start()
     log("🤖 Bot arrancado en hilo paralelo")
 
-    ahora_utc        = datetime.now(timezone.utc)
-    ultimo_batch     = ahora_utc - timedelta(minutes=31)
-    ultimo_informe   = ahora_utc - timedelta(minutes=6)
-    ultimo_health    = ahora_utc - timedelta(hours=1, minutes=1)
-    ultima_tendencia = ahora_utc - timedelta(hours=3)
-    dia_resumen      = -1
-    dia_mant         = -1
-
-    while True:
-        try:
-            ahora_utc   = datetime.now(timezone.utc)
-            ahora_local = datetime.now(ZONA)
-            hora = ahora_local.hour
-            dia  = ahora_local.day
-
-            if (ahora_utc - ultimo_batch).total_seconds() >= 30 * 60:
-                generar_nueva_idea()
-                ultimo_batch = ahora_utc
-
-            if (ahora_utc - ultimo_informe).total_seconds() >= 5 * 60:
-                ejecutar_script("run_monitor.py")
-                procesar_cola_csv()
-                ultimo_informe = ahora_utc
-
-            if (ahora_utc - ultimo_health).total_seconds() >= 60 * 60:
-                ejecutar_health_check()
-                ultimo_health = ahora_utc
-
-            if (ahora_utc - ultima_tendencia).total_seconds() >= 3 * 60 * 60:
-                try:
-                    from agents.trend_scout import actualizar_tendencias
-                    actualizar_tendencias()
-                    log("🌐 Tendencias actualizadas automáticamente")
-                except Exception as e:
-                    log(f"⚠️ Error tendencias: {e}")
-                ultima_tendencia = ahora_utc
-
-            if hora == 8 and dia != dia_resumen:
-                enviar_resumen_diario()
-                dia_resumen = dia
-
-            if hora == 3 and dia != dia_mant:
-                ejecutar_script("run_monitor.py")
-                dia_mant = dia
-
-        except Exception as e:
-            log(f"❌ Error en loop principal: {e}")
-
-        time.sleep(60)
+    # Cada tarea corre en su hilo: un lote lento ya no retrasa health, cola ni resumen
+    plan = scheduler.Planificador(log=log)
+    plan.cada("batch",      30 * 60,     generar_nueva_idea)
+    plan.cada("informes",   5 * 60,      procesar_informes)
+    plan.cada("health",     60 * 60,     ejecutar_health_check)
+    plan.cada("tendencias", 3 * 60 * 60, actualizar_tendencias_auto)
+    plan.diaria("resumen",  8, enviar_resumen_diario, zona=ZONA)
+    plan.diaria("mantenimiento", 3, ejecutar_run_monitor, zona=ZONA)
+    try:
+        plan.ejecutar()
+    except KeyboardInterrupt:
+        plan.detener()
+        log("👋 Monitor detenido")
 
 if __name__ == "__main__":
     main()
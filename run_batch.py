@@ -1,31 +1,19 @@
-﻿import os, sys, json, time
+﻿import os, sys
 from datetime import datetime
 
 os.environ["PYTHONUTF8"] = "1"
 print("=" * 50)
 print(f"🚀 run_batch iniciado: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
-GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "")
-
 PROMPT_SISTEMA = """Eres un analista de startups de clase mundial con 20 años de experiencia.
 Tu misión: generar ideas de startup con potencial REAL de monetización rápida.
 Basas tus análisis en datos reales del mercado, no en suposiciones optimistas.
 Respondes SIEMPRE con JSON válido y nada más."""
 
-def get_prompt_idea(contexto: dict, tendencias: list) -> str:
-    tendencias_str = "\n".join(f"- {t}" for t in tendencias[:6]) if tendencias else "- No disponibles"
-    return f"""
+# Plantillas fijas: instrucciones + esquema primero, contexto variable al final
+PLANTILLA_IDEA = """
 Genera UNA idea de startup original y con potencial real de monetización.
-
-CONTEXTO DE APRENDIZAJE DEL SISTEMA:
-- Ideas ya generadas (NO repetir): {contexto.get('ideas_previas', 'ninguna')}
-- Verticales con mejor rendimiento histórico: {contexto.get('mejores_verticales', 'N/A')}
-- Tags exitosos históricos: {contexto.get('tags_exitosos', 'N/A')}
-- Total ideas analizadas: {contexto.get('total_analizadas', 0)}
-- Tasa de éxito actual: {contexto.get('tasa_exito', 'N/A')}
-
-TENDENCIAS ACTUALES DEL MERCADO TECH:
-{tendencias_str}
+No repitas ninguna de las ideas ya generadas que aparecen en el contexto.
 
 Responde ÚNICAMENTE con este JSON (sin texto antes ni después, sin markdown):
 {{
@@ -116,8 +104,15 @@ Responde ÚNICAMENTE con este JSON (sin texto antes ni después, sin markdown):
   "tipo": "B2B",
   "tags": ["tag1", "tag2", "tag3"]
 }}
+
+CONTEXTO DE APRENDIZAJE DEL SISTEMA Y TENDENCIAS:
+{contexto}
 """
 
+def get_prompt_idea(contexto: str) -> str:
+    """`contexto` ya recortado por prompt_builder.contexto_kb("batch", ...)."""
+    return PLANTILLA_IDEA.format(contexto=contexto)
+
 def calcular_score_ponderado(scores: dict) -> float:
     """Scoring ponderado — prioriza dolor real y velocidad a revenue"""
     pesos = {
@@ -131,54 +126,217 @@ def calcular_score_ponderado(scores: dict) -> float:
     total = sum(scores.get(k, 0) * v for k, v in pesos.items())
     return round(total, 1)
 
-def llamar_groq(prompt: str, modelo: str = "llama-3.3-70b-versatile") -> str:
-    import groq
-    client = groq.Groq(api_key=GROQ_API_KEY, timeout=60)
-    for intento in range(3):
+def llamar_groq(prompt: str, modelo: str = "llama-3.3-70b-versatile",
+                al_fragmento=None, cache: bool = True) -> dict:
+    """Pide la idea en modo JSON; devuelve el dict ya validado contra IDEA_BATCH."""
+    from agents import esquemas, llm
+    idea = llm.completar_json(
+        prompt, sistema=PROMPT_SISTEMA, esquema=esquemas.IDEA_BATCH, modelo=modelo,
+        max_tokens=4000, temperature=0.8, timeout=60, agente="batch",
+        al_fragmento=al_fragmento, cache=cache,
+    )
+    if idea is None:
+        raise RuntimeError("LLM sin respuesta JSON válida tras los reintentos")
+    return idea
+
+PLANTILLA_LOTE = """
+Genera {n} ideas de startup originales, DISTINTAS entre sí y con potencial real de monetización.
+No repitas ninguna de las ideas ya generadas que aparecen en el contexto.
+
+Responde ÚNICAMENTE con este JSON (sin texto antes ni después, sin markdown), con {n} elementos en "ideas":
+{{
+  "ideas": [
+    {{
+      "nombre": "NombreProducto",
+      "tagline": "Propuesta de valor en menos de 10 palabras",
+      "problema": "Problema concreto y urgente, quién lo sufre",
+      "solucion": "Cómo lo resuelve mejor que las alternativas",
+      "cliente_objetivo": "Perfil exacto del cliente",
+      "propuesta_valor_unica": "Ventaja real y defendible",
+      "modelo_negocio": {{"tipo": "SaaS / Marketplace / ...", "pricing": "Precio concreto", "time_to_revenue": "X semanas"}},
+      "mvp": {{"features_minimas": ["Feature 1", "Feature 2", "Feature 3"], "tiempo_semanas": 6}},
+      "scores": {{"generador": 80, "ejecutabilidad": 85, "timing": 75}},
+      "vertical": "SaaS",
+      "tipo": "B2B",
+      "tags": ["tag1", "tag2", "tag3"]
+    }}
+  ]
+}}
+
+CONTEXTO DE APRENDIZAJE DEL SISTEMA Y TENDENCIAS:
+{contexto}
+"""
+
+def get_prompt_lote(contexto: str, n: int) -> str:
+    """Prompt de modo lote: N ideas compactas en una sola respuesta."""
+    return PLANTILLA_LOTE.format(n=n, contexto=contexto)
+
+def generar_lote(contexto: str, n: int, previas: list) -> list:
+    """Pide `n` ideas en una llamada y descarta en local las repetidas."""
+    from agents import esquemas, llm
+    from agents.generator_agent import es_repetida
+    datos = llm.completar_json(
+        get_prompt_lote(contexto, n), sistema=PROMPT_SISTEMA,
+        esquema=esquemas.IDEAS_LOTE, max_tokens=700 * n + 300, temperature=0.9,
+        timeout=90, agente="batch",
+    )
+    if not datos:
+        return []
+    unicas = []
+    for idea in datos["ideas"]:
+        nombre = idea.get("nombre", "").strip()
+        if es_repetida(nombre, previas + unicas):
+            print(f"⚠️ Repetida en el lote: {nombre} → descartada")
+            continue
+        unicas.append(idea)
+    print(f"🧠 Lote: {len(unicas)}/{len(datos['ideas'])} ideas únicas")
+    return unicas
+
+def seleccionar_top(ideas: list, top_k: int) -> list:
+    """
+    Critica el lote en una llamada, calcula el score ponderado y devuelve las
+    top_k aprobadas. Las que agents/score_predictor.py da por rechazadas con
+    margen no entran en la crítica (ni en su coste en tokens); las que la
+    crítica deja sin evaluar se descartan.
+    """
+    from agents import critic_agent, score_predictor
+    config   = critic_agent.load_config()
+    umbral   = config.get("umbral_critico", 55)
+    ideas    = [i for i in ideas if not score_predictor.descartar(i, umbral)]
+    criticas = critic_agent.critique_lote(ideas)
+    # Las rechazadas no llegan a la KB: el predictor aprende de ellas aquí
+    score_predictor.aprender([
+        {**idea, "score_critico": c["score_critico"]} for idea, c in zip(ideas, criticas)
+        if c and not critic_agent.decide_publish(idea, c, config)
+    ])
+    aprobadas = []
+    for idea, critica in zip(ideas, criticas):
+        if critica is None:
+            # sin evaluación no hay aprobación: no se publica nada sin criticar
+            print(f"⚠️ Sin crítica en el lote: {idea.get('nombre', '?')} → descartada")
+            continue
+        scores = idea.get("scores", {})
+        idea["critique"]      = critica
+        idea["score_critico"] = critica["score_critico"]
+        scores["critico"]      = critica["score_critico"]
+        scores["viral"]        = critica["viral_score"]
+        scores["monetizacion"] = critica["score_money"]
+        scores["score_total"] = calcular_score_ponderado(scores)
+        idea["scores"] = scores
+        if critic_agent.decide_publish(idea, critica, config):
+            aprobadas.append(idea)
+    aprobadas.sort(key=lambda i: i["scores"]["score_total"], reverse=True)
+    return aprobadas[:top_k]
+
+def _checkpoint(idea: dict, etapas: list, requiere_critica: bool = False):
+    """Guarda en agents/checkpoints.py lo ya pagado de esta idea."""
+    from agents import checkpoints
+    checkpoints.guardar(checkpoints.huella(idea), "batch", etapas,
+                        {"idea": idea, "requiere_critica": requiere_critica})
+
+def publicar(idea: dict, hechas=("generar",)) -> dict:
+    """
+    KB local, registro de ideas y Notion para una idea ya puntuada, con checkpoint
+    tras cada paso. `hechas` son las etapas completadas en un intento
+    anterior ("guardar" se salta si ya está). Devuelve
+    {"ok", "nombre", "score", "url"} (url vacía si Notion falló).
+    """
+    from agents import checkpoints, idea_store, telemetria
+    from agents.knowledge_base import registrar_idea
+    from agents.notion_sync_agent import sync_idea_to_notion
+
+    nombre = idea.get("nombre", "SinNombre")
+    print(f"💡 Idea: {nombre}")
+    scores = idea["scores"]
+    score  = scores["score_total"]
+    print(f"📊 Score: {score}/100 | C:{scores.get('critico',0)} V:{scores.get('viral',0)} G:{scores.get('generador',0)} M:{scores.get('monetizacion',0)} E:{scores.get('ejecutabilidad',0)} T:{scores.get('timing',0)}")
+
+    hechas = list(hechas)
+    if "guardar" in hechas:
+        print("↩️ KB y registro de ideas ya guardados en un intento anterior")
+    else:
+        # Guardar en KB local
+        registrar_idea(idea)
+        telemetria.registrar_idea(nombre, origen="batch")
+        print(f"💾 Guardada en KB")
+
+        # Guardar en el registro de ideas (append; deja idea["_id"] para el checkpoint)
         try:
-            resp = client.chat.completions.create(
-                model=modelo,
-                messages=[
-                    {"role": "system", "content": PROMPT_SISTEMA},
-                    {"role": "user",   "content": prompt},
-                ],
-                max_tokens=4000,
-                temperature=0.8,
-            )
-            return resp.choices[0].message.content.strip()
-        except Exception as e:
-            err = str(e).lower()
-            if "rate" in err or "429" in err:
-                espera = (intento + 1) * 5
-                print(f"⏳ Rate limit (intento {intento+1}) → {espera}s...")
-                time.sleep(espera)
-                if intento == 1:
-                    modelo = "llama-3.1-8b-instant"
-                    print(f"🔄 Cambiando a modelo ligero: {modelo}")
+            idea_store.anadir(idea)
+        except OSError as e:
+            print(f"⚠️ Error guardando en {idea_store.IDEAS_PATH}: {e}")
+        hechas.append("guardar")
+        _checkpoint(idea, hechas)
+
+    # Sincronizar Notion
+    print("🔗 Sincronizando Notion...")
+    resultado = {"ok": True, "nombre": nombre, "score": score, "url": ""}
+    try:
+        url = sync_idea_to_notion(idea)
+        if url:
+            print(f"✅ Sincronizado: {url}")
+            print(f"✅ Sincronizada: {nombre}")
+            resultado["url"] = url
+            idea_store.actualizar(idea, notion_url=url)
+            checkpoints.cerrar(checkpoints.huella(idea))
+        else:
+            print(f"⚠️ Notion falló — guardada localmente")
+    except Exception as e:
+        print(f"❌ Error Notion: {e}")
+        resultado["ok"] = False
+    return resultado
+
+def reanudar_pendientes(top_k: int = 2) -> list:
+    """
+    Termina las ideas que una ejecución anterior dejó a medias (checkpoints):
+    las de lote sin crítica se critican juntas; el resto sigue en publicar
+    desde su primera etapa pendiente. Devuelve los resultados de publicar.
+    """
+    from agents import checkpoints
+    trabajos = checkpoints.reclamar("batch")
+    if not trabajos:
+        return []
+    print(f"↩️ Reanudando {len(trabajos)} idea(s) de ejecuciones anteriores")
+    sin_critica = [t for t in trabajos
+                   if t["datos"].get("requiere_critica") and "criticar" not in t["etapas"]]
+    publicadas = [publicar(t["datos"]["idea"], t["etapas"]) for t in trabajos if t not in sin_critica]
+    if sin_critica:
+        aprobadas = seleccionar_top([t["datos"]["idea"] for t in sin_critica], top_k)
+        for t in sin_critica:
+            if any(a is t["datos"]["idea"] for a in aprobadas):
+                publicadas.append(publicar(t["datos"]["idea"], t["etapas"] + ["criticar"]))
             else:
-                raise
-    raise RuntimeError("Groq no disponible tras 3 intentos")
-
-def limpiar_json(texto: str) -> str:
-    texto = texto.strip()
-    if "```json" in texto:
-        texto = texto.split("```json").split("```").strip()[1]
-    elif "```" in texto:
-        texto = texto.split("```").split("```")[0].strip()
-    inicio = texto.find("{")
-    fin    = texto.rfind("}")
-    if inicio != -1 and fin != -1:
-        texto = texto[inicio:fin+1]
-    return texto
-
-def ejecutar_batch():
+                checkpoints.cerrar(t["huella"], checkpoints.DESCARTADO)
+    return publicadas
+
+
+def _resultado(publicadas: list, error: str = "") -> dict:
+    return {"ok": any(p["ok"] for p in publicadas), "publicadas": publicadas, "error": error}
+
+
+def ejecutar_batch(lote: int = 1, top_k: int = 2) -> dict:
+    """
+    Genera y publica ideas. Con lote=1 una idea completa por llamada; con
+    lote>1 pide `lote` ideas compactas en una llamada, las critica juntas en
+    otra y solo publica las `top_k` mejores que pasan el umbral.
+
+    Antes de generar nada termina lo que quedó a medias en ejecuciones
+    anteriores (reanudar_pendientes). Devuelve {"ok", "publicadas":
+    [resultado de publicar], "error"}; es lo que reciben los workers de
+    agents/worker_pool.py.
+    """
     try:
-        from agents.knowledge_base import get_contexto_para_prompt, registrar_idea
+        from agents import checkpoints, llm, prompt_builder, telemetria
+        from agents.json_stream import vigilar_campo
+        from agents.generator_agent import es_repetida
+        from agents.knowledge_base import get_nombres_previos
         from agents.trend_scout    import get_tendencias, actualizar_tendencias
-        from agents.notion_sync_agent import sync_idea_to_notion
     except ImportError as e:
         print(f"❌ Error de importación: {e}")
-        return False
+        return _resultado([], f"importación: {e}")
+
+    # 0. Ideas pagadas en ejecuciones anteriores que no llegaron a Notion
+    reanudadas = reanudar_pendientes(top_k)
 
     # 1. Actualizar tendencias (cada llamada)
     print("🌐 Obteniendo tendencias...")
@@ -188,71 +346,77 @@ def ejecutar_batch():
     except:
         tendencias = []
 
-    # 2. Contexto KB
+    # 2. Contexto KB + tendencias, recortado al presupuesto del agente
     print("📚 Cargando contexto KB...")
-    contexto = get_contexto_para_prompt()
+    contexto = prompt_builder.contexto_kb("batch", tendencias=tendencias)
+    previas = [{"nombre": n} for n in get_nombres_previos()]
+
+    # 3. Modo lote: N ideas + 1 crítica conjunta → top_k
+    if lote > 1:
+        print(f"🧠 Generando lote de {lote} ideas...")
+        ideas = generar_lote(contexto, lote, previas)
+        if not ideas:
+            print("❌ El lote no produjo ideas válidas")
+            return _resultado(reanudadas, "lote sin ideas válidas")
+        for idea in ideas:
+            _checkpoint(idea, ["generar"], requiere_critica=True)
+        seleccionadas = seleccionar_top(ideas, top_k)
+        for idea in ideas:
+            if idea in seleccionadas:
+                _checkpoint(idea, ["generar", "criticar"])
+            else:
+                checkpoints.cerrar(checkpoints.huella(idea), checkpoints.DESCARTADO)
+                telemetria.registrar_idea(idea.get("nombre", ""), aceptada=False, origen="batch")
+        print(f"🏆 Top {len(seleccionadas)}: {', '.join(i['nombre'] for i in seleccionadas) or 'ninguna'}")
+        return _resultado(reanudadas + [publicar(idea, ["generar", "criticar"]) for idea in seleccionadas],
+                          "" if seleccionadas else "ninguna idea supera el umbral")
 
     # 3. Generar idea
     print("🧠 Generando idea...")
-    prompt = get_prompt_idea(contexto, tendencias)
-    try:
-        respuesta = llamar_groq(prompt)
-    except Exception as e:
-        print(f"❌ Error Groq: {e}")
-        return False
+    prompt = get_prompt_idea(contexto)
 
-    # 4. Parsear JSON
-    try:
-        json_limpio = limpiar_json(respuesta)
-        idea = json.loads(json_limpio)
-    except Exception as e:
-        print(f"❌ JSON inválido: {e}")
-        print(f"Respuesta raw: {respuesta[:300]}")
-        return False
+    def nombre_nuevo(nombre):
+        if es_repetida(nombre, previas):
+            print(f"⚠️ Repetida: {nombre} → cortando stream y regenerando")
+            return False
+        return True
 
-    nombre = idea.get("nombre", "SinNombre")
-    print(f"💡 Idea: {nombre}")
+    idea = None
+    for intento in range(3):
+        try:
+            idea = llamar_groq(prompt, al_fragmento=vigilar_campo("nombre", nombre_nuevo),
+                               cache=intento == 0)
+        except llm.StreamAbortado:
+            continue
+        except Exception as e:
+            print(f"❌ Error Groq: {e}")
+            return _resultado(reanudadas, f"LLM: {e}")
+        # una respuesta de la caché no pasa por al_fragmento: se comprueba aquí
+        if es_repetida(idea.get("nombre", ""), previas):
+            print(f"⚠️ Repetida: {idea.get('nombre')} → regenerando sin caché")
+            idea = None
+            continue
+        break
+    if idea is None:
+        print("❌ Solo se generaron ideas repetidas")
+        return _resultado(reanudadas, "solo ideas repetidas")
 
-    # 5. Calcular score ponderado
+    # 4. Score ponderado con los scores que trae la propia idea
     scores = idea.get("scores", {})
     scores["score_total"] = calcular_score_ponderado(scores)
     idea["scores"] = scores
-    score = scores["score_total"]
-    print(f"📊 Score: {score}/100 | C:{scores.get('critico',0)} V:{scores.get('viral',0)} G:{scores.get('generador',0)} M:{scores.get('monetizacion',0)} E:{scores.get('ejecutabilidad',0)} T:{scores.get('timing',0)}")
-
-    # 6. Guardar en KB local
-    registrar_idea(idea)
-    print(f"💾 Guardada en KB")
-
-    # 7. Guardar JSON local
-    os.makedirs("data", exist_ok=True)
-    try:
-        ruta = "data/ideas.json"
-        ideas_local = []
-        if os.path.exists(ruta):
-            with open(ruta, "r", encoding="utf-8") as f:
-                ideas_local = json.load(f)
-        ideas_local.append(idea)
-        with open(ruta, "w", encoding="utf-8") as f:
-            json.dump(ideas_local, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        print(f"⚠️ Error guardando ideas.json: {e}")
-
-    # 8. Sincronizar Notion
-    print("🔗 Sincronizando Notion...")
-    try:
-        url = sync_idea_to_notion(idea)
-        if url:
-            print(f"✅ Sincronizado: {url}")
-            print(f"✅ Sincronizada: {nombre}")
-            return True
-        else:
-            print(f"⚠️ Notion falló — guardada localmente")
-            return True
-    except Exception as e:
-        print(f"❌ Error Notion: {e}")
-        return False
+    _checkpoint(idea, ["generar"])
+    return _resultado(reanudadas + [publicar(idea)])
 
 if __name__ == "__main__":
-    exito = ejecutar_batch()
-    sys.exit(0 if exito else 1)
+    import argparse
+    from agents.critic_agent import load_config
+    config = load_config()
+    parser = argparse.ArgumentParser(description="Genera y publica ideas")
+    parser.add_argument("--lote", type=int, nargs="?", const=config.get("ideas_por_lote", 5), default=1,
+                        help="Ideas por llamada LLM (sin valor: ideas_por_lote de la config)")
+    parser.add_argument("--top", type=int, default=config.get("top_k_lote", 2),
+                        help="Ideas del lote que se publican")
+    args = parser.parse_args()
+    resultado = ejecutar_batch(args.lote, args.top)
+    sys.exit(0 if resultado["ok"] else 1)
@@ -1,14 +1,22 @@
 # run_continuous.py - SCHEDULER AUTOMATICO CON LOOP INFINITO
 # Coloca este archivo en: C:/Users/juanj/Documents/validationidea/
-# Ejecutar con: python run_continuous.py
+# Ejecutar con: python run_continuous.py [--workers N]
+#
+# Con --workers N (>1) mantiene hasta N generaciones a la vez en workers
+# persistentes (agents/worker_pool.py), sin intervalo: el rate limiter
+# compartido marca el ritmo y la concurrencia sube o baja segun la tasa de
+# 429 (ControlAIMD). Pensado para aprovechar la cuota libre de la noche.
 
 import time
 import subprocess
 import sys
 import os
-import json
+import argparse
+import threading
 from datetime import datetime
 
+from agents import cuota_diaria, rate_limiter
+
 # ============================================================
 # CONFIGURACION — Ajusta estos valores segun necesites
 # ============================================================
@@ -16,6 +24,9 @@ INTERVAL_MINUTES = 30       # Tiempo entre ideas (minutos)
 DAILY_LIMIT = 20            # Maximo ideas por dia
 MAX_CONSECUTIVE_ERRORS = 5  # Errores antes de pausa larga
 LOG_FILE = "data/system.log"
+BATCH_TIMEOUT = 240         # Segundos maximos por generacion en modo --workers
+VENTANA_AIMD = 120          # Segundos entre ajustes de concurrencia
+UMBRAL_429 = 0.05           # Tasa de 429 por peticion a partir de la cual se reduce
 # ============================================================
 
 
@@ -30,14 +41,8 @@ def log(message):
 
 
 def count_today_ideas():
-    """Cuenta cuantas ideas se generaron hoy"""
-    try:
-        with open("data/ideas.json", "r", encoding="utf-8") as f:
-            ideas = json.load(f)
-        today = datetime.now().strftime("%Y-%m-%d")
-        return len([i for i in ideas if i.get("date", "").startswith(today)])
-    except Exception:
-        return 0
+    """Cuantas ideas lleva hoy el contador atomico (incluye las que estan en curso)"""
+    return cuota_diaria.usadas()
 
 
 def seconds_until_tomorrow():
@@ -78,7 +83,136 @@ def run_batch():
         return False
 
 
-def main():
+class ControlAIMD:
+    """
+    Limite de generaciones en vuelo. Cada VENTANA_AIMD segundos mira la tasa
+    de 429 de todos los procesos (rate_limiter.contadores): si pasa de
+    UMBRAL_429 lo parte a la mitad, si no lo sube en 1 hasta `maximo`.
+    Se usa como `with control:` alrededor de cada generacion.
+    """
+
+    def __init__(self, maximo, inicial=1):
+        self.maximo = maximo
+        self.limite = max(1, min(inicial, maximo))
+        self.en_vuelo = 0
+        self._cond = threading.Condition()
+        self._base = rate_limiter.contadores()
+        self._desde = time.time()
+
+    def __enter__(self):
+        with self._cond:
+            while self.en_vuelo >= self.limite:
+                self._cond.wait()
+            self.en_vuelo += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self.en_vuelo -= 1
+            self._cond.notify_all()
+
+    def ajustar(self, ahora=None):
+        """Aplica el ajuste si se cumplio la ventana; devuelve el limite vigente"""
+        ahora = time.time() if ahora is None else ahora
+        with self._cond:
+            if ahora - self._desde < VENTANA_AIMD:
+                return self.limite
+            actual = rate_limiter.contadores()
+            concedidas = actual["concedidas"] - self._base["concedidas"]
+            limitados = actual["limitados"] - self._base["limitados"]
+            self._base, self._desde = actual, ahora
+            if not concedidas and not limitados:
+                return self.limite
+            tasa = limitados / max(concedidas, 1)
+            anterior = self.limite
+            if tasa > UMBRAL_429:
+                self.limite = max(1, self.limite // 2)
+            else:
+                self.limite = min(self.maximo, self.limite + 1)
+            if self.limite != anterior:
+                log(f"🎚️  Concurrencia {anterior} → {self.limite} (429: {tasa:.0%} de {concedidas} peticiones)")
+                self._cond.notify_all()
+            return self.limite
+
+
+def _worker(numero, pool, control, parar):
+    """Bucle de un hilo del modo --workers: reserva cupo, genera en el pool, repite"""
+    consecutive_errors = 0
+    while not parar.is_set():
+        with control:
+            dia = cuota_diaria.reservar(DAILY_LIMIT)
+            if dia is not None:
+                log(f"🎯 [W{numero}] Generando... ({cuota_diaria.usadas(dia)}/{DAILY_LIMIT} hoy, "
+                    f"{control.en_vuelo}/{control.limite} en vuelo)")
+                r = pool.ejecutar("run_batch", "ejecutar_batch", timeout=BATCH_TIMEOUT)
+        if dia is None:
+            wait_secs = seconds_until_tomorrow() + 60
+            log(f"📊 [W{numero}] Limite diario alcanzado ({DAILY_LIMIT}). Esperando {wait_secs / 3600:.1f}h...")
+            parar.wait(wait_secs)
+            continue
+        control.ajustar()
+
+        publicadas = (r["resultado"] or {}).get("publicadas", []) if r["estado"] == "ok" else []
+        publicadas = [p for p in publicadas if p.get("ok")]
+        if publicadas:
+            consecutive_errors = 0
+            for p in publicadas:
+                log(f"✅ [W{numero}] {p.get('nombre', '?')} ({p.get('score', '?')}/100) en {r['segundos']:.0f}s")
+            # La reserva cubre una idea; las reanudadas que publicó de más también cuentan
+            for _ in publicadas[1:]:
+                if cuota_diaria.reservar(DAILY_LIMIT) is None:
+                    log(f"📊 [W{numero}] Las ideas reanudadas completaron el limite diario ({DAILY_LIMIT})")
+                    break
+            continue
+
+        cuota_diaria.liberar(dia)
+        consecutive_errors += 1
+        error = r["error"] or (r["resultado"] or {}).get("error", "")
+        log(f"❌ [W{numero}] Sin idea ({r['estado']}): {error} — error #{consecutive_errors}")
+        if consecutive_errors >= MAX_CONSECUTIVE_ERRORS:
+            log(f"🚨 [W{numero}] {MAX_CONSECUTIVE_ERRORS} errores consecutivos. Pausa de 1 hora...")
+            consecutive_errors = 0
+            parar.wait(3600)
+        else:
+            parar.wait(min(5 * consecutive_errors, 30) * 60)
+
+
+def main_concurrente(workers):
+    """Modo --workers N: hasta N generaciones a la vez, concurrencia AIMD"""
+    from agents.worker_pool import PoolWorkers
+
+    log("=" * 55)
+    log(f"🚀 SISTEMA CONTINUO — {workers} workers (concurrencia adaptativa)")
+    log(f"📊 Limite diario: {DAILY_LIMIT} ideas ({count_today_ideas()} hoy)")
+    log("   Presiona Ctrl+C para detener")
+    log("=" * 55)
+
+    pool = PoolWorkers(tamano=workers)
+    control = ControlAIMD(workers)
+    parar = threading.Event()
+    hilos = [threading.Thread(target=_worker, args=(n + 1, pool, control, parar), daemon=True)
+             for n in range(workers)]
+    for hilo in hilos:
+        hilo.start()
+    try:
+        while any(h.is_alive() for h in hilos):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        log("\n👋 Sistema detenido por el usuario")
+    finally:
+        parar.set()
+        pool.cerrar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generacion continua de ideas")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="generaciones simultaneas (>1 activa el modo concurrente)")
+    args = parser.parse_args(argv)
+    if args.workers > 1:
+        main_concurrente(args.workers)
+        return
+
     log("=" * 55)
     log("🚀 SISTEMA CONTINUO DE GENERACION DE IDEAS v2.0")
     log(f"⏱️  Intervalo: {INTERVAL_MINUTES} minutos entre ideas")
@@ -91,19 +225,21 @@ def main():
 
     while True:
         try:
-            # Verificar limite diario
-            today_count = count_today_ideas()
+            # Verificar limite diario (reserva atomica de una plaza)
+            dia = cuota_diaria.reservar(DAILY_LIMIT)
 
-            if today_count >= DAILY_LIMIT:
+            if dia is None:
                 wait_secs = seconds_until_tomorrow() + 60
-                log(f"📊 Limite diario: {today_count}/{DAILY_LIMIT} ideas.")
-                log(f"   Esperando {wait_secs // 3600:.1f}h hasta manana...")
+                log(f"📊 Limite diario: {count_today_ideas()}/{DAILY_LIMIT} ideas.")
+                log(f"   Esperando {wait_secs / 3600:.1f}h hasta manana...")
                 time.sleep(wait_secs)
                 continue
 
-            log(f"🎯 Iniciando generacion... (idea #{today_count + 1} de hoy, max {DAILY_LIMIT})")
+            log(f"🎯 Iniciando generacion... (idea #{cuota_diaria.usadas(dia)} de hoy, max {DAILY_LIMIT})")
 
             success = run_batch()
+            if not success:
+                cuota_diaria.liberar(dia)
 
             if success:
                 consecutive_errors = 0
@@ -1,12 +1,12 @@
-import os, sys, json, csv
+import os, sys, json
 from datetime import datetime
 
 os.environ["PYTHONUTF8"] = "1"
 print("📄 run_monitor.py — procesando cola y pendientes...")
 
 def procesar_cola():
-    ruta = "data/cola_pendientes.csv"
-    if not os.path.exists(ruta):
+    from agents import cola_csv
+    if not os.path.exists(cola_csv.COLA_PATH):
         print("✅ Sin cola pendiente")
         return
 
@@ -16,15 +16,14 @@ def procesar_cola():
         print(f"❌ Import error: {e}")
         return
 
-    with open(ruta, newline="", encoding="utf-8") as f:
-        pendientes = list(csv.DictReader(f))
+    pendientes = cola_csv.leer_cola()
 
     if not pendientes:
         print("✅ Cola vacía")
         return
 
     print(f"📋 Cola CSV: {len(pendientes)} pendiente(s)")
-    eliminados = []
+    eliminados, fallidos = [], []
 
     for fila in pendientes:
         nombre   = fila.get("nombre_idea", "?")
@@ -43,37 +42,22 @@ def procesar_cola():
                 print(f"✅ Reintento exitoso: '{nombre}'")
                 eliminados.append(ts)
             else:
-                fila["intentos"] = str(intentos + 1)
+                fallidos.append(ts)
                 print(f"⚠️ Reintento fallido '{nombre}' — intento {intentos+1}/3")
         except Exception as e:
             print(f"❌ Error '{nombre}': {e}")
-            fila["intentos"] = str(intentos + 1)
+            fallidos.append(ts)
 
-    # Reescribir CSV sin los procesados
-    restantes = [f for f in pendientes if f.get("timestamp") not in eliminados]
-    with open(ruta, "w", newline="", encoding="utf-8") as f:
-        if restantes:
-            writer = csv.DictWriter(f, fieldnames=restantes[0].keys())
-            writer.writeheader()
-            writer.writerows(restantes)
-        else:
-            f.write("")
+    # Aplicar resultados sobre la cola actual (bajo bloqueo: no pisa lo encolado mientras)
+    cola_csv.aplicar_resultados(eliminar=eliminados, reintentar=fallidos)
 
-    print(f"✅ Cola procesada — {len(eliminados)} sincronizadas, {len(restantes)} pendientes")
+    print(f"✅ Cola procesada — {len(eliminados)} sincronizadas, {len(pendientes) - len(eliminados)} pendientes")
 
 def verificar_ideas_sin_sync():
     """Re-intenta sincronizar ideas locales que no llegaron a Notion"""
-    ruta_ideas = "data/ideas.json"
-    if not os.path.exists(ruta_ideas):
-        return
-
-    try:
-        with open(ruta_ideas, "r", encoding="utf-8") as f:
-            ideas = json.load(f)
-    except:
-        return
+    from agents import idea_store
 
-    sin_sync = [i for i in ideas if not i.get("notion_url")]
+    sin_sync = [i for i in idea_store.todas() if not i.get("notion_url")]
     if not sin_sync:
         return
 
@@ -84,21 +68,14 @@ def verificar_ideas_sin_sync():
     except ImportError:
         return
 
-    actualizadas = False
-    for idea in ideas:
-        if not idea.get("notion_url"):
-            try:
-                url = sync_idea_to_notion(idea)
-                if url:
-                    idea["notion_url"] = url
-                    print(f"✅ Sincronizada: {idea.get('nombre','?')}")
-                    actualizadas = True
-            except Exception as e:
-                print(f"⚠️ Error sync '{idea.get('nombre','?')}': {e}")
-
-    if actualizadas:
-        with open(ruta_ideas, "w", encoding="utf-8") as f:
-            json.dump(ideas, f, ensure_ascii=False, indent=2)
+    for idea in sin_sync:
+        try:
+            url = sync_idea_to_notion(idea)
+            if url:
+                idea_store.actualizar(idea, notion_url=url)
+                print(f"✅ Sincronizada: {idea.get('nombre','?')}")
+        except Exception as e:
+            print(f"⚠️ Error sync '{idea.get('nombre','?')}': {e}")
 
 if __name__ == "__main__":
     procesar_cola()
@@ -0,0 +1,391 @@
+"""
+Servidor local que imita Groq, Gemini, Notion, Telegram y GitHub.
+
+Sirve para medir el pipeline sin gastar cupo real: latencias configurables
+por servicio, 429 inyectados con la probabilidad que se pida y respuestas
+montadas con las ideas de data/ideas.json (cumplen los esquemas de
+agents/esquemas.py). Cada servicio cuelga de su prefijo y el código lo usa
+en cuanto se define API_BASE_URL (ver agents/endpoints.py):
+
+    python scripts/fake_servers.py --puerto 8765 \\
+        --latencia groq=lognormal:0.8,0.4 --tasa-429 groq=0.05
+    API_BASE_URL=http://127.0.0.1:8765 python run_batch.py --lote
+
+Latencias: fija:S | uniforme:A,B | lognormal:MEDIANA,SIGMA | exp:MEDIA
+(segundos). GET /_stats devuelve peticiones y 429 por servicio.
+"""
+import os
+import re
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agents.analyzer_agent import SECCIONES
+
+IDEAS_PATH = os.path.join("data", "ideas.json")
+
+LATENCIAS = {
+    "groq":     "lognormal:0.8,0.4",
+    "gemini":   "lognormal:1.2,0.5",
+    "notion":   "lognormal:0.3,0.3",
+    "telegram": "fija:0.05",
+    "github":   "lognormal:0.25,0.3",
+}
+PARTE_PRIMER_BYTE = 0.3   # fracción de la latencia antes del primer fragmento (streaming)
+TOPE_LONG_POLL    = 30    # segundos máximos que se retiene un getUpdates
+
+
+# ── Configuración ────────────────────────────────────────────────────────────
+
+def parsear_latencia(spec: str):
+    """'lognormal:0.8,0.4' → función(rng) que devuelve una latencia en segundos."""
+    tipo, _, args = spec.partition(":")
+    valores = [float(v) for v in args.split(",") if v]
+    if tipo == "fija":
+        return lambda rng: valores[0]
+    if tipo == "uniforme":
+        return lambda rng: rng.uniform(valores[0], valores[1])
+    if tipo == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(valores[0]), valores[1])
+    if tipo == "exp":
+        return lambda rng: rng.expovariate(1 / valores[0])
+    raise ValueError(f"Distribución desconocida: {spec}")
+
+
+def _pares(lista: list | None) -> dict:
+    """['groq=0.1', ...] → {'groq': '0.1'}"""
+    return dict(p.split("=", 1) for p in lista or [])
+
+
+def cargar_ideas(path: str = IDEAS_PATH) -> list:
+    try:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            ideas = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        ideas = []
+    ideas = [i for i in ideas if isinstance(i, dict) and i.get("nombre")]
+    return ideas or [{"nombre": "IdeaDemo", "problema": "Problema de ejemplo",
+                      "solucion": "Solución de ejemplo", "descripcion": "Demo", "vertical": "SaaS"}]
+
+
+# ── Respuestas LLM enlatadas ─────────────────────────────────────────────────
+
+class Enlatado:
+    """Monta respuestas que cumplen el esquema que pide cada prompt."""
+
+    def __init__(self, ideas: list, rng: random.Random):
+        self.ideas = ideas
+        self.rng = rng
+        self._n = 0
+        self._lock = threading.Lock()
+
+    def _idea(self) -> dict:
+        with self._lock:
+            self._n += 1
+            n = self._n
+        base = self.rng.choice(self.ideas)
+        return {
+            "nombre": f"{base['nombre']} {n}",
+            "tagline": base.get("propuesta_valor") or base.get("descripcion", ""),
+            "descripcion": base.get("descripcion", ""),
+            "problema": base.get("problema", ""),
+            "solucion": base.get("solucion", ""),
+            "vertical": base.get("vertical", "SaaS"),
+            "tipo": base.get("tipo", "SaaS"),
+            "monetizacion": base.get("monetizacion", "Suscripción"),
+            "tags": [base.get("vertical", "saas")],
+            "scores": {k: self.rng.randint(55, 95) for k in
+                       ("critico", "viral", "generador", "monetizacion", "ejecutabilidad", "timing")},
+        }
+
+    def _critica(self) -> dict:
+        return {"score_critico": self.rng.randint(40, 95), "viral_score": self.rng.randint(40, 95),
+                "score_generador": self.rng.randint(50, 95), "score_money": self.rng.randint(40, 95),
+                "puntos_fuertes": ["Mercado claro"], "puntos_debiles": ["Competencia"],
+                "resumen": "Evaluación simulada"}
+
+    def _informe(self) -> str:
+        base = self.rng.choice(self.ideas)
+        parrafo = (f"{base.get('nombre')}: {base.get('problema', '')} "
+                   f"{base.get('solucion', '')} ") * 3
+        return "\n\n".join(f"## {s}\n\n{parrafo.strip()}" for s in SECCIONES)
+
+    def responder(self, prompt: str) -> str:
+        if '"evaluaciones"' in prompt:
+            n = len(re.findall(r"^\[(\d+)\]", prompt, re.M)) or 1
+            return json.dumps({"evaluaciones": [{"indice": i, **self._critica()} for i in range(n)]},
+                              ensure_ascii=False)
+        if '"ideas"' in prompt:
+            m = re.search(r"Genera (\d+) ideas", prompt)
+            return json.dumps({"ideas": [self._idea() for _ in range(int(m.group(1)) if m else 3)]},
+                              ensure_ascii=False)
+        if '"competidores_directos"' in prompt:
+            return json.dumps({"competidores_directos": [{"nombre": "Rival", "url": "https://example.com"}],
+                               "competidores_indirectos": ["Excel"], "riesgo_competitivo": "medio",
+                               "ventaja_competitiva": "Nicho", "barreras_entrada": "bajas",
+                               "nicho_recomendado": "pymes"}, ensure_ascii=False)
+        if '"inversion_mvp_usd"' in prompt:
+            return json.dumps({"inversion_mvp_usd": self.rng.randint(500, 20000),
+                               "tiempo_desarrollo_semanas": self.rng.randint(2, 16),
+                               "equipo_necesario": ["dev"], "costos_mensuales_operacion": 200,
+                               "tiempo_breakeven_meses": 9, "viabilidad_tecnica": "alta",
+                               "complejidad": "media"})
+        if '"productos"' in prompt:
+            return json.dumps({"productos": [{"nombre": i["nombre"], "descripcion_corta": i["problema"],
+                                              "pasos_rapidos": ["MVP"]} for i in
+                                             (self._idea() for _ in range(3))]}, ensure_ascii=False)
+        if '"score_critico"' in prompt:
+            return json.dumps(self._critica(), ensure_ascii=False)
+        if '"nombre"' in prompt:
+            return json.dumps(self._idea(), ensure_ascii=False)
+        return self._informe()
+
+
+def _trocear(texto: str, tam: int = 40) -> list:
+    return [texto[i:i + tam] for i in range(0, len(texto), tam)] or [""]
+
+
+def _uso(prompt: str, texto: str) -> tuple:
+    entrada, salida = len(prompt) // 4, len(texto) // 4
+    return entrada, salida, entrada + salida
+
+
+# ── Servidor ─────────────────────────────────────────────────────────────────
+
+class Manejador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, formato, *args):
+        if self.server.verboso:
+            super().log_message(formato, *args)
+
+    # utilidades
+    def _cuerpo(self) -> dict:
+        largo = int(self.headers.get("Content-Length") or 0)
+        crudo = self.rfile.read(largo) if largo else b""
+        if not crudo:
+            return {}
+        try:
+            return json.loads(crudo)
+        except json.JSONDecodeError:
+            return {k: v[0] for k, v in parse_qs(crudo.decode("utf-8", "replace")).items()}
+
+    def _json(self, estado: int, datos, cabeceras: dict | None = None):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        for k, v in (cabeceras or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _sse(self, eventos: list, espera_total: float):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        pausa = espera_total / max(len(eventos), 1)
+        try:
+            for evento in eventos:
+                time.sleep(pausa)
+                self.wfile.write(f"data: {json.dumps(evento, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass   # el cliente cortó el stream (StreamAbortado / hedging)
+        self.close_connection = True
+
+    def _despachar(self, metodo: str):
+        ruta = urlparse(self.path)
+        partes = ruta.path.strip("/").split("/", 1)
+        servicio, resto = partes[0], "/" + (partes[1] if len(partes) > 1 else "")
+        if servicio == "_stats":
+            return self._json(200, self.server.stats())
+        if servicio not in self.server.latencias:
+            return self._json(404, {"error": f"servicio desconocido: {servicio}"})
+        cuerpo = self._cuerpo() if metodo in ("POST", "PUT", "PATCH") else {}
+        params = {k: v[0] for k, v in parse_qs(ruta.query).items()}
+        latencia = self.server.latencia(servicio)
+        if self.server.inyectar_429(servicio):
+            time.sleep(latencia * 0.1)
+            return self._json(429, {"error": {"message": "Rate limit simulado"}}, {
+                "retry-after": "1", "x-ratelimit-remaining-requests": "0",
+                "x-ratelimit-remaining-tokens": "0", "x-ratelimit-reset-requests": "1s"})
+        getattr(self, f"_{servicio}")(metodo, resto, cuerpo, params, latencia)
+
+    def do_GET(self):
+        self._despachar("GET")
+
+    def do_POST(self):
+        self._despachar("POST")
+
+    def do_PUT(self):
+        self._despachar("PUT")
+
+    def do_PATCH(self):
+        self._despachar("PATCH")
+
+    # servicios
+    def _groq(self, metodo, ruta, cuerpo, params, latencia):
+        prompt = "\n".join(m.get("content", "") for m in cuerpo.get("messages", []))
+        texto = self.server.enlatado.responder(prompt)
+        entrada, salida, total = _uso(prompt, texto)
+        uso = {"prompt_tokens": entrada, "completion_tokens": salida, "total_tokens": total}
+        if cuerpo.get("stream"):
+            time.sleep(latencia * PARTE_PRIMER_BYTE)
+            eventos = [{"choices": [{"delta": {"content": t}}]} for t in _trocear(texto)]
+            eventos.append({"choices": [{"delta": {}, "finish_reason": "stop"}], "x_groq": {"usage": uso}})
+            self._sse(eventos, latencia * (1 - PARTE_PRIMER_BYTE))
+            return
+        time.sleep(latencia)
+        self._json(200, {"choices": [{"message": {"role": "assistant", "content": texto}}], "usage": uso},
+                   {"x-ratelimit-remaining-requests": "1000", "x-ratelimit-remaining-tokens": "100000",
+                    "x-ratelimit-reset-requests": "1s", "x-ratelimit-reset-tokens": "1s"})
+
+    def _gemini(self, metodo, ruta, cuerpo, params, latencia):
+        prompt = "\n".join(p.get("text", "") for c in cuerpo.get("contents", []) for p in c.get("parts", []))
+        texto = self.server.enlatado.responder(prompt)
+        entrada, salida, total = _uso(prompt, texto)
+        uso = {"promptTokenCount": entrada, "candidatesTokenCount": salida, "totalTokenCount": total}
+        if "streamGenerateContent" in ruta:
+            time.sleep(latencia * PARTE_PRIMER_BYTE)
+            eventos = [{"candidates": [{"content": {"parts": [{"text": t}]}}]} for t in _trocear(texto)]
+            eventos[-1]["usageMetadata"] = uso
+            self._sse(eventos, latencia * (1 - PARTE_PRIMER_BYTE))
+            return
+        time.sleep(latencia)
+        self._json(200, {"candidates": [{"content": {"parts": [{"text": texto}]}}], "usageMetadata": uso})
+
+    def _notion(self, metodo, ruta, cuerpo, params, latencia):
+        time.sleep(latencia)
+        if ruta.startswith("/v1/databases/") and ruta.endswith("/query"):
+            resultados = [{"id": str(uuid.uuid5(uuid.NAMESPACE_DNS, i["nombre"])), "properties": {
+                "Nombre": {"title": [{"plain_text": i["nombre"]}]}}} for i in self.server.enlatado.ideas]
+            return self._json(200, {"object": "list", "results": resultados, "has_more": False})
+        if ruta.startswith("/v1/pages") or ruta.startswith("/v1/blocks") or ruta.startswith("/v1/databases"):
+            pagina = ruta.rstrip("/").split("/")[3] if ruta.count("/") >= 3 else str(uuid.uuid4())
+            return self._json(200, {"object": "page", "id": pagina, "results": []})
+        self._json(200, {"object": "user", "id": "bot"})
+
+    def _telegram(self, metodo, ruta, cuerpo, params, latencia):
+        metodo_api = ruta.rsplit("/", 1)[-1]
+        datos = {**params, **cuerpo}
+        if metodo_api == "getUpdates":
+            time.sleep(min(float(datos.get("timeout") or 0), TOPE_LONG_POLL) or latencia)
+            return self._json(200, {"ok": True, "result": []})
+        time.sleep(latencia)
+        if metodo_api == "getMe":
+            return self._json(200, {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "Fake",
+                                                           "username": "fake_bot"}})
+        self._json(200, {"ok": True, "result": {"message_id": self.server.siguiente_id(),
+                                                "chat": {"id": datos.get("chat_id")},
+                                                "date": int(time.time()), "text": datos.get("text", "")}})
+
+    def _github(self, metodo, ruta, cuerpo, params, latencia):
+        time.sleep(latencia)
+        ficheros = self.server.ficheros
+        if metodo == "GET":
+            if ruta not in ficheros:
+                return self._json(404, {"message": "Not Found"})
+            return self._json(200, ficheros[ruta])
+        sha_previo = ficheros.get(ruta, {}).get("sha")
+        if sha_previo and cuerpo.get("sha") != sha_previo:
+            return self._json(409, {"message": "sha does not match"})
+        sha = uuid.uuid4().hex
+        ficheros[ruta] = {"sha": sha, "content": cuerpo.get("content", ""), "encoding": "base64"}
+        self._json(201 if not sha_previo else 200, {"content": {"sha": sha, "path": ruta}})
+
+
+class ServidorFalso(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, direccion, latencias: dict, tasas_429: dict, ideas: list,
+                 semilla=None, verboso: bool = False):
+        super().__init__(direccion, Manejador)
+        self.rng = random.Random(semilla)
+        self.latencias = {s: parsear_latencia(spec) for s, spec in latencias.items()}
+        self.tasas_429 = tasas_429
+        self.enlatado = Enlatado(ideas, self.rng)
+        self.ficheros = {}
+        self.verboso = verboso
+        self._lock = threading.Lock()
+        self._peticiones = {s: 0 for s in latencias}
+        self._rechazos = {s: 0 for s in latencias}
+        self._id = 0
+
+    def latencia(self, servicio: str) -> float:
+        with self._lock:
+            self._peticiones[servicio] += 1
+            return max(self.latencias[servicio](self.rng), 0.0)
+
+    def inyectar_429(self, servicio: str) -> bool:
+        with self._lock:
+            if self.rng.random() < self.tasas_429.get(servicio, 0):
+                self._rechazos[servicio] += 1
+                return True
+        return False
+
+    def siguiente_id(self) -> int:
+        with self._lock:
+            self._id += 1
+            return self._id
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"peticiones": dict(self._peticiones), "429": dict(self._rechazos)}
+
+
+def crear_servidor(puerto: int = 0, latencias: dict | None = None, tasas_429: dict | None = None,
+                   semilla=None, ideas_path: str = IDEAS_PATH, host: str = "127.0.0.1",
+                   verboso: bool = False) -> ServidorFalso:
+    """Servidor listo para serve_forever(); `puerto=0` elige uno libre."""
+    return ServidorFalso((host, puerto), {**LATENCIAS, **(latencias or {})},
+                         {s: float(p) for s, p in (tasas_429 or {}).items()},
+                         cargar_ideas(ideas_path), semilla, verboso)
+
+
+def iniciar_en_hilo(**kwargs) -> tuple:
+    """Arranca el servidor en un hilo daemon. Devuelve (servidor, url_base)."""
+    servidor = crear_servidor(**kwargs)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    host, puerto = servidor.server_address[:2]
+    return servidor, f"http://{host}:{puerto}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="APIs falsas para benchmarks sin cupo real")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--latencia", action="append", metavar="SERVICIO=DIST",
+                        help="p. ej. groq=lognormal:0.8,0.4 (repetible)")
+    parser.add_argument("--tasa-429", action="append", metavar="SERVICIO=P",
+                        help="probabilidad de 429, p. ej. groq=0.05 (repetible)")
+    parser.add_argument("--semilla", type=int, default=None)
+    parser.add_argument("--ideas", default=IDEAS_PATH)
+    parser.add_argument("--verboso", action="store_true")
+    args = parser.parse_args(argv)
+
+    servidor = crear_servidor(args.puerto, _pares(args.latencia), _pares(args.tasa_429),
+                              args.semilla, args.ideas, args.host, args.verboso)
+    print(f"🧪 APIs falsas en http://{args.host}:{servidor.server_address[1]} "
+          f"(export API_BASE_URL=http://{args.host}:{servidor.server_address[1]})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Parado")
+    finally:
+        servidor.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
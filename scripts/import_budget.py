@@ -0,0 +1,101 @@
+"""
+Presupuesto de tiempo de importación (arranque en frío).
+
+El cron de GitHub Actions lanza run_batch cada 15 minutos y el monitor y
+run_continuous arrancan procesos a menudo: lo que cuesta `import` se paga
+en cada ejecución. Este script mide cada módulo de PRESUPUESTO con
+`python -X importtime` en un intérprete nuevo (mediana de varias
+repeticiones) y falla si alguno supera su presupuesto o si al importarlo
+se cargan dependencias pesadas (PESADOS) que solo deberían importarse
+dentro de la función que las usa.
+
+    python scripts/import_budget.py [--repeticiones 5] [--holgura 1.0]
+"""
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Milisegundos (acumulado del propio módulo) con margen para máquinas lentas
+PRESUPUESTO = {
+    "run_batch":              30,
+    "run_continuous":         60,
+    "main_workflow":          80,
+    "agents.llm":             60,
+    "agents.generator_agent": 70,
+    "agents.critic_agent":    70,
+    "agents.notion_sync_agent": 30,
+    "agents.trend_hunter_agent": 70,
+    "agents.telegram_notifier": 30,
+    "agents.landing_agent":   30,
+}
+
+# Paquetes que ningún módulo de PRESUPUESTO debe cargar al importarse
+PESADOS = ("requests", "urllib3", "pytz", "groq", "telegram", "google", "notion_client", "numpy")
+
+_LINEA = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|\s*(\S+)\s*$")
+
+
+def _importtime(modulo: str) -> list:
+    """[(acumulado_us, nombre)] de un `import modulo` en un intérprete nuevo."""
+    r = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True, text=True, cwd=RAIZ,
+    )
+    if r.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {modulo}: {r.stderr.strip().splitlines()[-1:]}")
+    filas = []
+    for linea in r.stderr.splitlines():
+        m = _LINEA.match(linea)
+        if m:
+            filas.append((int(m.group(2)), m.group(3)))
+    return filas
+
+
+def medir(modulo: str, repeticiones: int = 5) -> dict:
+    """{"ms": mediana del acumulado de `modulo`, "pesados": paquetes de PESADOS cargados}."""
+    tiempos, pesados = [], set()
+    for _ in range(repeticiones):
+        filas = _importtime(modulo)
+        tiempos.append(next((us for us, nombre in filas if nombre == modulo), 0) / 1000)
+        pesados |= {nombre.split(".")[0] for _, nombre in filas
+                    if nombre.split(".")[0] in PESADOS}
+    return {"ms": round(statistics.median(tiempos), 1), "pesados": sorted(pesados)}
+
+
+def comprobar(modulos=None, repeticiones: int = 5, holgura: float = 1.0) -> list:
+    """Mide `modulos` (todo PRESUPUESTO por defecto) y devuelve las infracciones."""
+    infracciones = []
+    for modulo in modulos or PRESUPUESTO:
+        r = medir(modulo, repeticiones)
+        limite = PRESUPUESTO.get(modulo, 0) * holgura
+        estado = "✅"
+        if r["pesados"]:
+            estado = "❌"
+            infracciones.append(f"{modulo} importa {', '.join(r['pesados'])} al cargarse")
+        if limite and r["ms"] > limite:
+            estado = "❌"
+            infracciones.append(f"{modulo}: {r['ms']} ms > {limite:.0f} ms")
+        print(f"{estado} {modulo:<28} {r['ms']:>7.1f} ms  (presupuesto {limite:.0f} ms)")
+    return infracciones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de importación")
+    parser.add_argument("modulos", nargs="*", help="módulos a medir (por defecto, todo PRESUPUESTO)")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--holgura", type=float, default=1.0,
+                        help="multiplica los presupuestos (p. ej. 2 en runners lentos)")
+    args = parser.parse_args(argv)
+    infracciones = comprobar(args.modulos, args.repeticiones, args.holgura)
+    for i in infracciones:
+        print(f"   ⚠️ {i}")
+    return 1 if infracciones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
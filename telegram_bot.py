@@ -1,5 +1,4 @@
 import os
-import json
 import time
 import logging
 import subprocess
@@ -9,6 +8,8 @@ from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
 from telegram.error import Conflict, NetworkError
 
+from agents import endpoints
+
 logging.basicConfig(level=logging.WARNING)
 log = logging.getLogger(__name__)
 
@@ -29,8 +30,8 @@ async def cmd_start(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
 
 async def cmd_status(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
     try:
-        from agents.knowledge_base import get_stats
-        stats = get_stats()
+        from agents.knowledge_base import snapshot
+        stats = snapshot()["stats"]
 
         cola_n = 0
         try:
@@ -41,11 +42,13 @@ async def cmd_status(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
 
         total_local = 0
         try:
-            with open("data/ideas.json", "r", encoding="utf-8") as f:
-                total_local = len(json.load(f))
+            from agents import idea_store
+            total_local = idea_store.contar()
         except:
             pass
 
+        from agents.telemetria import resumen_status
+
         await update.message.reply_text(
             f"📊 <b>Estado del sistema</b>\n"
             f"🕐 {datetime.now().strftime('%d/%m/%Y %H:%M')}\n\n"
@@ -56,7 +59,8 @@ async def cmd_status(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
             f"📚 Ideas en KB: <b>{stats.get('total_ideas', 0)}</b>\n"
             f"📊 Score promedio: <b>{stats.get('score_promedio', 0)}/100</b>\n"
             f"🏆 Mejor score: <b>{stats.get('mejor_score', 0)}/100</b>\n"
-            f"⏳ Cola pendiente: <b>{cola_n}</b>",
+            f"⏳ Cola pendiente: <b>{cola_n}</b>\n\n"
+            f"{resumen_status()}",
             parse_mode="HTML"
         )
     except Exception as e:
@@ -64,8 +68,8 @@ async def cmd_status(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
 
 async def cmd_top(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
     try:
-        from agents.knowledge_base import get_top_ideas
-        top = get_top_ideas(5)
+        from agents.knowledge_base import snapshot
+        top = snapshot()["por_score"][:5]
 
         if not top:
             await update.message.reply_text(
@@ -90,8 +94,8 @@ async def cmd_top(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
 
 async def cmd_stats(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
     try:
-        from agents.knowledge_base import get_stats
-        stats = get_stats()
+        from agents.knowledge_base import snapshot
+        stats = snapshot()["stats"]
         await update.message.reply_text(
             f"📈 <b>Estadísticas KB</b>\n\n"
             f"💡 Ideas analizadas: <b>{stats.get('total_ideas', 0)}</b>\n"
@@ -171,7 +175,8 @@ def main():
     while True:
         try:
             print("[Bot] Iniciando IdeaValidator Bot...")
-            app = Application.builder().token(TOKEN).build()
+            app = (Application.builder().token(TOKEN)
+                   .base_url(endpoints.url("telegram", "/bot")).build())
             app.add_handler(CommandHandler("start",  cmd_start))
             app.add_handler(CommandHandler("status", cmd_status))
             app.add_handler(CommandHandler("top",    cmd_top))
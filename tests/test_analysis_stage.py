@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from agents import analysis_stage, llm
+
+
+def _agentes_falsos(monkeypatch, funciones):
+    monkeypatch.setattr(analysis_stage, "AGENTES", {n: (n, n) for n in funciones})
+    monkeypatch.setattr(analysis_stage, "_resolver", lambda modulo, funcion: funciones[funcion])
+
+
+class TestAnalysisStage:
+    """Tests para la etapa de análisis concurrente"""
+
+    def test_agentes_en_paralelo(self, monkeypatch):
+        """Verifica que la latencia es la del agente más lento, no la suma"""
+        def lento(resultado):
+            def _f(idea):
+                time.sleep(0.3)
+                return resultado
+            return _f
+
+        _agentes_falsos(monkeypatch, {
+            "critique": lento({"score_critico": 80}),
+            "competencia": lento({"riesgo_competitivo": "Bajo"}),
+            "estimacion": lento({"complejidad": "Media"}),
+        })
+        idea = {"nombre": "Test"}
+        inicio = time.perf_counter()
+        assert analysis_stage.analizar(idea) is True
+        assert time.perf_counter() - inicio < 0.8
+        assert idea["score_critico"] == 80
+        assert idea["competencia"]["riesgo_competitivo"] == "Bajo"
+        assert idea["estimacion"]["complejidad"] == "Media"
+
+    def test_rechazo_cancela_resto(self, monkeypatch):
+        """Verifica que un rechazo del crítico cancela las llamadas pendientes"""
+        cancelados = []
+
+        def pendiente(idea):
+            for _ in range(100):
+                try:
+                    llm._comprobar_cancelacion()
+                except llm.LLMCancelado:
+                    cancelados.append(True)
+                    raise
+                time.sleep(0.01)
+            return {"terminado": True}
+
+        _agentes_falsos(monkeypatch, {
+            "critique": lambda idea: {"score_critico": 20},
+            "competencia": pendiente,
+        })
+        idea = {"nombre": "Test"}
+        aprobada = analysis_stage.analizar(idea, aprobar=lambda i, c: c["score_critico"] >= 55)
+        assert aprobada is False
+        assert cancelados == [True]
+        assert "competencia" not in idea
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.abspath('.'))
+sys.path.insert(0, os.path.abspath('scripts'))
+
+import fake_servers
+import run_batch
+from agents import circuit_breaker, endpoints, llm_cache, rate_limiter, router, telemetria
+
+SIN_LATENCIA = {s: "fija:0" for s in fake_servers.LATENCIAS}
+
+
+@pytest.fixture
+def servidor(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "CACHE_PATH", str(tmp_path / "llm_cache.sqlite"))
+    monkeypatch.setattr(rate_limiter, "LIMITER_PATH", str(tmp_path / "rate_limits.sqlite"))
+    monkeypatch.setattr(telemetria, "METRICAS_PATH", str(tmp_path / "llm_metrics.jsonl"))
+    monkeypatch.setattr(circuit_breaker, "BREAKER_PATH", str(tmp_path / "circuit_breaker.sqlite"))
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    router.reiniciar()
+
+    def _arrancar(**kwargs):
+        srv, url = fake_servers.iniciar_en_hilo(latencias=SIN_LATENCIA, semilla=1, **kwargs)
+        monkeypatch.setenv("API_BASE_URL", url)
+        return srv
+    yield _arrancar
+
+
+class TestServidoresFalsos:
+    """Tests para las APIs falsas de benchmark"""
+
+    def test_lote_y_critica_contra_groq_falso(self, servidor):
+        """Verifica que el lote y su crítica cumplen los esquemas reales"""
+        srv = servidor()
+        assert endpoints.base("groq").startswith("http://127.0.0.1")
+        ideas = run_batch.generar_lote("", 3, previas=[])
+        assert len(ideas) == 3
+        from agents import critic_agent
+        assert all(critic_agent.critique_lote(ideas))
+        assert srv.stats()["peticiones"]["groq"] == 2
+        srv.shutdown()
+
+    def test_inyecta_429_y_github_contents(self, servidor):
+        """Verifica la inyección de 429 y el almacén de contents de GitHub"""
+        srv = servidor(tasas_429={"telegram": 1.0})
+        r = requests.post(endpoints.url("telegram", "/botX/sendMessage"), json={"chat_id": 1, "text": "hola"})
+        assert r.status_code == 429
+        url = endpoints.url("github", "/repos/o/r/contents/a.html")
+        assert requests.get(url).status_code == 404
+        sha = requests.put(url, json={"content": "eA=="}).json()["content"]["sha"]
+        assert requests.put(url, json={"content": "eQ=="}).status_code == 409
+        assert requests.put(url, json={"content": "eQ==", "sha": sha}).status_code == 200
+        assert srv.stats()["429"]["telegram"] == 1
+        srv.shutdown()
@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from agents import idea_store
+
+
+@pytest.fixture(autouse=True)
+def _registro_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(idea_store, "IDEAS_PATH", str(tmp_path / "ideas.jsonl"))
+    monkeypatch.setattr(idea_store, "INDICE_PATH", str(tmp_path / "ideas.jsonl.idx"))
+    monkeypatch.setattr(idea_store, "LEGADO_PATH", str(tmp_path / "ideas.json"))
+    monkeypatch.setattr(idea_store, "_estado", None)
+    return tmp_path
+
+
+class TestIdeaStore:
+    """Tests para el registro de ideas JSONL con índice de offsets"""
+
+    def test_anadir_y_buscar(self):
+        """Verifica que una idea añadida se encuentra por id, slug y nombre"""
+        idea = idea_store.anadir({"nombre": "FacturaFlow", "slug": "facturaflow", "score": 80})
+        idea_store.anadir({"nombre": "Otra", "slug": "otra"})
+        assert idea_store.buscar(id=idea["_id"])["score"] == 80
+        assert idea_store.buscar(slug="facturaflow")["_id"] == idea["_id"]
+        assert idea_store.buscar(nombre="  facturaflow ")["_id"] == idea["_id"]
+        assert idea_store.buscar(nombre="no existe") is None
+        assert idea_store.contar() == 2
+
+    def test_actualizar_marca_la_version_anterior(self):
+        """Verifica que actualizar deja una sola versión viva con los cambios"""
+        idea = idea_store.anadir({"nombre": "FacturaFlow", "slug": "facturaflow"})
+        tamano = os.path.getsize(idea_store.IDEAS_PATH)
+        idea_store.actualizar(idea, notion_url="https://notion.so/x")
+        assert idea["notion_url"] == "https://notion.so/x"
+        assert idea_store.buscar(slug="facturaflow")["notion_url"] == "https://notion.so/x"
+        assert [i["nombre"] for i in idea_store.todas()] == ["FacturaFlow"]
+        with open(idea_store.IDEAS_PATH, "rb") as f:
+            primera = f.read(tamano)
+        assert primera.startswith(b'{"_vivo": 0, ')
+        assert idea_store.actualizar({"_id": "inexistente"}, x=1) is None
+
+    def test_compacta_cuando_dominan_las_muertas(self, monkeypatch):
+        """Verifica que al superar el umbral de versiones muertas se reescribe el fichero"""
+        monkeypatch.setattr(idea_store, "COMPACTAR_MUERTAS", 5)
+        idea = idea_store.anadir({"nombre": "A"})
+        for n in range(5):
+            idea_store.actualizar(idea, version=n)
+        with open(idea_store.IDEAS_PATH, "rb") as f:
+            lineas = f.readlines()
+        assert len(lineas) == 1
+        assert idea_store.buscar(id=idea["_id"])["version"] == 4
+
+    def test_migra_ideas_json(self, _registro_temporal):
+        """Verifica que el ideas.json antiguo (lista o dict) se importa una sola vez en orden"""
+        with open(idea_store.LEGADO_PATH, "w", encoding="utf-8-sig") as f:
+            json.dump({"ideas": [{"nombre": "Vieja 1"}, {"nombre": "Vieja 2"}]}, f)
+        assert [i["nombre"] for i in idea_store.todas()] == ["Vieja 1", "Vieja 2"]
+        idea_store.anadir({"nombre": "Nueva"})
+        assert [i["nombre"] for i in idea_store.todas()] == ["Vieja 1", "Vieja 2", "Nueva"]
+        assert os.path.exists(idea_store.LEGADO_PATH)
+
+    def test_otro_proceso_ve_los_appends(self, monkeypatch):
+        """Verifica que un índice desfasado se pone al día leyendo solo la cola del fichero"""
+        idea = idea_store.anadir({"nombre": "Primera"})
+        assert idea_store.contar() == 1
+        with open(idea_store.IDEAS_PATH, "ab") as f:   # append de otro proceso
+            f.write(idea_store._linea({"_id": "ajena", "_alta": 0, "nombre": "Ajena"}))
+            f.write(b'{"_vivo": 1, "_id": "a medias')
+        assert idea_store.buscar(nombre="ajena")["_id"] == "ajena"
+        assert idea_store.contar() == 2
+        monkeypatch.setattr(idea_store, "_estado", None)   # proceso nuevo: parte del .idx
+        idea_store.actualizar(idea, ok=True)
+        assert idea_store.buscar(nombre="primera")["ok"] is True
@@ -0,0 +1,23 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath('.'))
+sys.path.insert(0, os.path.abspath('scripts'))
+
+import import_budget
+
+
+class TestImportBudget:
+    """Tests para el presupuesto de tiempo de importación"""
+
+    def test_sin_dependencias_pesadas_al_importar(self):
+        """Verifica que los puntos de entrada no cargan requests, pytz, groq... al importarse"""
+        for modulo in ("run_batch", "main_workflow", "agents.llm", "agents.telegram_notifier"):
+            assert import_budget.medir(modulo, repeticiones=1)["pesados"] == [], modulo
+
+    def test_detecta_regresion(self, monkeypatch):
+        """Verifica que se informa un módulo por encima de su presupuesto o que carga un pesado"""
+        monkeypatch.setitem(import_budget.PRESUPUESTO, "json", 0.001)
+        monkeypatch.setattr(import_budget, "PESADOS", ("json",))
+        infracciones = import_budget.comprobar(["json"], repeticiones=1)
+        assert len(infracciones) == 2
@@ -0,0 +1,108 @@
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from agents import knowledge_base, score_predictor
+
+
+@pytest.fixture(autouse=True)
+def _kb_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(knowledge_base, "KB_PATH", str(tmp_path / "kb.db"))
+    monkeypatch.setattr(knowledge_base, "KB_LEGADO", str(tmp_path / "kb.json"))
+    monkeypatch.setattr(score_predictor, "PREDICTOR_PATH", str(tmp_path / "predictor.sqlite"))
+
+
+def _idea(nombre, score, vertical="fintech", tipo="B2B", tags=("saas",)):
+    return {"nombre": nombre, "vertical": vertical, "tipo": tipo, "tags": list(tags),
+            "scores": {"score_total": score}}
+
+
+class TestKnowledgeBase:
+    """Tests para la KB en SQLite"""
+
+    def test_top_stats_y_patrones(self):
+        """Verifica top-N, estadísticas y patrones tras registrar ideas"""
+        knowledge_base.registrar_idea(_idea("Media", 70, vertical="salud", tags=("b2c",)))
+        knowledge_base.registrar_idea(_idea("Mejor", 90, tags=("saas", "ia")))
+        knowledge_base.registrar_idea(_idea("Buena", 80, tipo="B2C"))
+        knowledge_base.registrar_idea({"nombre": "Sin scores"})
+
+        assert [i["nombre"] for i in knowledge_base.get_top_ideas(2)] == ["Mejor", "Buena"]
+        assert knowledge_base.get_top_ideas(1)[0]["_registrada"]
+        stats = knowledge_base.get_stats()
+        assert stats["total_ideas"] == 4
+        assert stats["score_promedio"] == 80.0
+        assert stats["mejor_score"] == 90
+        assert stats["mejor_idea"] == "Mejor"
+        assert stats["mejor_vertical"] == "fintech"
+        assert stats["tasa_exito"] == "50.0%"
+
+        items = knowledge_base.get_items_contexto()
+        assert items["ideas_previas"] == ["Sin scores", "Buena", "Mejor", "Media"]
+        assert items["score_por_vertical"] == [("fintech", 85.0), ("salud", 70.0)]
+        assert items["tags_exitosos"] == ["saas", "ia"]
+        assert knowledge_base.get_nombres_previos(2) == ["Buena", "Sin scores"]
+
+    def test_migra_kb_json(self):
+        """Verifica que el kb.json antiguo se importa una sola vez"""
+        with open(knowledge_base.KB_LEGADO, "w", encoding="utf-8") as f:
+            json.dump({"ideas": [_idea("Vieja", 88)], "patrones": {}, "tendencias": ["x"]}, f)
+        assert knowledge_base.get_stats()["mejor_idea"] == "Vieja"
+        knowledge_base.registrar_idea(_idea("Nueva", 60))
+        kb = knowledge_base._cargar()
+        assert [i["nombre"] for i in kb["ideas"]] == ["Vieja", "Nueva"]
+        assert kb["tendencias"] == ["x"]
+        assert kb["patrones"]["total_analizadas"] == 2
+
+    def test_agregados_coinciden_con_recalculo(self):
+        """Verifica que los agregados incrementales dan los mismos patrones que el recálculo completo"""
+        import random
+        random.seed(3)
+        for n in range(60):
+            knowledge_base.registrar_idea(_idea(
+                f"Idea {n}", random.choice([40, 60, 75, 80, 95]),
+                vertical=random.choice(["fintech", "salud", "edtech", "", None]),
+                tipo=random.choice(["B2B", "B2C"]),
+                tags=random.sample(["saas", "ia", "b2c", "api", "nocode", "viral"], 3)))
+        assert knowledge_base.verificar() == []
+
+        con = knowledge_base._conectar()   # agregados corruptos: se detectan y se reparan
+        con.execute("UPDATE agregados SET exitosas = 0 WHERE dimension = 'tag'")
+        con.close()
+        assert knowledge_base.verificar(reparar=True) == ["tags_exitosos"]
+        assert knowledge_base.verificar() == []
+
+    def test_snapshot_se_revalida_con_la_firma(self, monkeypatch):
+        """Verifica que el snapshot se reutiliza mientras la KB no cambia y se rehace si cambia"""
+        monkeypatch.setattr(knowledge_base, "_snapshot", {"firma": None})
+        knowledge_base.registrar_idea(_idea("Rapida", 70))
+        knowledge_base.registrar_idea({**_idea("Ejecutable", 60), "scores": {
+            "score_total": 60, "ejecutabilidad": 95, "generador": 90, "timing": 90}})
+        kb = knowledge_base.snapshot()
+        assert knowledge_base.snapshot() is kb
+        assert [i["nombre"] for i in kb["por_score"]] == ["Rapida", "Ejecutable"]
+        assert kb["por_ejecutable"][0]["nombre"] == "Ejecutable"
+        assert kb["stats"]["total_ideas"] == 2
+
+        con = knowledge_base._conectar()   # escritura de otro proceso: sin tocar _generacion
+        knowledge_base._insertar(con, _idea("Ajena", 99))
+        con.close()
+        nuevo = knowledge_base.snapshot()
+        assert nuevo is not kb
+        assert nuevo["por_score"][0]["nombre"] == "Ajena"
+
+    def test_solo_aprende_de_ideas_criticadas(self, monkeypatch):
+        """Verifica que el predictor no aprende de ideas sin crítica ni de scores["critico"]"""
+        aprendidas = []
+        monkeypatch.setattr(score_predictor, "aprender", aprendidas.append)
+        sin_critica = {**_idea("Sola", 70), "scores": {"score_total": 70, "critico": 75}}
+        knowledge_base.registrar_idea(sin_critica)
+        criticada = {**_idea("Criticada", 80), "critique": {"score_critico": 80}}
+        knowledge_base.registrar_idea(criticada)
+        assert [i["nombre"] for i in aprendidas] == ["Criticada"]
+        assert score_predictor.etiqueta(sin_critica) is None
+        assert score_predictor.etiqueta(criticada) == 80.0
@@ -0,0 +1,508 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from agents import circuit_breaker, esquemas, llm, llm_cache, rate_limiter, router, telemetria
+from agents.json_stream import ParserIncremental, parsear_json, vigilar_campo
+
+
+class _Respuesta:
+    def __init__(self, status_code, texto=""):
+        self.status_code = status_code
+        self._texto = texto
+        self.headers = {"retry-after": "0"} if status_code == 429 else {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"HTTP {self.status_code}", response=self)
+
+    def json(self):
+        return {"choices": [{"message": {"content": self._texto}}], "usage": {"prompt_tokens": 4, "completion_tokens": 6, "total_tokens": 10},
+                "candidates": [{"content": {"parts": [{"text": self._texto}]}}]}
+
+
+class _RespuestaStream:
+    """Respuesta SSE de Groq troceada; registra cuántos trozos se leyeron."""
+
+    def __init__(self, trozos):
+        self.status_code = 200
+        self.headers = {}
+        self.trozos = trozos
+        self.leidos = 0
+        self.cerrada = False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self, decode_unicode=False):
+        import json
+        for trozo in self.trozos:
+            self.leidos += 1
+            yield "data: " + json.dumps({"choices": [{"delta": {"content": trozo}}]})
+            yield ""
+        yield "data: [DONE]"
+
+    def close(self):
+        self.cerrada = True
+
+
+class _SesionFalsa:
+    """Devuelve las respuestas en orden y registra cada petición."""
+
+    def __init__(self, respuestas):
+        self.respuestas = list(respuestas)
+        self.peticiones = []
+
+    def post(self, url, headers=None, json=None, timeout=None, stream=False):
+        self.peticiones.append((url, json))
+        return self.respuestas.pop(0)
+
+
+@pytest.fixture(autouse=True)
+def cache_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "CACHE_PATH", str(tmp_path / "llm_cache.sqlite"))
+    monkeypatch.setattr(rate_limiter, "LIMITER_PATH", str(tmp_path / "rate_limits.sqlite"))
+    monkeypatch.setattr(telemetria, "METRICAS_PATH", str(tmp_path / "llm_metrics.jsonl"))
+    monkeypatch.setattr(circuit_breaker, "BREAKER_PATH", str(tmp_path / "circuit_breaker.sqlite"))
+    router.reiniciar()
+
+
+@pytest.fixture
+def sesion(monkeypatch):
+    def _instalar(respuestas):
+        falsa = _SesionFalsa(respuestas)
+        monkeypatch.setattr(llm, "_sesion", falsa)
+        monkeypatch.setattr(llm.time, "sleep", lambda s: None)
+        return falsa
+    return _instalar
+
+
+class TestClienteLLM:
+    """Tests para el cliente LLM compartido"""
+
+    def test_sesion_reutilizada(self, monkeypatch):
+        """Verifica que todas las llamadas comparten la misma sesión"""
+        monkeypatch.setattr(llm, "_sesion", None)
+        assert llm._get_sesion() is llm._get_sesion()
+
+    def test_respuesta_directa(self, sesion):
+        """Verifica que devuelve el texto del primer proveedor"""
+        falsa = sesion([_Respuesta(200, "hola")])
+        assert llm.completar("test") == "hola"
+        assert len(falsa.peticiones) == 1
+
+    def test_rate_limit_pasa_a_modelo_ligero(self, sesion, monkeypatch):
+        """Verifica que un rate limit desvía la llamada al modelo ligero sin esperar"""
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        falsa = sesion([_Respuesta(429), _Respuesta(200, "ok")])
+        assert llm.completar("test", agente="generator") == "ok"
+        assert falsa.peticiones[-1][1]["model"] == llm.MODELO_LIGERO
+
+    def test_fallback_gemini(self, sesion, monkeypatch):
+        """Verifica el fallback a Gemini cuando Groq falla"""
+        monkeypatch.setenv("GEMINI_API_KEY", "x")
+        falsa = sesion([_Respuesta(401), _Respuesta(200, "gemini")])
+        assert llm.completar("test") == "gemini"
+        assert "generativelanguage" in falsa.peticiones[-1][0]
+
+    def test_sin_proveedores_devuelve_none(self, sesion, monkeypatch):
+        """Verifica None cuando ningún proveedor responde"""
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        sesion([_Respuesta(500)] * 4)
+        assert llm.completar("test") is None
+
+
+class TestCircuitBreaker:
+    """Tests para el circuit breaker compartido entre procesos"""
+
+    def test_abre_tras_fallos_y_salta_el_proveedor(self, sesion, monkeypatch):
+        """Verifica que tras UMBRAL_FALLOS caídas no se vuelve a llamar a Groq"""
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        falsa = sesion([_Respuesta(500)] * 4)
+        assert llm.completar("test") is None
+        assert len(falsa.peticiones) == circuit_breaker.UMBRAL_FALLOS
+        assert circuit_breaker.estado("groq")["estado"] == circuit_breaker.ABIERTO
+        assert llm.completar("otra") is None
+        assert len(falsa.peticiones) == circuit_breaker.UMBRAL_FALLOS
+
+    def test_circuito_abierto_pasa_a_gemini(self, sesion, monkeypatch):
+        """Verifica que con Groq abierto se va directo a Gemini"""
+        monkeypatch.setenv("GEMINI_API_KEY", "x")
+        for _ in range(circuit_breaker.UMBRAL_FALLOS):
+            circuit_breaker.fallo("groq")
+        falsa = sesion([_Respuesta(200, "gemini")])
+        assert llm.completar("test") == "gemini"
+        assert len(falsa.peticiones) == 1 and "generativelanguage" in falsa.peticiones[0][0]
+
+    def test_semiabierto_una_prueba_y_cierra(self, monkeypatch):
+        """Verifica que al vencer el enfriamiento solo un llamador prueba y un éxito cierra"""
+        for _ in range(circuit_breaker.UMBRAL_FALLOS):
+            circuit_breaker.fallo("groq")
+        assert not circuit_breaker.permitir("groq")
+        ahora = circuit_breaker.time.time()
+        monkeypatch.setattr(circuit_breaker.time, "time", lambda: ahora + circuit_breaker.ENFRIAMIENTO + 1)
+        assert circuit_breaker.permitir("groq")
+        assert not circuit_breaker.permitir("groq")
+        assert circuit_breaker.fallo("groq")
+        assert circuit_breaker.estado("groq")["enfriamiento"] == circuit_breaker.ENFRIAMIENTO * 2
+        monkeypatch.setattr(circuit_breaker.time, "time", lambda: ahora + 10 * circuit_breaker.ENFRIAMIENTO)
+        assert circuit_breaker.permitir("groq")
+        circuit_breaker.exito("groq")
+        assert circuit_breaker.estado("groq")["estado"] == circuit_breaker.CERRADO
+
+
+class TestCacheLLM:
+    """Tests para la caché de respuestas LLM"""
+
+    def test_clave_depende_de_parametros(self):
+        """Verifica que temperatura, max_tokens y el modo JSON forman parte de la clave"""
+        msgs = [{"role": "user", "content": "hola"}]
+        base = llm_cache.calcular_clave("groq", "m", msgs, 0.3, 600)
+        assert base == llm_cache.calcular_clave("groq", "m", msgs, 0.3, 600)
+        assert base != llm_cache.calcular_clave("groq", "m", msgs, 0.2, 600)
+        assert base != llm_cache.calcular_clave("groq", "m", msgs, 0.3, 700)
+        assert base != llm_cache.calcular_clave("groq", "m", msgs, 0.3, 600, formato_json=True)
+
+    def test_segunda_llamada_desde_cache(self, sesion):
+        """Verifica que un prompt idéntico no vuelve a llamar al proveedor"""
+        falsa = sesion([_Respuesta(200, "evaluación")])
+        assert llm.completar("idea", agente="critic") == "evaluación"
+        assert llm.completar("idea", agente="critic") == "evaluación"
+        assert len(falsa.peticiones) == 1
+
+    def test_modo_json_no_comparte_cache_con_texto(self, sesion):
+        """Verifica que una respuesta de texto libre no se sirve a la misma petición en modo JSON"""
+        falsa = sesion([_Respuesta(200, "prosa"), _Respuesta(200, '{"a": 1}')])
+        assert llm.completar("idea", agente="critic") == "prosa"
+        assert llm.completar("idea", agente="critic", formato_json=True) == '{"a": 1}'
+        assert len(falsa.peticiones) == 2
+
+    def test_cache_false_fuerza_llamada(self, sesion):
+        """Verifica que cache=False ignora la respuesta guardada"""
+        falsa = sesion([_Respuesta(200, "a"), _Respuesta(200, "b")])
+        llm.completar("idea", agente="generator")
+        assert llm.completar("idea", agente="generator", cache=False) == "b"
+        assert len(falsa.peticiones) == 2
+
+    def test_expulsion_lru(self, monkeypatch):
+        """Verifica que se expulsan las entradas menos usadas al superar el tamaño"""
+        monkeypatch.setattr(llm_cache, "MAX_BYTES", 10)
+        llm_cache.guardar("vieja", "123456", "critic")
+        llm_cache.guardar("nueva", "123456", "critic")
+        assert llm_cache.obtener("vieja") is None
+        assert llm_cache.obtener("nueva") == "123456"
+
+
+class TestRateLimiter:
+    """Tests para el limitador compartido"""
+
+    def test_agota_peticiones_por_minuto(self, monkeypatch):
+        """Verifica que sin cupo no se concede la petición"""
+        monkeypatch.setitem(rate_limiter.LIMITES, ("groq", "m"), {"rpm": 2, "tpm": 1000})
+        assert rate_limiter.adquirir("groq", "m", 10, max_espera=0)
+        assert rate_limiter.adquirir("groq", "m", 10, max_espera=0)
+        assert not rate_limiter.adquirir("groq", "m", 10, max_espera=0)
+
+    def test_agota_tokens_por_minuto(self, monkeypatch):
+        """Verifica el presupuesto de tokens"""
+        monkeypatch.setitem(rate_limiter.LIMITES, ("groq", "m"), {"rpm": 100, "tpm": 1000})
+        assert rate_limiter.adquirir("groq", "m", 900, max_espera=0)
+        assert not rate_limiter.adquirir("groq", "m", 900, max_espera=0)
+        rate_limiter.ajustar("groq", "m", 900, 100)
+        assert rate_limiter.adquirir("groq", "m", 900, max_espera=0)
+
+    def test_ajustar_no_devuelve_mas_de_lo_reservado(self, monkeypatch):
+        """Verifica que una petición mayor que el tpm solo devuelve lo que se descontó"""
+        monkeypatch.setitem(rate_limiter.LIMITES, ("groq", "m"), {"rpm": 100, "tpm": 1000})
+        assert rate_limiter.adquirir("groq", "m", 5000, max_espera=0)
+        rate_limiter.ajustar("groq", "m", 5000, 900)
+        assert not rate_limiter.adquirir("groq", "m", 500, max_espera=0)
+
+    def test_penalizar_bloquea_modelo(self):
+        """Verifica que un 429 bloquea el modelo para el resto de llamadas"""
+        rate_limiter.penalizar("groq", "m", 60)
+        assert not rate_limiter.adquirir("groq", "m", 1, max_espera=0)
+        assert rate_limiter.adquirir("groq", "otro", 1, max_espera=0)
+
+    def test_contadores_de_concedidas_y_429(self):
+        """Verifica que se cuentan peticiones concedidas y 429 para todos los procesos"""
+        assert rate_limiter.contadores() == {"concedidas": 0, "limitados": 0}
+        rate_limiter.adquirir("groq", "m", 1, max_espera=0)
+        rate_limiter.adquirir("groq", "m", 1, max_espera=0)
+        rate_limiter.penalizar("groq", "m")
+        rate_limiter.adquirir("groq", "m", 1, max_espera=0)   # bloqueado: no cuenta
+        assert rate_limiter.contadores() == {"concedidas": 2, "limitados": 1}
+
+
+class TestTelemetria:
+    """Tests para la telemetría de llamadas LLM"""
+
+    def test_registra_llamadas_y_cache(self, sesion):
+        """Verifica que cada llamada deja tokens, modelo y estado en el fichero"""
+        sesion([_Respuesta(200, "hola")])
+        llm.completar("idea", agente="critic")
+        llm.completar("idea", agente="critic")
+        llamadas = [e for e in telemetria.leer() if e["tipo"] == "llamada"]
+        assert [e["estado"] for e in llamadas] == ["ok", "cache"]
+        assert llamadas[0]["tokens_prompt"] == 4 and llamadas[0]["tokens_respuesta"] == 6
+        assert llamadas[0]["modelo"] == llm.MODELO_PRINCIPAL and not llamadas[0]["fallback"]
+
+    def test_resumen_por_agente_y_tokens_por_idea(self, sesion, monkeypatch, capsys):
+        """Verifica percentiles, reintentos, parseo y tokens por idea aceptada"""
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        sesion([_Respuesta(500), _Respuesta(200, '{"a": 1}'), _Respuesta(200, "texto")])
+        llm.completar_json("json", agente="generator")
+        llm.completar("informe", agente="analyzer")
+        telemetria.registrar_idea("Idea", aceptada=True)
+        telemetria.registrar_idea("Otra", aceptada=False)
+
+        r = telemetria.resumir(telemetria.leer())
+        gen = r["agentes"]["generator"]
+        assert gen["llamadas"] == 1 and gen["reintentos"] == 1 and gen["fallback"] == 1
+        assert gen["parseos_ok"] == 1
+        assert r["ideas_aceptadas"] == 1 and r["tokens_por_idea"] == 20
+        assert telemetria.main([]) == 0
+        assert "analyzer" in capsys.readouterr().out
+        assert "Tokens/idea aceptada: <b>20</b>" in telemetria.resumen_status()
+
+    def test_ventana_se_lee_desde_el_final(self, monkeypatch):
+        """Verifica que leer con ventana recorre la cola del fichero y para al salir de ella"""
+        import json
+        import time
+        monkeypatch.setattr(telemetria, "BLOQUE", 64)
+        ahora = time.time()
+        with open(telemetria.METRICAS_PATH, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"ts": ahora, "tipo": "idea", "nombre": "perdida"}) + "\n")
+            for n in range(50):
+                f.write(json.dumps({"ts": ahora - 86400 * 3, "tipo": "idea", "nombre": f"vieja{n}"}) + "\n")
+            f.write("{rota\n")
+            for n in range(3):
+                f.write(json.dumps({"ts": ahora - n, "tipo": "idea", "nombre": f"nueva{n}"}) + "\n")
+            f.write('{"ts": ')   # línea a medio escribir por otro proceso
+        nombres = [e["nombre"] for e in telemetria.leer(ahora - 3600)]
+        assert nombres == ["nueva0", "nueva1", "nueva2"]
+        assert len(telemetria.leer()) == 54
+
+
+class TestRouter:
+    """Tests para el router de modelos"""
+
+    PRINCIPAL = ("groq", llm.MODELO_PRINCIPAL)
+    LIGERO    = ("groq", llm.MODELO_LIGERO)
+    GEMINI    = ("gemini", llm.MODELO_GEMINI)
+
+    def test_preferido_primero_si_esta_sano(self):
+        """Verifica que el modelo preferido va primero y luego el más barato"""
+        orden = router.ordenar("generator", self.PRINCIPAL, 100)
+        assert orden == [self.PRINCIPAL, self.LIGERO, self.GEMINI]
+
+    def test_nivel_minimo_excluye_modelo_ligero(self):
+        """Verifica que el informe nunca baja al modelo de 8b"""
+        assert self.LIGERO not in router.ordenar("analyzer", self.PRINCIPAL, 100)
+        assert self.GEMINI not in router.ordenar("analyzer", self.PRINCIPAL, 100, usar_gemini=False)
+
+    def test_errores_degradan_modelo(self):
+        """Verifica que una tasa de errores alta manda el modelo al final"""
+        for _ in range(router.MIN_MUESTRAS):
+            router.registrar(*self.PRINCIPAL, 1.0, False)
+        assert router.ordenar("generator", self.PRINCIPAL, 100)[-1] == self.PRINCIPAL
+        assert router.ordenar("analyzer", self.PRINCIPAL, 100)[0] == self.GEMINI
+
+    def test_latencia_y_cupo_remoto(self):
+        """Verifica p95 lento y cupo agotado según cabeceras x-ratelimit"""
+        for _ in range(10):
+            router.registrar(*self.PRINCIPAL, router.LATENCIA_P95_MAX + 1, True)
+        assert router.estado(*self.PRINCIPAL)["p95"] > router.LATENCIA_P95_MAX
+        assert router.ordenar("generator", self.PRINCIPAL, 100)[0] == self.LIGERO
+        router.registrar_cuota(*self.LIGERO, {
+            "x-ratelimit-remaining-requests": "0", "x-ratelimit-remaining-tokens": "5000",
+            "x-ratelimit-reset-requests": "2m59.5s",
+        })
+        assert router.ordenar("generator", self.PRINCIPAL, 100)[0] == self.GEMINI
+
+
+class TestStreaming:
+    """Tests para el streaming con parseo JSON incremental"""
+
+    TROZOS = ['```json\n{"nom', 'bre": "Idea\\"X\\"", ', '"tags": ["a", "b"], ', '"descripcion": "larga"', '}']
+
+    def test_parser_extrae_campos_cerrados(self):
+        """Verifica que los campos aparecen en cuanto se cierra su valor"""
+        parser = ParserIncremental()
+        acumulado = ""
+        vistos = []
+        for trozo in self.TROZOS:
+            acumulado += trozo
+            vistos.append(dict(parser.alimentar(acumulado)))
+        assert vistos[0] == {}
+        assert vistos[1] == {"nombre": 'Idea"X"'}
+        assert vistos[-1] == {"nombre": 'Idea"X"', "descripcion": "larga"}
+
+    def test_stream_completo(self, sesion):
+        """Verifica que sin corte se devuelve el texto completo"""
+        sesion([_RespuestaStream(self.TROZOS)])
+        texto = llm.completar("idea", al_fragmento=vigilar_campo("nombre", lambda n: True))
+        assert texto == "".join(self.TROZOS)
+
+    def test_corta_stream_en_nombre_repetido(self, sesion):
+        """Verifica que un nombre repetido corta el stream antes de terminar"""
+        respuesta = _RespuestaStream(self.TROZOS)
+        sesion([respuesta])
+        with pytest.raises(llm.StreamAbortado):
+            llm.completar("idea", agente="generator",
+                          al_fragmento=vigilar_campo("nombre", lambda n: False))
+        assert respuesta.leidos == 2
+        assert respuesta.cerrada
+        assert llm_cache.obtener(llm_cache.calcular_clave(
+            "groq", llm.MODELO_PRINCIPAL, [{"role": "user", "content": "idea"}], 0.7, 1024)) is None
+
+
+class TestModoJSON:
+    """Tests para el modo JSON, la reparación local y los esquemas"""
+
+    def test_repara_fences_y_comas(self):
+        """Verifica que fences, texto extra y comas finales se reparan sin LLM"""
+        texto = 'Aquí tienes:\n```json\n{"a": [1, 2,], "b": "x",}\n```\nSaludos'
+        assert parsear_json(texto) == {"a": [1, 2], "b": "x"}
+
+    def test_repara_salida_cortada(self):
+        """Verifica que una respuesta cortada por max_tokens se cierra"""
+        assert parsear_json('{"nombre": "Idea", "tags": ["a", "b') == {"nombre": "Idea", "tags": ["a", "b"]}
+        assert parsear_json('{"nombre": "Idea", "descrip') == {"nombre": "Idea"}
+
+    def test_valida_y_convierte_numeros(self):
+        """Verifica la validación por esquema y la conversión de números en texto"""
+        critica = {"score_critico": "72", "viral_score": 50, "score_generador": 60, "score_money": 55}
+        assert esquemas.validar(critica, esquemas.CRITICA) == []
+        assert critica["score_critico"] == 72
+        assert esquemas.validar({"score_critico": 70}, esquemas.CRITICA)
+
+    def test_pide_modo_json_y_repara_sin_reintentar(self, sesion):
+        """Verifica que se pide response_format y una respuesta reparable no repite llamada"""
+        falsa = sesion([_Respuesta(200, '```json\n{"inversion_mvp_usd": 5000, "tiempo_desarrollo_semanas": 6,}\n```')])
+        datos = llm.completar_json("estima en json", esquema=esquemas.ESTIMACION)
+        assert datos == {"inversion_mvp_usd": 5000, "tiempo_desarrollo_semanas": 6}
+        assert falsa.peticiones[0][1]["response_format"] == {"type": "json_object"}
+        assert len(falsa.peticiones) == 1
+
+    def test_reintenta_si_no_cumple_esquema(self, sesion):
+        """Verifica que una respuesta fuera de esquema provoca un único reintento"""
+        falsa = sesion([_Respuesta(200, '{"otra": 1}'),
+                        _Respuesta(200, '{"inversion_mvp_usd": 1, "tiempo_desarrollo_semanas": 2}')])
+        datos = llm.completar_json("estima en json", esquema=esquemas.ESTIMACION, agente="estimation")
+        assert datos["tiempo_desarrollo_semanas"] == 2
+        assert len(falsa.peticiones) == 2
+
+
+class _RespuestaGemini(_RespuestaStream):
+    """Respuesta SSE de Gemini troceada."""
+
+    def iter_lines(self, decode_unicode=False):
+        import json
+        for trozo in self.trozos:
+            self.leidos += 1
+            yield "data: " + json.dumps({"candidates": [{"content": {"parts": [{"text": trozo}]}}]})
+
+
+class _SesionLenta:
+    """Groq no contesta hasta `liberar`; Gemini contesta al momento."""
+
+    def __init__(self, groq, gemini, groq_lento=True):
+        import threading
+        self.liberar = threading.Event()
+        if not groq_lento:
+            self.liberar.set()
+        self.groq, self.gemini = groq, gemini
+        self.urls = []
+
+    def post(self, url, headers=None, json=None, timeout=None, stream=False):
+        self.urls.append(url)
+        if "groq" in url:
+            self.liberar.wait(5)
+            return self.groq
+        return self.gemini
+
+
+class TestHedging:
+    """Tests para las peticiones duplicadas entre Groq y Gemini"""
+
+    @pytest.fixture(autouse=True)
+    def entorno(self, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "x")
+        monkeypatch.setattr(llm, "HEDGE_ESPERA", 0.05)
+
+    def test_activacion_por_variable(self, monkeypatch):
+        """Verifica que LLM_HEDGE activa el modo solo para los agentes indicados"""
+        monkeypatch.setenv("LLM_HEDGE", "analyzer, report")
+        assert llm.hedge_activo("analyzer") and not llm.hedge_activo("critic")
+        assert llm.hedge_activo("critic", hedge=True) and not llm.hedge_activo("analyzer", hedge=False)
+        monkeypatch.delenv("LLM_HEDGE")
+        assert not llm.hedge_activo("analyzer")
+
+    def test_gana_el_secundario_y_se_corta_el_primario(self, monkeypatch):
+        """Verifica que un primario sin bytes se duplica en Gemini y se cancela al perder"""
+        import time
+        groq = _RespuestaStream(["lento", " informe"])
+        falsa = _SesionLenta(groq, _RespuestaGemini(["informe ", "rápido"]))
+        monkeypatch.setattr(llm, "_sesion", falsa)
+        texto = llm.completar("informe", agente="analyzer", hedge=True)
+        assert texto == "informe rápido"
+        falsa.liberar.set()
+        for _ in range(100):
+            if groq.cerrada:
+                break
+            time.sleep(0.01)
+        assert groq.cerrada and groq.leidos == 1
+        evento = telemetria.leer()[-1]
+        assert evento["proveedor"] == "gemini" and evento["hedge"] is True
+
+    def test_primario_rapido_no_duplica(self, monkeypatch):
+        """Verifica que si el primario responde a tiempo no se llama a Gemini"""
+        falsa = _SesionLenta(_RespuestaStream(["informe"]), _RespuestaGemini(["otro"]), groq_lento=False)
+        monkeypatch.setattr(llm, "_sesion", falsa)
+        assert llm.completar("informe", agente="analyzer", hedge=True) == "informe"
+        assert len(falsa.urls) == 1
+        assert router.estado("groq", llm.MODELO_PRINCIPAL)["muestras"] == 1
+
+    def test_perdedora_sin_bytes_se_cierra_y_devuelve_tokens(self, monkeypatch):
+        """Verifica que la petición que pierde esperando el primer byte se cierra y no gasta cupo"""
+        import threading
+        import time
+
+        class _RespuestaColgada(_RespuestaStream):
+            def __init__(self):
+                super().__init__([])
+                self.cierre = threading.Event()
+
+            def iter_lines(self, decode_unicode=False):
+                import requests
+                self.cierre.wait(5)
+                raise requests.ConnectionError("conexión cerrada")
+                yield
+
+            def close(self):
+                self.cerrada = True
+                self.cierre.set()
+
+        groq = _RespuestaColgada()
+        monkeypatch.setattr(llm, "_sesion", _SesionLenta(groq, _RespuestaGemini(["informe"]), groq_lento=False))
+        inicio = time.perf_counter()
+        assert llm.completar("informe", agente="analyzer", hedge=True) == "informe"
+        for _ in range(100):
+            if groq.cerrada:
+                break
+            time.sleep(0.01)
+        assert groq.cerrada and time.perf_counter() - inicio < 2
+        time.sleep(0.05)   # el hilo perdedor devuelve su reserva al salir
+        con = rate_limiter._conectar()
+        try:
+            limite = rate_limiter._limite("groq", llm.MODELO_PRINCIPAL)
+            tokens = rate_limiter._leer_bucket(con, f"groq:{llm.MODELO_PRINCIPAL}", limite, time.time())[1]
+        finally:
+            con.close()
+        assert tokens > limite["tpm"] - 100
+        assert circuit_breaker.permitir("groq")
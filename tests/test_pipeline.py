@@ -0,0 +1,160 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from agents import pipeline
+
+
+def _dormir(segundos, valor=None):
+    def funcion(ctx):
+        time.sleep(segundos)
+        return valor
+    return funcion
+
+
+def _fallar(ctx):
+    raise RuntimeError("rama rota")
+
+
+class TestPipeline:
+    """Tests para el ejecutor de etapas en grafo"""
+
+    def test_ramas_en_paralelo_y_fallo_aislado(self):
+        """Verifica que las ramas corren a la vez y un fallo no bloquea a sus hermanas"""
+        etapas = [
+            pipeline.etapa("guardar", lambda ctx: "slug"),
+            pipeline.etapa("landing", _dormir(0.3, "l"), depende=["guardar"]),
+            pipeline.etapa("informe", _dormir(0.3, "i"), depende=["guardar"]),
+            pipeline.etapa("notion", _fallar, depende=["guardar"]),
+            pipeline.etapa("aviso", lambda ctx: True, depende=["notion"]),
+            pipeline.etapa("telegram", _dormir(0.3, True), depende=["guardar"]),
+        ]
+        r = pipeline.ejecutar(etapas)
+        assert r["segundos"] < 0.8
+        assert r["contexto"]["informe"] == "i" and r["contexto"]["telegram"] is True
+        assert r["etapas"]["notion"]["estado"] == pipeline.ERROR
+        assert r["etapas"]["aviso"]["estado"] == pipeline.OMITIDA
+        assert r["etapas"]["landing"]["estado"] == pipeline.OK
+
+    def test_detener_y_opcional(self):
+        """Verifica que Detener omite lo pendiente y que una etapa opcional no bloquea"""
+        def rechazar(ctx):
+            raise pipeline.Detener("rechazada")
+        etapas = [
+            pipeline.etapa("tendencias", _fallar, opcional=True),
+            pipeline.etapa("generar", lambda ctx: "idea", depende=["tendencias"]),
+            pipeline.etapa("analisis", rechazar, depende=["generar"]),
+            pipeline.etapa("guardar", lambda ctx: "slug", depende=["analisis"]),
+        ]
+        r = pipeline.ejecutar(etapas)
+        assert r["contexto"]["generar"] == "idea"
+        assert r["detenido"] == "rechazada"
+        assert r["etapas"]["guardar"]["estado"] == pipeline.OMITIDA
+
+    def test_grafo_invalido(self):
+        """Verifica que se rechazan ciclos y dependencias inexistentes"""
+        with pytest.raises(ValueError):
+            pipeline.validar([pipeline.etapa("a", None, ["b"]), pipeline.etapa("b", None, ["a"])])
+        with pytest.raises(ValueError):
+            pipeline.validar([pipeline.etapa("a", None, ["x"])])
+
+    def test_grafo_del_workflow(self):
+        """Verifica que el grafo de main_workflow es válido y abre cuatro ramas tras guardar"""
+        import main_workflow
+        grafo = main_workflow.construir_grafo()
+        pipeline.validar(grafo)
+        ramas = [e["nombre"] for e in grafo if e["depende"] == ["guardar"]]
+        assert sorted(ramas) == ["informe", "landing", "notion", "telegram"]
+
+    def test_etapa_generar_del_workflow(self, monkeypatch, tmp_path):
+        """Verifica que la etapa generar real produce la idea evitando las ya registradas"""
+        import main_workflow
+        from agents import idea_store, knowledge_base, llm
+        monkeypatch.setattr(knowledge_base, "KB_PATH", str(tmp_path / "kb.db"))
+        monkeypatch.setattr(knowledge_base, "KB_LEGADO", str(tmp_path / "kb.json"))
+        monkeypatch.setattr(idea_store, "IDEAS_PATH", str(tmp_path / "ideas.jsonl"))
+        monkeypatch.setattr(idea_store, "INDICE_PATH", str(tmp_path / "ideas.jsonl.idx"))
+        monkeypatch.setattr(idea_store, "LEGADO_PATH", str(tmp_path / "ideas.json"))
+        monkeypatch.setattr(idea_store, "_estado", None)
+        idea_store.anadir({"nombre": "FacturaYa"})
+        respuestas = iter([{"nombre": "FacturaYa"}, {"nombre": "NuevaIdea", "problema": "p"}])
+        monkeypatch.setattr(llm, "completar_json", lambda prompt, **kwargs: next(respuestas))
+
+        grafo = [e for e in main_workflow.construir_grafo() if e["nombre"] in ("tendencias", "generar")]
+        r = pipeline.ejecutar(grafo, hechas=["tendencias"])
+        assert r["etapas"]["generar"]["estado"] == pipeline.OK
+        assert r["contexto"]["idea"]["nombre"] == "NuevaIdea"
+
+
+class TestCheckpoints:
+    """Tests para la reanudación con checkpoints durables"""
+
+    @pytest.fixture(autouse=True)
+    def _bd_temporal(self, tmp_path, monkeypatch):
+        from agents import checkpoints
+        monkeypatch.setattr(checkpoints, "CHECKPOINTS_PATH", str(tmp_path / "checkpoints.sqlite"))
+
+    def test_reanuda_desde_la_etapa_pendiente(self, monkeypatch):
+        """Verifica que tras un fallo se reanuda sin repetir las etapas ya hechas"""
+        from agents import checkpoints
+        monkeypatch.setattr(checkpoints, "RESERVA", 0)   # como si el proceso anterior hubiera muerto
+        llamadas = []
+
+        def generar(ctx):
+            llamadas.append("generar")
+            ctx["idea"] = {"nombre": "Idea X", "problema": "p"}
+
+        def notion(ctx):
+            llamadas.append("notion")
+            if llamadas.count("notion") == 1:
+                raise RuntimeError("timeout")
+            return "url"
+
+        def guardar(ctx, completadas):
+            checkpoints.guardar(checkpoints.huella(ctx["idea"]), "workflow", completadas, ctx)
+
+        grafo = [pipeline.etapa("generar", generar),
+                 pipeline.etapa("notion", notion, depende=["generar"])]
+        pipeline.ejecutar(grafo, al_completar=guardar)
+
+        trabajo = checkpoints.reclamar("workflow")[0]
+        assert trabajo["etapas"] == ["generar"]
+        r = pipeline.ejecutar(grafo, contexto=trabajo["datos"], hechas=trabajo["etapas"])
+        assert r["etapas"]["notion"]["estado"] == pipeline.OK
+        assert llamadas == ["generar", "notion", "notion"]
+
+    def test_reserva_y_abandono(self, monkeypatch):
+        """Verifica que un trabajo reclamado no se reparte dos veces y se abandona al agotar reanudaciones"""
+        from agents import checkpoints
+        monkeypatch.setattr(checkpoints, "RESERVA", 0)
+        clave = checkpoints.huella({"nombre": "Y"})
+        checkpoints.guardar(clave, "batch", ["generar"], {"idea": {"nombre": "Y"}})
+        for _ in range(checkpoints.MAX_REANUDACIONES):
+            assert len(checkpoints.reclamar("batch")) == 1
+        assert checkpoints.reclamar("batch") == []
+        assert checkpoints.estado(clave)["estado"] == checkpoints.ABANDONADO
+
+        monkeypatch.setattr(checkpoints, "RESERVA", 600)
+        otra = checkpoints.huella({"nombre": "Z"})
+        checkpoints.guardar(otra, "batch", [], {})
+        checkpoints.guardar(otra, "batch", [], {})   # reserva refrescada
+        assert checkpoints.reclamar("batch") == []
+        checkpoints.cerrar(otra)
+        assert checkpoints.estado(otra)["estado"] == checkpoints.COMPLETADO
+
+    def test_guardar_reabre_un_trabajo_cerrado(self, monkeypatch):
+        """Verifica que volver a guardar una idea ya cerrada la deja reclamable otra vez"""
+        from agents import checkpoints
+        monkeypatch.setattr(checkpoints, "RESERVA", 0)
+        clave = checkpoints.huella({"nombre": "W", "problema": "p"})
+        checkpoints.guardar(clave, "workflow", ["generar"], {})
+        for _ in range(checkpoints.MAX_REANUDACIONES):
+            checkpoints.reclamar("workflow")
+        checkpoints.cerrar(clave, checkpoints.DESCARTADO)
+        checkpoints.guardar(clave, "workflow", ["generar"], {"idea": {"nombre": "W"}})
+        assert checkpoints.estado(clave)["estado"] == checkpoints.PENDIENTE
+        assert [t["huella"] for t in checkpoints.reclamar("workflow")] == [clave]
@@ -0,0 +1,42 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath('.'))
+
+import run_batch
+from agents import knowledge_base, prompt_builder
+
+
+def _kb(n):
+    return {
+        "ideas_previas": [f"Idea{i}" for i in range(n, 0, -1)],
+        "score_por_vertical": [(f"Vertical{i}", 90 - i) for i in range(min(n, 40))],
+        "mejores_verticales": [], "tags_exitosos": [f"tag{i}" for i in range(20)],
+        "tasa_exito": "40%", "total_analizadas": n,
+    }
+
+
+class TestPromptBuilder:
+    """Tests para el montaje de prompts con presupuesto"""
+
+    def test_respeta_presupuesto_y_prioridad(self):
+        """Verifica el recorte al presupuesto empezando por lo más útil"""
+        contexto = prompt_builder.construir_contexto([
+            prompt_builder.seccion("Tags", ["t1", "t2"], prioridad=2),
+            prompt_builder.seccion("Nombres", [f"Nombre{i}" for i in range(500)], prioridad=1, tope=0.5),
+        ], presupuesto=100)
+        assert prompt_builder.tokens(contexto) <= 100
+        assert contexto.startswith("- Nombres: Nombre0, Nombre1")
+        assert "- Tags: t1, t2" in contexto
+
+    def test_prompt_plano_aunque_crezca_la_kb(self, monkeypatch):
+        """Verifica que el tamaño del prompt no crece con el historial"""
+        tamanos = []
+        for n in (10, 1000, 100000):
+            monkeypatch.setattr(knowledge_base, "get_items_contexto", lambda n=n: _kb(n))
+            contexto = prompt_builder.contexto_kb("batch", tendencias=[f"tendencia {i}" for i in range(50)])
+            assert prompt_builder.tokens(contexto) <= prompt_builder.PRESUPUESTOS["batch"]
+            assert f"Idea{n}" in contexto   # la más reciente siempre entra
+            tamanos.append(prompt_builder.tokens(run_batch.get_prompt_idea(contexto)))
+        fijo = prompt_builder.tokens(run_batch.get_prompt_idea(""))
+        assert max(tamanos) <= fijo + prompt_builder.PRESUPUESTOS["batch"] + 1
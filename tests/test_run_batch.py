@@ -0,0 +1,88 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath('.'))
+
+import run_batch
+from agents import critic_agent, llm, score_predictor
+
+
+def _idea(nombre, ejecutabilidad=80):
+    return {"nombre": nombre, "problema": "p", "solucion": "s",
+            "scores": {"generador": 80, "ejecutabilidad": ejecutabilidad, "timing": 70}}
+
+
+class TestModoLote:
+    """Tests para la generación y crítica en lote"""
+
+    def test_lote_una_llamada_y_dedup(self, monkeypatch):
+        """Verifica que el lote sale de una llamada y descarta repetidas"""
+        llamadas = []
+
+        def falso(prompt, **kwargs):
+            llamadas.append(kwargs["agente"])
+            return {"ideas": [_idea("FacturaYa"), _idea("Factura Pro"), _idea("NuevaIdea"), _idea("NuevaIdea")]}
+
+        monkeypatch.setattr(llm, "completar_json", falso)
+        ideas = run_batch.generar_lote("", 4, previas=[{"nombre": "FacturaYa"}])
+        assert [i["nombre"] for i in ideas] == ["NuevaIdea"]
+        assert llamadas == ["batch"]
+
+    def test_critica_conjunta_y_top_k(self, monkeypatch, tmp_path):
+        """Verifica una sola crítica para todo el lote y que solo pasan las top_k aprobadas"""
+        llamadas = []
+
+        def falso(prompt, **kwargs):
+            llamadas.append(kwargs["agente"])
+            return {"evaluaciones": [
+                {"indice": 0, "score_critico": 60, "viral_score": 50, "score_generador": 70, "score_money": 60},
+                {"indice": 1, "score_critico": 90, "viral_score": 70, "score_generador": 80, "score_money": 85},
+                {"indice": 2, "score_critico": 30, "viral_score": 40, "score_generador": 50, "score_money": 20},
+                {"indice": 3, "score_critico": 75, "viral_score": 60, "score_generador": 80, "score_money": 70},
+            ]}
+
+        monkeypatch.setattr(llm, "completar_json", falso)
+        monkeypatch.setattr(critic_agent, "load_config", lambda: {"umbral_critico": 55})
+        monkeypatch.setattr(score_predictor, "PREDICTOR_PATH", str(tmp_path / "predictor.sqlite"))
+        ideas = [_idea("A"), _idea("B"), _idea("C"), _idea("D")]
+        top = run_batch.seleccionar_top(ideas, top_k=2)
+        assert [i["nombre"] for i in top] == ["B", "D"]
+        assert top[0]["scores"]["critico"] == 90 and top[0]["score_critico"] == 90
+        assert llamadas == ["critic"]
+
+    def test_sin_critica_no_se_aprueba(self, monkeypatch, tmp_path):
+        """Verifica que una idea que la crítica del lote no evalúa queda fuera del top"""
+        def falso(prompt, **kwargs):
+            return {"evaluaciones": [
+                {"indice": 0, "score_critico": 80, "viral_score": 60, "score_generador": 70, "score_money": 70},
+            ]}
+
+        monkeypatch.setattr(llm, "completar_json", falso)
+        monkeypatch.setattr(critic_agent, "load_config", lambda: {"umbral_critico": 55})
+        monkeypatch.setattr(score_predictor, "PREDICTOR_PATH", str(tmp_path / "predictor.sqlite"))
+        top = run_batch.seleccionar_top([_idea("A"), _idea("B")], top_k=2)
+        assert [i["nombre"] for i in top] == ["A"]
+
+
+class TestModoIdea:
+    """Tests para la generación de una idea completa"""
+
+    def test_idea_repetida_de_la_cache_se_regenera(self, monkeypatch, tmp_path):
+        """Verifica que una idea repetida servida por la caché (sin stream) se pide de nuevo sin caché"""
+        from agents import checkpoints, knowledge_base, prompt_builder, trend_scout
+        monkeypatch.setattr(checkpoints, "CHECKPOINTS_PATH", str(tmp_path / "checkpoints.sqlite"))
+        monkeypatch.setattr(trend_scout, "actualizar_tendencias", lambda: None, raising=False)
+        monkeypatch.setattr(trend_scout, "get_tendencias", lambda: [], raising=False)
+        monkeypatch.setattr(prompt_builder, "contexto_kb", lambda agente, **kwargs: "")
+        monkeypatch.setattr(knowledge_base, "get_nombres_previos", lambda: ["FacturaYa"])
+        llamadas = []
+
+        def falso(prompt, **kwargs):
+            llamadas.append(kwargs["cache"])
+            return _idea("FacturaYa" if kwargs["cache"] else "NuevaIdea")
+
+        monkeypatch.setattr(llm, "completar_json", falso)
+        monkeypatch.setattr(run_batch, "publicar", lambda idea, hechas=("generar",): {"ok": True, "nombre": idea["nombre"]})
+        r = run_batch.ejecutar_batch()
+        assert [p["nombre"] for p in r["publicadas"]] == ["NuevaIdea"]
+        assert llamadas == [True, False]
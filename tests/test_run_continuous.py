@@ -0,0 +1,85 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath('.'))
+
+import run_continuous
+from agents import cuota_diaria, rate_limiter
+
+
+@pytest.fixture(autouse=True)
+def _rutas_temporales(tmp_path, monkeypatch):
+    monkeypatch.setattr(cuota_diaria, "CUOTA_PATH", str(tmp_path / "cuota.sqlite"))
+    monkeypatch.setattr(rate_limiter, "LIMITER_PATH", str(tmp_path / "limiter.sqlite"))
+    monkeypatch.setattr(run_continuous, "LOG_FILE", str(tmp_path / "system.log"))
+
+
+class TestCuotaDiaria:
+    """Tests para el contador atómico del límite diario"""
+
+    def test_no_se_pasa_con_hilos_concurrentes(self):
+        """Verifica que con muchas reservas a la vez solo se conceden `limite`"""
+        concedidas = []
+        hilos = [threading.Thread(target=lambda: concedidas.append(cuota_diaria.reservar(5)))
+                 for _ in range(20)]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        assert sum(d is not None for d in concedidas) == 5
+        assert cuota_diaria.usadas() == 5
+
+        cuota_diaria.liberar(cuota_diaria.hoy())
+        assert cuota_diaria.reservar(5) is not None
+        assert cuota_diaria.reservar(5) is None
+
+
+class TestControlAIMD:
+    """Tests para la concurrencia adaptativa de run_continuous"""
+
+    def test_sube_de_uno_en_uno_y_se_parte_con_429(self, monkeypatch):
+        """Verifica el aumento aditivo con pocos 429 y la reducción a la mitad con muchos"""
+        totales = {"concedidas": 0, "limitados": 0}
+        monkeypatch.setattr(rate_limiter, "contadores", lambda: dict(totales))
+        control = run_continuous.ControlAIMD(maximo=4)
+        ahora = control._desde
+
+        for _ in range(5):
+            ahora += run_continuous.VENTANA_AIMD
+            totales["concedidas"] += 50
+            control.ajustar(ahora)
+        assert control.limite == 4
+
+        ahora += run_continuous.VENTANA_AIMD
+        totales["concedidas"] += 50
+        totales["limitados"] += 10
+        assert control.ajustar(ahora) == 2
+        assert control.ajustar(ahora + 1) == 2   # dentro de la ventana no cambia
+
+
+class TestWorker:
+    """Tests para el bucle de los workers del modo --workers"""
+
+    def _ejecutar(self, monkeypatch, publicadas):
+        parar = threading.Event()
+
+        class PoolFalso:
+            def ejecutar(self, modulo, funcion, timeout):
+                parar.set()
+                return {"estado": "ok", "resultado": {"publicadas": publicadas}, "error": "", "segundos": 1}
+
+        monkeypatch.setattr(run_continuous, "DAILY_LIMIT", 3)
+        run_continuous._worker(1, PoolFalso(), run_continuous.ControlAIMD(1), parar)
+
+    def test_cada_idea_publicada_ocupa_su_plaza(self, monkeypatch):
+        """Verifica que las ideas reanudadas también cuentan y sin pasar del límite"""
+        self._ejecutar(monkeypatch, [{"ok": True, "nombre": n} for n in "ABCD"])
+        assert cuota_diaria.usadas() == 3
+
+    def test_publicaciones_fallidas_devuelven_la_plaza(self, monkeypatch):
+        """Verifica que un resultado con solo publicaciones fallidas no gasta cupo"""
+        self._ejecutar(monkeypatch, [{"ok": False, "nombre": "A"}])
+        assert cuota_diaria.usadas() == 0
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import threading
+from datetime import datetime
+
+import pytz
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from agents import scheduler
+
+
+def _arrancar(plan):
+    hilo = threading.Thread(target=plan.ejecutar, daemon=True)
+    hilo.start()
+    return hilo
+
+
+class TestPlanificador:
+    """Tests para el planificador de tareas por eventos"""
+
+    def test_tarea_larga_no_retrasa_a_la_corta(self):
+        """Verifica que cada tarea corre en su hilo y el solape cuenta como ejecución perdida"""
+        plan = scheduler.Planificador(log=lambda m: None)
+        cortas = []
+        plan.cada("lenta", 0.1, lambda: time.sleep(0.35))
+        plan.cada("corta", 0.05, lambda: cortas.append(time.time()))
+        hilo = _arrancar(plan)
+        time.sleep(0.42)
+        plan.detener()
+        hilo.join(1)
+
+        estado = plan.estado()
+        assert len(cortas) >= 7
+        assert estado["lenta"]["ejecuciones"] == 1
+        assert estado["lenta"]["perdidas"] >= 2
+        assert estado["lenta"]["historial_perdidas"][0]["motivo"] == "la anterior sigue en curso"
+
+    def test_deriva_compensada_y_retraso(self):
+        """Verifica que el siguiente turno sale de la hora programada y los huecos se anotan"""
+        plan = scheduler.Planificador(log=lambda m: None)
+        plan.cada("t", 10, lambda: None)
+        tarea = plan._tareas["t"]
+        programada = time.time() - 0.5
+        plan._reprogramar(tarea, programada)
+        assert tarea["proximo"] == programada + 10
+        assert tarea["perdidas"] == 0
+
+        plan._reprogramar(tarea, time.time() - 35)   # p. ej. tras una suspensión
+        assert tarea["perdidas"] == 3
+        assert 0 < tarea["proximo"] - time.time() <= 10
+
+    def test_proxima_diaria_con_cambio_de_hora(self):
+        """Verifica el cálculo de la hora diaria en la zona indicada, también en cambio de hora"""
+        zona = pytz.timezone("Europe/Madrid")
+        antes = zona.localize(datetime(2026, 3, 28, 9, 0)).timestamp()
+        siguiente = datetime.fromtimestamp(scheduler.proxima_diaria(8, 0, antes, zona), zona)
+        assert (siguiente.day, siguiente.hour, siguiente.minute) == (29, 8, 0)
+        assert siguiente.utcoffset().total_seconds() == 7200
+
+        temprano = zona.localize(datetime(2026, 3, 29, 7, 30)).timestamp()
+        assert scheduler.proxima_diaria(8, 0, temprano, zona) - temprano == 1800
@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import random
+
+import pytest
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from agents import score_predictor
+
+
+@pytest.fixture(autouse=True)
+def _modelo_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(score_predictor, "PREDICTOR_PATH", str(tmp_path / "predictor.sqlite"))
+    monkeypatch.setattr(score_predictor, "_cache", {"n": -1, "pesos": None, "rmse": None, "leido": 0.0})
+
+
+def _idea(i, buena):
+    if buena:
+        return {"nombre": f"Facturacion {i}", "problema": "autonomos pierden horas con facturas",
+                "solucion": "automatiza facturas y cobros", "vertical": "fintech", "tipo": "B2B",
+                "tags": ["saas"], "scores": {"generador": 80, "ejecutabilidad": 85}, "score_critico": 80}
+    return {"nombre": f"Red social {i}", "problema": "gente aburrida sin amigos",
+            "solucion": "otra red social generalista", "vertical": "social", "tipo": "B2C",
+            "tags": ["viral"], "scores": {"generador": 50, "ejecutabilidad": 40}, "score_critico": 30}
+
+
+class TestScorePredictor:
+    """Tests para el predictor local del score del crítico"""
+
+    def test_aprende_incrementalmente_y_descarta(self, monkeypatch):
+        """Verifica que tras MIN_MUESTRAS críticas separa ideas buenas y malas y descarta las malas"""
+        random.seed(1)
+        nuevas = [_idea(i, i % 2 == 0) for i in range(score_predictor.MIN_MUESTRAS)]
+        assert score_predictor.aprender(nuevas[:10]) == 10
+        assert score_predictor.predecir(_idea(99, True)) is None   # aún pocas críticas
+        for idea in nuevas[10:]:
+            score_predictor.aprender(idea)
+
+        buena = score_predictor.predecir(_idea(100, True))
+        mala = score_predictor.predecir(_idea(101, False))
+        assert buena["muestras"] == score_predictor.MIN_MUESTRAS
+        assert buena["score"] > 70 and mala["score"] < 40
+
+        monkeypatch.setattr(score_predictor, "EXPLORACION", 0)
+        assert score_predictor.descartar(_idea(102, False), umbral=55)
+        assert not score_predictor.descartar(_idea(103, True), umbral=55)
+
+    def test_ignora_criticas_por_defecto_y_prediccion_rapida(self):
+        """Verifica que las críticas de relleno no entrenan y que predecir cuesta microsegundos"""
+        relleno = {**_idea(0, True), "critique": {"score_critico": 65, "por_defecto": True}}
+        relleno.pop("score_critico")
+        assert score_predictor.aprender(relleno) == 0
+
+        score_predictor.aprender([_idea(i, i % 2 == 0) for i in range(40)])
+        idea = _idea(200, True)
+        score_predictor.predecir(idea)
+        inicio = time.perf_counter()
+        for _ in range(200):
+            score_predictor.predecir(idea)
+        assert (time.perf_counter() - inicio) / 200 < 0.001
@@ -0,0 +1,74 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from agents import cola_csv, storage
+
+
+class TestStorage:
+    """Tests para la escritura segura de ficheros compartidos"""
+
+    def test_escritura_atomica_conserva_el_original_si_falla(self, tmp_path):
+        """Verifica que un error a mitad de escritura deja el fichero anterior intacto y sin temporales"""
+        ruta = str(tmp_path / "datos.json")
+        storage.escribir_json(ruta, {"v": 1})
+        with pytest.raises(RuntimeError):
+            with storage.atomico(ruta) as f:
+                f.write('{"v": ')
+                raise RuntimeError("corte")
+        assert storage.leer_json(ruta)[0] == {"v": 1}
+        assert sorted(os.listdir(tmp_path)) == ["datos.json", "datos.json.lock"]
+
+    def test_version_optimista(self, tmp_path):
+        """Verifica que escribir con una versión desfasada lanza Conflicto"""
+        ruta = str(tmp_path / "datos.json")
+        datos, version = storage.leer_json(ruta, {"n": 0})
+        assert version is None
+        nueva = storage.escribir_json(ruta, {"n": 1}, version=version)
+        with pytest.raises(storage.Conflicto):
+            storage.escribir_json(ruta, {"n": 99}, version=version)   # otro escritor llegó antes
+        storage.escribir_json(ruta, {"n": 2}, version=nueva)
+        assert storage.leer_json(ruta)[0] == {"n": 2}
+
+    def test_actualizaciones_concurrentes_no_se_pierden(self, tmp_path, monkeypatch):
+        """Verifica que leer-modificar-escribir desde varios hilos no pierde incrementos"""
+        monkeypatch.setattr(storage, "FSYNC", "nunca")
+        ruta = str(tmp_path / "contador.json")
+
+        def sumar():
+            for _ in range(20):
+                storage.actualizar_json(ruta, lambda d: {"n": d["n"] + 1}, {"n": 0})
+
+        hilos = [threading.Thread(target=sumar) for _ in range(5)]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        assert storage.leer_json(ruta)[0] == {"n": 100}
+
+    def test_bloqueo_reentrante_en_el_mismo_hilo(self, tmp_path):
+        """Verifica que un hilo puede volver a tomar el bloqueo que ya tiene"""
+        ruta = str(tmp_path / "datos.json")
+        with storage.bloqueo(ruta):
+            storage.escribir_json(ruta, [1])
+        assert storage.leer_json(ruta)[0] == [1]
+
+    def test_cola_conserva_lo_encolado_durante_el_reintento(self, tmp_path, monkeypatch):
+        """Verifica que aplicar resultados de la cola no borra filas añadidas mientras se procesaba"""
+        monkeypatch.setattr(cola_csv, "COLA_PATH", str(tmp_path / "cola.csv"))
+
+        def encolar(ts, nombre):
+            storage.anadir_csv(cola_csv.COLA_PATH, {"timestamp": ts, "nombre_idea": nombre,
+                                                    "intentos": "1"}, cola_csv.CAMPOS)
+
+        encolar("t1", "A")
+        leidas = cola_csv.leer_cola()
+        encolar("t2", "B")   # llega mientras se sincroniza A
+        cola_csv.aplicar_resultados(reintentar=[f["timestamp"] for f in leidas])
+        assert [(f["nombre_idea"], f["intentos"]) for f in cola_csv.leer_cola()] == [("A", "2"), ("B", "1")]
+        cola_csv.aplicar_resultados(eliminar=["t1"])
+        assert [f["nombre_idea"] for f in cola_csv.obtener_pendientes()] == ["B"]
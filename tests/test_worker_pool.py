@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from agents.worker_pool import PoolWorkers
+
+
+@pytest.fixture
+def pool():
+    p = PoolWorkers(tamano=1, precarga=[])
+    yield p
+    p.cerrar()
+
+
+class TestPoolWorkers:
+    """Tests para el pool de workers persistentes"""
+
+    def test_devuelve_resultado_estructurado(self, pool):
+        """Verifica que el trabajo devuelve el valor de la función, no su stdout"""
+        r = pool.ejecutar("json", "loads", '{"ok": true, "publicadas": []}')
+        assert r["estado"] == "ok"
+        assert r["resultado"] == {"ok": True, "publicadas": []}
+
+    def test_error_no_mata_al_worker(self, pool):
+        """Verifica que una excepción vuelve como error y el mismo worker sigue sirviendo"""
+        pid = pool._todos[0].proceso.pid
+        r = pool.ejecutar("json", "loads", "no es json")
+        assert r["estado"] == "error" and "JSONDecodeError" in r["error"]
+        assert pool.ejecutar("json", "loads", "1")["resultado"] == 1
+        assert pool._todos[0].proceso.pid == pid
+
+    def test_timeout_y_crash_reinician_worker(self, pool):
+        """Verifica que un cuelgue o un crash se aíslan y el pool sigue funcionando"""
+        pid = pool._todos[0].proceso.pid
+        r = pool.ejecutar("time", "sleep", 30, timeout=0.5)
+        assert r["estado"] == "timeout"
+        assert pool._todos[0].proceso.pid != pid
+        assert pool.ejecutar("os", "abort")["estado"] == "caido"
+        assert pool.ejecutar("json", "loads", "2")["resultado"] == 2